@@ -7,3 +7,37 @@ class ApiKeyDescriptions:
         "List of countries, using the ISO-3166 alpha-3 code, to grant access to. Refer"
         " to the `/roles` route to get a list of available roles."
     )
+    bulk_keys = (
+        "The keys to create, all in a single transaction. If any key is invalid, none"
+        " are created."
+    )
+    bulk_format = (
+        "`ndjson` to return one key per line, or `zip` to return an archive with one"
+        " profile file per key."
+    )
+    bulk_api_key_ids = "The API keys to update."
+    bulk_roles = (
+        "Roles (countries) to grant or revoke on every key. The `ADMIN` role cannot"
+        " be granted or revoked in bulk."
+    )
+    bulk_schemas = (
+        "Schemas to grant or revoke on every key. Schemas are not granted to admin"
+        " keys."
+    )
+    bulk_roles_changed = "Number of role grants added or removed."
+    bulk_schemas_changed = "Number of schema grants added or removed."
+    last_used_at = (
+        "When the key was last used. Updated periodically, so it may lag by up to a"
+        " minute."
+    )
+    request_count = "Number of authenticated requests made with the key."
+    role_filter = "Only list keys granted any of these roles. Can be repeated."
+    schema_filter = "Only list keys granted any of these schemas. Can be repeated."
+    expired_filter = "Only list expired keys if `true`, or unexpired keys if `false`."
+    description_prefix = "Only list keys whose description starts with this value."
+    max_results = (
+        "The maximum number of keys to return. If there are more, the"
+        " `next-page-token` response header holds the `pageToken` of the next page."
+        " All keys are returned if not set."
+    )
+    page_token = "The `next-page-token` header of the previous page."
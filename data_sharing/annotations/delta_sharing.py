@@ -55,6 +55,16 @@ table_name_description = "The table name to query. It's case-insensitive."
 
 table_version_description = "A value which represents the current table version."
 
+statistics_files_without_stats_description = (
+    "The number of files without stats. These files are counted in `numFiles` and"
+    " `size`, but not in `numRecords` nor in the column statistics, so the latter are"
+    " lower bounds if this is not 0."
+)
+
+statistics_by_partition_description = (
+    "If set to true, also return the statistics of each partition of the table."
+)
+
 query_metadata_ndjson_description = """
 A sequence of JSON strings delimited by newline. Each line is a JSON object defined in
 [API Response Format in Parquet](https://github.com/delta-io/delta-sharing/blob/main/PROTOCOL.md#api-response-format-in-parquet).
@@ -110,6 +120,93 @@ The response contains multiple lines:
   - The ordering of the lines doesn't matter.
 """
 
+batch_query_ndjson_description = """
+A sequence of JSON strings delimited by newline, merging the `/query` responses of
+every requested table. Each line is the corresponding line of that table's `/query`
+response with an additional `source` key (`share`, `schema` and `name`) identifying the
+table it came from.
+- For each table, the first line contains `deltaTableVersion`, the value that is
+  otherwise returned in the `delta-table-version` header.
+- If the query for a table fails, a single line containing `error` and the
+  `statusCode` of the Delta Sharing server is returned for it.
+- Lines of different tables are interleaved; the ordering is only preserved within a
+  single table.
+"""
+
+all_tables_metadata_ndjson_description = """
+A sequence of JSON strings delimited by newline, one per table visible to the API key.
+Each line contains:
+- `source`: the `share`, `schema` and `name` of the table.
+- `deltaTableVersion`: the current version of the table, as returned by `/version`.
+- `protocol` and `metaData`: the two lines returned by `/metadata`.
+
+If the metadata of a table could not be retrieved, the line contains `error` and
+`statusCode` instead.
+The ordering of the lines doesn't matter.
+"""
+
+schema_filter_description = "Only include tables in these schemas."
+
+table_filter_description = "Only include tables with these names."
+
+arrow_columns_description = (
+    "The columns to return. If not set, all columns of the table are returned."
+)
+
+arrow_filter_description = (
+    "A predicate of the form `<column><operator><value>`, where the operator is one"
+    " of `=`, `!=`, `>`, `>=`, `<` or `<=`, e.g. `education_level=Primary`. The value"
+    " is cast to the type of the column. Multiple predicates are combined with AND."
+)
+
+arrow_limit_description = "The maximum number of rows to return."
+
+arrow_version_description = (
+    "The version of the table to read. If not set, the latest version is read."
+)
+
+arrow_stream_description = (
+    "The rows of the table in the [Arrow IPC streaming"
+    " format](https://arrow.apache.org/docs/format/Columnar.html#ipc-streaming-format)."
+    " The version read is returned in the `delta-table-version` header."
+)
+
+file_token_description = (
+    "The token in the file URL returned by a table query. It expires together with"
+    " the URL."
+)
+
+compacted_cdf_key_description = (
+    "The column(s) which uniquely identify a row, e.g. `school_id_giga`. Changes are"
+    " collapsed per distinct value of these columns."
+)
+
+compacted_cdf_stream_description = (
+    "The net change of each row between `startingVersion` and `endingVersion` in the"
+    " [Arrow IPC streaming"
+    " format](https://arrow.apache.org/docs/format/Columnar.html#ipc-streaming-format)."
+    " Each row holds the last image of the row, its `_commit_version`, and its"
+    " `_change_type`, which is one of `insert`, `update` or `delete`. Rows which were"
+    " inserted and then deleted within the range are omitted. The `endingVersion` is"
+    " returned in the `delta-table-version` header."
+)
+
+cdf_cursor_version_description = (
+    "The last table version read through `changes/cursor` by the current API key."
+)
+
+cdf_cursor_starting_version_description = (
+    "The version to start from if the current API key has no cursor on this table"
+    " yet. Ignored once a cursor exists; delete the cursor to start over."
+)
+
+cdf_cursor_ndjson_description = (
+    "The change data feed from the version after the cursor of the current API key"
+    " up to the latest table version, in the same format as `changes`. The cursor is"
+    " only advanced to the `delta-table-version` header once the whole response has"
+    " been sent. Returns `204 No Content` if there are no new versions."
+)
+
 
 class ProfileFileDescriptions:
     share_credentials_version = (
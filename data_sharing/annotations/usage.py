@@ -0,0 +1,12 @@
+class UsageDescriptions:
+    period = "Start of the period, in UTC."
+    api_key_id = "The API key which made the requests."
+    requests = "Number of successful requests."
+    files = "Number of data files referenced by the responses."
+    bytes = "Number of response bytes sent."
+    start = "Only include usage from this time on. Defaults to 30 days ago."
+    end = "Only include usage before this time. Defaults to now."
+    granularity = "Length of the periods which usage is rolled up over."
+    api_key_filter = "Only include the usage of this API key."
+    schema_filter = "Only include the usage of tables in this schema."
+    table_filter = "Only include the usage of this table."
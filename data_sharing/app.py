@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from socket import gethostname
 
 import sentry_sdk
@@ -6,7 +7,22 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import ORJSONResponse
 
 from data_sharing.constants import __version__
-from data_sharing.routers import api_key, delta_sharing, role
+from data_sharing.internal.access import TableAccessMiddleware
+from data_sharing.internal.audit import audit_log
+from data_sharing.internal.last_used import last_used_tracker
+from data_sharing.internal.listing import listing_serializer
+from data_sharing.internal.metering import usage_meter
+from data_sharing.internal.sweeper import expired_key_sweeper
+from data_sharing.internal.upstream import upstream_switch
+from data_sharing.internal.warmer import cache_warmer
+from data_sharing.routers import (
+    api_key,
+    delta_sharing,
+    files,
+    metrics,
+    role,
+    usage,
+)
 from data_sharing.settings import settings
 
 if settings.SENTRY_DSN and settings.IN_PRODUCTION:
@@ -19,6 +35,27 @@ if settings.SENTRY_DSN and settings.IN_PRODUCTION:
         server_name=f"data-sharing-proxy-{settings.DEPLOY_ENV}@{gethostname()}",
     )
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if settings.CACHE_WARMER_ENABLED:
+        cache_warmer.start()
+    listing_serializer.start()
+    last_used_tracker.start()
+    usage_meter.start()
+    expired_key_sweeper.start()
+    audit_log.start()
+    upstream_switch.start()
+    yield
+    await upstream_switch.stop()
+    await audit_log.stop()
+    await expired_key_sweeper.stop()
+    await usage_meter.stop()
+    await last_used_tracker.stop()
+    await listing_serializer.stop()
+    await cache_warmer.stop()
+
+
 app = FastAPI(
     title="Giga Data Sharing API",
     description="""
@@ -31,6 +68,7 @@ app = FastAPI(
         "persistAuthorization": True,
     },
     default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -41,6 +79,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(TableAccessMiddleware, meter=usage_meter, audit_log=audit_log)
+
 
 @app.get("/health", tags=["core"])
 async def health_check():
@@ -50,3 +90,6 @@ async def health_check():
 app.include_router(delta_sharing.router)
 app.include_router(role.router)
 app.include_router(api_key.router)
+app.include_router(metrics.router)
+app.include_router(usage.router)
+app.include_router(files.router)
@@ -1,31 +1,72 @@
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import AsyncContextManager
 
 import sqlalchemy.exc
 from loguru import logger
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
 
 from data_sharing.settings import settings
 
-engine = create_engine(
-    settings.DATABASE_URL, echo=not settings.IN_PRODUCTION, future=True
-)
+engine_options = {
+    "echo": not settings.IN_PRODUCTION,
+    "future": True,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
 
-aengine = create_async_engine(
-    settings.ASYNC_DATABASE_URL, echo=not settings.IN_PRODUCTION, future=True
-)
 
-session_maker = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+def create_asyncpg_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        **engine_options,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        },
+    )
+
+
+aengine = create_asyncpg_engine(settings.ASYNC_DATABASE_URL)
+
+# Falls back to the primary if no read replica is configured
+areplica_engine = (
+    create_asyncpg_engine(settings.ASYNC_READ_REPLICA_DATABASE_URL)
+    if settings.DB_READ_REPLICA_HOST
+    else aengine
+)
 
 asession_maker = async_sessionmaker(
     bind=aengine, autoflush=False, autocommit=False, expire_on_commit=False
 )
 
+areplica_session_maker = async_sessionmaker(
+    bind=areplica_engine, autoflush=False, autocommit=False, expire_on_commit=False
+)
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """The sync engine is only used by scripts, so it is created on first use."""
+    return create_engine(settings.DATABASE_URL, **engine_options)
+
+
+@lru_cache
+def get_session_maker() -> sessionmaker[Session]:
+    return sessionmaker(bind=get_engine(), autoflush=False, autocommit=False)
+
 
 async def get_db():
-    session = session_maker()
+    session = get_session_maker()()
     try:
         yield session
     except sqlalchemy.exc.DatabaseError as e:
@@ -46,6 +87,21 @@ async def get_async_db():
         await session.close()
 
 
+async def get_async_read_db():
+    """
+    A session for read-only work, on the read replica if one is configured. Reads
+    may lag behind writes on the primary by the replication delay.
+    """
+    session = areplica_session_maker()
+    try:
+        yield session
+    except sqlalchemy.exc.DatabaseError as e:
+        logger.error(str(e))
+        raise e
+    finally:
+        await session.close()
+
+
 @asynccontextmanager
 async def get_db_context() -> AsyncContextManager[AsyncSession]:
     session = asession_maker()
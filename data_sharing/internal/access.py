@@ -0,0 +1,132 @@
+import re
+from collections.abc import AsyncIterator
+from uuid import UUID
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from data_sharing.internal.audit import AuditLog, audit_log
+from data_sharing.internal.metering import ResponseCounter, UsageMeter, usage_meter
+from data_sharing.internal.sharing import stream_tagged_table_query
+
+TABLE_DATA_PATH = re.compile(
+    r"^/shares/(?P<share>[^/]+)/schemas/(?P<schema>[^/]+)/tables/(?P<table>[^/]+)"
+    r"/(?P<action>query|metadata|arrow|changes(?:/cursor|/compacted)?)$"
+)
+
+
+class TableAccessMiddleware:
+    """
+    Observe the table data responses sent to each API key, as they are sent, to
+    meter usage and write the audit log. Other requests are passed through
+    untouched.
+    """
+
+    def __init__(self, app: ASGIApp, meter: UsageMeter, audit_log: AuditLog):
+        self.app = app
+        self.meter = meter
+        self.audit_log = audit_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or not (self.meter.enabled or self.audit_log.enabled)
+            or (match := TABLE_DATA_PATH.match(scope["path"])) is None
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        counter = ResponseCounter()
+        metered = self.meter.enabled
+
+        async def send_and_count(message: Message):
+            # Counted after sending, so the scan does not delay the body
+            await send(message)
+            if message["type"] == "http.response.start":
+                counter.start(message)
+            elif metered and message["type"] == "http.response.body":
+                counter.feed(message.get("body", b""))
+
+        try:
+            await self.app(scope, receive, send_and_count)
+        finally:
+            # Set by the authentication check
+            key_id = scope.get("state", {}).get("api_key_id")
+            if key_id is not None and counter.status is not None:
+                self.record(key_id, match, counter)
+
+    def record(self, key_id, match: re.Match, counter: ResponseCounter):
+        share_name, schema_name, table_name = match.group("share", "schema", "table")
+        record_table_access(
+            self.meter,
+            self.audit_log,
+            key_id,
+            share_name,
+            schema_name,
+            table_name,
+            match["action"],
+            counter,
+        )
+
+
+def record_table_access(
+    meter: UsageMeter,
+    audit_log: AuditLog,
+    key_id: UUID,
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    action: str,
+    counter: ResponseCounter,
+):
+    if meter.enabled and counter.status < 400:
+        counter.scan()
+        meter.record(
+            key_id,
+            share_name,
+            schema_name,
+            table_name,
+            counter.files,
+            counter.bytes,
+        )
+    audit_log.record(
+        key_id,
+        share_name,
+        schema_name,
+        table_name,
+        action,
+        counter.version,
+        counter.status,
+    )
+
+
+async def stream_batch_table_query(
+    key_id: UUID,
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    body: dict,
+    additional_headers: dict[str, str] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Stream the tagged query of one table of a batch query, and meter and audit it
+    like a query of that table alone. Batch queries are not seen by the middleware,
+    since their response mixes the tables.
+    """
+    counter = ResponseCounter() if usage_meter.enabled or audit_log.enabled else None
+    try:
+        async for line in stream_tagged_table_query(
+            share_name, schema_name, table_name, body, additional_headers, counter
+        ):
+            yield line
+    finally:
+        if counter is not None and counter.status is not None:
+            record_table_access(
+                usage_meter,
+                audit_log,
+                key_id,
+                share_name,
+                schema_name,
+                table_name,
+                "batch-query",
+                counter,
+            )
@@ -0,0 +1,237 @@
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from typing import Any, ClassVar, Self
+
+import orjson
+
+from data_sharing.utils.streams import iter_ndjson_lines
+
+
+class Action:
+    """
+    A single line of a Delta Sharing NDJSON response. Only the fields needed for
+    processing in the proxy are decoded; the original line is kept so that records
+    which are not changed are written back byte-for-byte. Actions are read-only,
+    except for subclasses of `PatchableAction`.
+    """
+
+    __slots__ = ("raw",)
+
+    key: ClassVar[str | None] = None
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+
+    @classmethod
+    def from_object(cls, raw: bytes, obj: dict) -> Self:
+        return cls(raw)
+
+    def dumps(self) -> bytes:
+        return self.raw
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for cls in reversed(type(self).__mro__)
+            for name in getattr(cls, "__slots__", ())
+            if not name.startswith("_") and name != "raw"
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class PatchableAction(Action, ABC):
+    """
+    An action with fields which can be changed with `replace`. Only the changed
+    fields are written into the original line when it is dumped.
+    """
+
+    __slots__ = ("_changes",)
+
+    def __init__(self, raw: bytes):
+        super().__init__(raw)
+        self._changes: dict[str, Any] | None = None
+
+    def replace(self, **changes) -> Self:
+        """Return a copy with the given fields changed."""
+        out = object.__new__(type(self))
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                setattr(out, name, getattr(self, name))
+        for name, value in changes.items():
+            setattr(out, name, value)
+        out._changes = {**(self._changes or {}), **changes}
+        return out
+
+    @abstractmethod
+    def _patch(self, obj: dict, changes: dict[str, Any]):
+        """Write the changed fields into the decoded original line."""
+
+    def dumps(self) -> bytes:
+        if not self._changes:
+            return self.raw
+
+        obj = orjson.loads(self.raw)
+        self._patch(obj, self._changes)
+        return orjson.dumps(obj)
+
+
+class Unknown(Action):
+    """Lines without a known action, e.g. errors or custom tags."""
+
+    __slots__ = ()
+
+
+class Protocol(Action):
+    __slots__ = ("min_reader_version", "min_writer_version")
+
+    key = "protocol"
+
+    @classmethod
+    def from_object(cls, raw: bytes, obj: dict) -> Self:
+        protocol = obj["protocol"]
+        protocol = protocol.get("deltaProtocol", protocol)
+        out = cls(raw)
+        out.min_reader_version = protocol.get("minReaderVersion")
+        out.min_writer_version = protocol.get("minWriterVersion")
+        return out
+
+
+class Metadata(Action):
+    __slots__ = ("id", "schema_string", "partition_columns", "version")
+
+    key = "metaData"
+
+    @classmethod
+    def from_object(cls, raw: bytes, obj: dict) -> Self:
+        wrapper = obj["metaData"]
+        metadata = wrapper.get("deltaMetadata", wrapper)
+        out = cls(raw)
+        out.id = metadata.get("id")
+        out.schema_string = metadata.get("schemaString")
+        out.partition_columns = metadata.get("partitionColumns") or []
+        out.version = wrapper.get("version")
+        return out
+
+
+class File(PatchableAction):
+    """
+    A data file, in either the parquet format, where the line holds a pre-signed
+    `url`, or the delta format, where it wraps an `add`, `remove` or `cdc` action
+    with a `path`. Both are exposed as `url`.
+    """
+
+    __slots__ = (
+        "id",
+        "url",
+        "partition_values",
+        "size",
+        "stats",
+        "version",
+        "timestamp",
+        "expiration_timestamp",
+    )
+
+    key = "file"
+
+    # (attribute, JSON key, whether it lives in the wrapped delta action)
+    _FIELDS: ClassVar[tuple[tuple[str, str, bool], ...]] = (
+        ("id", "id", False),
+        ("url", "url", True),
+        ("partition_values", "partitionValues", True),
+        ("size", "size", True),
+        ("stats", "stats", True),
+        ("version", "version", False),
+        ("timestamp", "timestamp", False),
+        ("expiration_timestamp", "expirationTimestamp", False),
+    )
+
+    @classmethod
+    def from_object(cls, raw: bytes, obj: dict) -> Self:
+        file = obj[cls.key]
+        action = file
+        if (delta_action := file.get("deltaSingleAction")) is not None:
+            kind, action = next(iter(delta_action.items()))
+            cls = _DELTA_ACTION_TYPES.get(kind, cls)
+
+        out = cls(raw)
+        for name, key, in_action in cls._FIELDS:
+            source = action if in_action else file
+            if key == "url" and source is not file:
+                key = "path"
+            setattr(out, name, source.get(key))
+        return out
+
+    @property
+    def num_records(self) -> int | None:
+        if not self.stats:
+            return None
+        num_records = orjson.loads(self.stats).get("numRecords")
+        return num_records if isinstance(num_records, int) else None
+
+    def _patch(self, obj: dict, changes: dict[str, Any]):
+        file = obj[next(iter(obj))]
+        action = file
+        if (delta_action := file.get("deltaSingleAction")) is not None:
+            action = next(iter(delta_action.values()))
+
+        for name, key, in_action in self._FIELDS:
+            if name not in changes:
+                continue
+            target = action if in_action else file
+            if key == "url" and target is not file:
+                key = "path"
+            target[key] = changes[name]
+
+
+class Add(File):
+    __slots__ = ()
+
+    key = "add"
+
+
+class Remove(File):
+    __slots__ = ()
+
+    key = "remove"
+
+
+class Cdf(File):
+    __slots__ = ()
+
+    key = "cdf"
+
+
+_DELTA_ACTION_TYPES: dict[str, type[File]] = {"add": Add, "remove": Remove, "cdc": Cdf}
+
+_ACTION_TYPES: dict[str, type[Action]] = {
+    cls.key: cls for cls in (Protocol, Metadata, File, Add, Remove, Cdf)
+}
+
+
+def parse_action(line: bytes) -> Action:
+    obj = orjson.loads(line)
+    if isinstance(obj, dict) and len(obj) == 1:
+        key = next(iter(obj))
+        if (cls := _ACTION_TYPES.get(key)) is not None:
+            return cls.from_object(line, obj)
+    return Unknown(line)
+
+
+def iter_actions(lines: Iterable[bytes]) -> Iterator[Action]:
+    for line in lines:
+        if line.strip():
+            yield parse_action(line)
+
+
+async def parse_actions(chunks: AsyncIterable[bytes]) -> AsyncIterator[Action]:
+    """
+    Lazily parse an NDJSON response, e.g. `httpx.Response.aiter_bytes()`, into
+    actions. Lines may be split across chunks arbitrarily.
+    """
+    async for line in iter_ndjson_lines(chunks):
+        yield parse_action(line)
+
+
+async def serialize_actions(actions: AsyncIterable[Action]) -> AsyncIterator[bytes]:
+    async for action in actions:
+        yield action.dumps() + b"\n"
@@ -0,0 +1,405 @@
+import base64
+import io
+import re
+import zipfile
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+from secrets import token_urlsafe
+from uuid import UUID, uuid4
+from zoneinfo import ZoneInfo
+
+import orjson
+import sqlalchemy as sa
+from sqlalchemy import (
+    Select,
+    delete,
+    exists,
+    func,
+    select,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import JSON, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from data_sharing.constants import constants
+from data_sharing.db import areplica_session_maker
+from data_sharing.internal.hashing import get_key_hashes
+from data_sharing.models import (
+    ApiKey,
+    Role,
+    Schema,
+    apikey_role_association_table,
+    apikey_schema_association_table,
+)
+from data_sharing.schemas.api_key import CreateApiKeyRequest
+from data_sharing.schemas.delta_sharing import ProfileFile
+
+
+class InvalidPageTokenError(ValueError):
+    pass
+
+
+class InvalidGrantsError(ValueError):
+    pass
+
+
+def _grants(association: sa.Table, model: type[Role | Schema], column: str):
+    """Aggregate the roles or schemas of each key into a JSON array."""
+    return (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    func.json_build_object(
+                        "id", model.id, "description", model.description
+                    ),
+                    type_=JSON,
+                ),
+                sa.literal_column("'[]'::json"),
+                type_=JSON,
+            )
+        )
+        .select_from(association.join(model, association.c[column] == model.id))
+        .where(association.c.api_key_id == ApiKey.id)
+        .scalar_subquery()
+    )
+
+
+def encode_page_token(created: datetime, key_id: UUID) -> str:
+    return base64.urlsafe_b64encode(
+        orjson.dumps([created.isoformat(), str(key_id)])
+    ).decode()
+
+
+def decode_page_token(token: str) -> tuple[datetime, UUID]:
+    try:
+        created, key_id = orjson.loads(base64.urlsafe_b64decode(token))
+        return datetime.fromisoformat(created), UUID(key_id)
+    except (TypeError, ValueError) as e:
+        raise InvalidPageTokenError("Invalid page token") from e
+
+
+def build_api_key_query(
+    roles: list[str] | None = None,
+    schemas: list[str] | None = None,
+    expired: bool | None = None,
+    description_prefix: str | None = None,
+    page_token: str | None = None,
+) -> Select:
+    """
+    Select API keys, newest first, with their roles and schemas aggregated per key
+    instead of loading the relationship graph. Paginated on (created, id).
+    """
+    query = select(
+        ApiKey.id,
+        ApiKey.created,
+        ApiKey.description,
+        ApiKey.expiration,
+        ApiKey.last_used_at,
+        ApiKey.request_count,
+        _grants(apikey_role_association_table, Role, "role_id").label("roles"),
+        _grants(apikey_schema_association_table, Schema, "schema_id").label("schemas"),
+    ).order_by(ApiKey.created.desc(), ApiKey.id.desc())
+
+    if roles:
+        query = query.where(
+            exists().where(
+                apikey_role_association_table.c.api_key_id == ApiKey.id,
+                apikey_role_association_table.c.role_id.in_(roles),
+            )
+        )
+    if schemas:
+        query = query.where(
+            exists().where(
+                apikey_schema_association_table.c.api_key_id == ApiKey.id,
+                apikey_schema_association_table.c.schema_id.in_(schemas),
+            )
+        )
+    if expired is not None:
+        is_expired = ApiKey.expiration.is_not(None) & (ApiKey.expiration <= func.now())
+        query = query.where(is_expired if expired else ~is_expired)
+    if description_prefix:
+        query = query.where(
+            ApiKey.description.startswith(description_prefix, autoescape=True)
+        )
+    if page_token is not None:
+        created, key_id = decode_page_token(page_token)
+        query = query.where(
+            tuple_(ApiKey.created, ApiKey.id)
+            < tuple_(
+                sa.literal(created, ApiKey.created.type),
+                sa.literal(key_id, ApiKey.id.type),
+            )
+        )
+    return query
+
+
+async def list_api_keys_page(
+    db: AsyncSession, query: Select, max_results: int
+) -> tuple[list[dict], str | None]:
+    rows = (await db.execute(query.limit(max_results + 1))).mappings().all()
+    next_page_token = None
+    if len(rows) > max_results:
+        rows = rows[:max_results]
+        next_page_token = encode_page_token(rows[-1]["created"], rows[-1]["id"])
+    return [dict(row) for row in rows], next_page_token
+
+
+async def stream_api_keys_ndjson(
+    query: Select, batch_size: int = 1000
+) -> AsyncIterator[bytes]:
+    """
+    Export API keys as NDJSON through a server-side cursor. Uses its own session,
+    as it runs while the response is being sent.
+    """
+    async with areplica_session_maker() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.mappings().partitions():
+            yield b"".join(orjson.dumps(dict(row)) + b"\n" for row in rows)
+
+
+async def validate_grants(db: AsyncSession, requests: list[CreateApiKeyRequest]):
+    """
+    Check the roles and schemas requested for a batch of keys, with a single query
+    for the whole batch. Raises `InvalidGrantsError` listing every problem found.
+    """
+    errors = []
+    roles, schemas = set(), set()
+    for i, request in enumerate(requests):
+        roles.update(request.roles)
+        if "ADMIN" in request.roles:
+            continue
+        if not request.schemas:
+            errors.append(f"Schemas are required for non-admin API keys (key {i})")
+        schemas.update(request.schemas)
+
+    errors.extend(await find_missing_grants(db, roles, schemas))
+    if errors:
+        raise InvalidGrantsError("; ".join(errors))
+
+
+async def find_missing_grants(
+    db: AsyncSession,
+    roles: set[str],
+    schemas: set[str],
+    api_key_ids: set[UUID] = frozenset(),
+) -> list[str]:
+    """Describe the roles, schemas and API keys that do not exist, in one query."""
+    found = (
+        await db.execute(
+            union_all(
+                select(sa.literal("role").label("kind"), Role.id).where(
+                    Role.id.in_(roles)
+                ),
+                select(sa.literal("schema").label("kind"), Schema.id).where(
+                    Schema.id.in_(schemas)
+                ),
+                select(
+                    sa.literal("key").label("kind"), sa.cast(ApiKey.id, sa.String)
+                ).where(ApiKey.id.in_(api_key_ids)),
+            )
+        )
+    ).all()
+    errors = []
+    for kind, requested, label in (
+        ("role", roles, "role(s)"),
+        ("schema", schemas, "schema(s)"),
+        ("key", {str(key_id) for key_id in api_key_ids}, "API key(s)"),
+    ):
+        if diff := requested.difference(id_ for kind_, id_ in found if kind_ == kind):
+            errors.append(
+                f"Invalid {label}: {', '.join(f'`{d}`' for d in sorted(diff))}"
+            )
+    return errors
+
+
+async def bulk_create_api_keys(
+    db: AsyncSession, requests: list[CreateApiKeyRequest]
+) -> list[dict]:
+    """
+    Create a batch of API keys in a single transaction. Secrets are hashed in the
+    worker pool beforehand, and keys and grants are inserted with one statement per
+    table. Returns the description and profile file of each key, in request order.
+    """
+    await validate_grants(db, requests)
+
+    secrets = [token_urlsafe(constants.API_KEY_BYTES_LENGTH) for _ in requests]
+    hashes = await get_key_hashes(secrets)
+    now = datetime.now().astimezone(ZoneInfo("UTC"))
+
+    keys, role_grants, schema_grants, created = [], [], [], []
+    for request, secret, hashed in zip(requests, secrets, hashes, strict=True):
+        key_id = uuid4()
+        expiration = (
+            now + timedelta(days=request.validity) if request.validity > 0 else None
+        )
+        keys.append(
+            {
+                "id": key_id,
+                "description": request.description,
+                "secret": hashed,
+                "expiration": expiration,
+            }
+        )
+        role_grants.extend(
+            {"api_key_id": key_id, "role_id": role_id} for role_id in set(request.roles)
+        )
+        if "ADMIN" not in request.roles:
+            schema_grants.extend(
+                {"api_key_id": key_id, "schema_id": schema_id}
+                for schema_id in set(request.schemas)
+            )
+        created.append(
+            {
+                "id": str(key_id),
+                "description": request.description,
+                "profile": ProfileFile(
+                    bearerToken=f"{key_id}:{secret}", expirationTime=expiration
+                ).model_dump(mode="json", warnings=False),
+            }
+        )
+
+    await db.execute(insert(ApiKey.__table__), keys)
+    if role_grants:
+        await db.execute(insert(apikey_role_association_table), role_grants)
+    if schema_grants:
+        await db.execute(insert(apikey_schema_association_table), schema_grants)
+    await db.commit()
+    return created
+
+
+def build_profiles_zip(created: list[dict]) -> bytes:
+    """One `.share` profile file per key, named after its position and description."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i, key in enumerate(created):
+            name = re.sub(r"[^A-Za-z0-9_-]+", "-", key["description"]).strip("-")
+            archive.writestr(
+                f"{i:04d}-{name[:50] or key['id']}.share",
+                orjson.dumps(key["profile"], option=orjson.OPT_INDENT_2),
+            )
+    return buffer.getvalue()
+
+
+def _is_admin_key(api_key_id):
+    return exists().where(
+        apikey_role_association_table.c.api_key_id == api_key_id,
+        apikey_role_association_table.c.role_id == "ADMIN",
+    )
+
+
+async def _validate_bulk_grants(
+    db: AsyncSession, api_key_ids: set[UUID], roles: set[str], schemas: set[str]
+):
+    if "ADMIN" in roles:
+        raise InvalidGrantsError("The ADMIN role cannot be granted or revoked in bulk")
+    if errors := await find_missing_grants(db, roles, schemas, api_key_ids):
+        raise InvalidGrantsError("; ".join(errors))
+
+
+async def bulk_grant(
+    db: AsyncSession, api_key_ids: set[UUID], roles: set[str], schemas: set[str]
+) -> dict[str, int]:
+    """
+    Grant roles and schemas to many keys with one `INSERT ... SELECT ... ON CONFLICT
+    DO NOTHING` per association table, so existing grants are left untouched.
+    Schemas are not granted to admin keys. Returns the number of rows added.
+    """
+    await _validate_bulk_grants(db, api_key_ids, roles, schemas)
+    keys = select(ApiKey.id).where(ApiKey.id.in_(api_key_ids)).cte("keys")
+    added = {"roles": 0, "schemas": 0}
+    if roles:
+        result = await db.execute(
+            insert(apikey_role_association_table)
+            .from_select(
+                ["api_key_id", "role_id"],
+                select(keys.c.id, Role.id).where(Role.id.in_(roles)),
+            )
+            .on_conflict_do_nothing()
+        )
+        added["roles"] = result.rowcount
+    if schemas:
+        result = await db.execute(
+            insert(apikey_schema_association_table)
+            .from_select(
+                ["api_key_id", "schema_id"],
+                select(keys.c.id, Schema.id).where(
+                    Schema.id.in_(schemas), ~_is_admin_key(keys.c.id)
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+        added["schemas"] = result.rowcount
+    await db.commit()
+    return added
+
+
+async def bulk_revoke(
+    db: AsyncSession, api_key_ids: set[UUID], roles: set[str], schemas: set[str]
+) -> dict[str, int]:
+    """
+    Revoke roles and schemas from many keys with one `DELETE` per association
+    table. Non-admin keys must keep at least one schema, and keys which had roles
+    must keep at least one, since a key without roles can read every table of its
+    schemas. Otherwise nothing is revoked. Returns the number of rows removed.
+    """
+    await _validate_bulk_grants(db, api_key_ids, roles, schemas)
+    removed = {"roles": 0, "schemas": 0}
+    if roles:
+        revoked_key_ids = (
+            await db.scalars(
+                delete(apikey_role_association_table)
+                .where(
+                    apikey_role_association_table.c.api_key_id.in_(api_key_ids),
+                    apikey_role_association_table.c.role_id.in_(roles),
+                )
+                .returning(apikey_role_association_table.c.api_key_id)
+            )
+        ).all()
+        removed["roles"] = len(revoked_key_ids)
+        without_roles = (
+            await db.scalars(
+                select(ApiKey.id).where(
+                    ApiKey.id.in_(set(revoked_key_ids)),
+                    ~exists().where(
+                        apikey_role_association_table.c.api_key_id == ApiKey.id
+                    ),
+                )
+            )
+        ).all()
+        if without_roles:
+            await db.rollback()
+            raise InvalidGrantsError(
+                "Roles are required for API keys which had roles, since keys without"
+                " roles can read every table of their schemas: "
+                + ", ".join(f"`{key_id}`" for key_id in sorted(map(str, without_roles)))
+            )
+    if schemas:
+        result = await db.execute(
+            delete(apikey_schema_association_table).where(
+                apikey_schema_association_table.c.api_key_id.in_(api_key_ids),
+                apikey_schema_association_table.c.schema_id.in_(schemas),
+            )
+        )
+        removed["schemas"] = result.rowcount
+        without_schemas = (
+            await db.scalars(
+                select(ApiKey.id).where(
+                    ApiKey.id.in_(api_key_ids),
+                    ~_is_admin_key(ApiKey.id),
+                    ~exists().where(
+                        apikey_schema_association_table.c.api_key_id == ApiKey.id
+                    ),
+                )
+            )
+        ).all()
+        if without_schemas:
+            await db.rollback()
+            raise InvalidGrantsError(
+                "Schemas are required for non-admin API keys: "
+                + ", ".join(
+                    f"`{key_id}`" for key_id in sorted(map(str, without_schemas))
+                )
+            )
+    await db.commit()
+    return removed
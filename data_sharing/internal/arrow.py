@@ -0,0 +1,181 @@
+import io
+import re
+from collections.abc import Iterable, Iterator
+from functools import lru_cache
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import yaml
+from deltalake import DeltaTable
+from deltalake.exceptions import TableNotFoundError
+
+from data_sharing.settings import settings
+
+_FILTER_PATTERN = re.compile(r"^\s*([\w.]+)\s*(==|=|!=|>=|<=|>|<)\s*(.*?)\s*$")
+
+_OPERATORS = {
+    "=": lambda field, value: field == value,
+    "==": lambda field, value: field == value,
+    "!=": lambda field, value: field != value,
+    ">": lambda field, value: field > value,
+    ">=": lambda field, value: field >= value,
+    "<": lambda field, value: field < value,
+    "<=": lambda field, value: field <= value,
+}
+
+
+class InvalidQueryError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=1)
+def load_table_locations(
+    path: Path, mtime_ns: int, size: int
+) -> dict[tuple[str, str, str], str]:
+    """
+    Map each (share, schema, table) in the Delta Sharing server config to its
+    storage location, as a URI that can be read by `deltalake`. The modification
+    time and size of the config are only part of the cache key.
+    """
+    with open(path) as f:
+        config = yaml.safe_load(f)
+
+    out = {}
+    for share in config["shares"]:
+        for schema in share["schemas"]:
+            for table in schema["tables"]:
+                location = (
+                    table["location"]
+                    .replace("{{.CONTAINER_NAME}}", settings.CONTAINER_NAME)
+                    .replace("{{.STORAGE_ACCOUNT_NAME}}", settings.STORAGE_ACCOUNT_NAME)
+                    .replace("{{.CONTAINER_PATH}}", settings.CONTAINER_PATH)
+                )
+                # The JVM reads through the Hadoop `wasbs` driver; `deltalake` reads
+                # the same path through the ADLS Gen2 endpoint
+                location = re.sub(
+                    r"^wasbs://([^@]+)@([^.]+)\.blob\.core\.windows\.net",
+                    r"abfss://\1@\2.dfs.core.windows.net",
+                    location,
+                )
+                key = (
+                    share["name"].lower(),
+                    schema["name"].lower(),
+                    table["name"].lower(),
+                )
+                out[key] = location
+    return out
+
+
+def get_table_locations() -> dict[tuple[str, str, str], str]:
+    """
+    The table locations of the current Delta Sharing server config, which is loaded
+    again whenever it changes, e.g. when it is mounted from a ConfigMap.
+    """
+    path = settings.DELTA_SHARING_CONFIG_PATH
+    stat = path.stat()
+    return load_table_locations(path, stat.st_mtime_ns, stat.st_size)
+
+
+def get_storage_options(location: str) -> dict[str, str]:
+    if location.startswith("abfss://"):
+        return {
+            "account_name": settings.STORAGE_ACCOUNT_NAME,
+            "account_key": settings.STORAGE_ACCESS_KEY,
+        }
+    return {}
+
+
+def parse_filters(filters: list[str], schema: pa.Schema) -> ds.Expression | None:
+    """
+    Parse simple predicates such as `education_level=Primary` or `latitude>=10.5`
+    into a dataset filter. Values are cast to the type of their column.
+    """
+    expression = None
+    for raw in filters:
+        if (match := _FILTER_PATTERN.match(raw)) is None:
+            raise InvalidQueryError(f"Invalid filter `{raw}`")
+
+        column, operator, value = match.groups()
+        if (index := schema.get_field_index(column)) == -1:
+            raise InvalidQueryError(f"Unknown column `{column}` in filter `{raw}`")
+
+        try:
+            scalar = pc.cast(pa.scalar(value), schema.field(index).type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise InvalidQueryError(f"Invalid value in filter `{raw}`: {e}") from e
+
+        predicate = _OPERATORS[operator](ds.field(column), scalar)
+        expression = predicate if expression is None else expression & predicate
+    return expression
+
+
+def open_table_scanner(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    columns: list[str] | None = None,
+    filters: list[str] | None = None,
+    version: int | None = None,
+) -> tuple[ds.Scanner, int]:
+    """Returns a scanner of the table and the version it reads."""
+    key = (share_name.lower(), schema_name.lower(), table_name.lower())
+    if (location := get_table_locations().get(key)) is None:
+        raise FileNotFoundError(
+            f"Table `{share_name}`.`{schema_name}`.`{table_name}` not found"
+        )
+
+    try:
+        table = DeltaTable(
+            location, version=version, storage_options=get_storage_options(location)
+        )
+    except TableNotFoundError as e:
+        raise FileNotFoundError(
+            f"Table `{share_name}`.`{schema_name}`.`{table_name}` not found"
+        ) from e
+    dataset = table.to_pyarrow_dataset()
+    if columns is not None and (
+        unknown := set(columns).difference(dataset.schema.names)
+    ):
+        raise InvalidQueryError(
+            f"Unknown column(s): {', '.join(f'`{c}`' for c in sorted(unknown))}"
+        )
+
+    scanner = dataset.scanner(
+        columns=columns,
+        filter=parse_filters(filters or [], dataset.schema),
+        batch_size=settings.ARROW_BATCH_SIZE,
+    )
+    return scanner, table.version()
+
+
+def iter_arrow_stream(
+    schema: pa.Schema, batches: Iterable[pa.RecordBatch], limit: int | None = None
+) -> Iterator[bytes]:
+    """
+    Serialize record batches into the Arrow IPC streaming format, one batch at a
+    time so memory stays bounded by the batch size.
+    """
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def flush() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return chunk
+
+    yield flush()
+    remaining = limit
+    for batch in batches:
+        if remaining is not None:
+            if remaining <= 0:
+                break
+            batch = batch.slice(0, remaining)
+            remaining -= batch.num_rows
+        if batch.num_rows > 0:
+            writer.write_batch(batch)
+            yield flush()
+    writer.close()
+    yield flush()
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from datetime import UTC, datetime
+from typing import Literal
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from data_sharing.db import asession_maker
+from data_sharing.internal.metrics import register_collector
+from data_sharing.internal.partitions import ensure_monthly_partitions
+from data_sharing.models import AuditEvent
+from data_sharing.settings import settings
+
+
+class AuditLog:
+    """
+    Non-blocking audit log of table data accesses. Events are put on a bounded
+    in-memory queue on the request path, and a background writer inserts them in
+    batches into the monthly partitions of `audit_events`, whenever a batch is full
+    or every `flush_interval`.
+
+    If the queue is full, e.g. while the database is down, events are dropped
+    according to `overflow_policy` and counted. A failed batch is retried on the
+    next flush, before any other event, so at most the queue and one batch are held
+    in memory. The queue is flushed on shutdown, for up to `shutdown_timeout`.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        overflow_policy: Literal["drop_newest", "drop_oldest"],
+        shutdown_timeout: float,
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.shutdown_timeout = shutdown_timeout
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_queue_size)
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_writes = 0
+        self.last_write_at: float | None = None
+        self.last_write_duration: float | None = None
+        self._retry: list[dict] | None = None
+        self._batch_ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def record(
+        self,
+        api_key_id: UUID,
+        share_name: str,
+        schema_name: str,
+        table_name: str,
+        action: str,
+        table_version: int | None,
+        status_code: int,
+    ):
+        if not self.enabled:
+            return
+
+        event = {
+            "occurred_at": datetime.now(UTC),
+            "api_key_id": api_key_id,
+            "share_name": share_name,
+            "schema_name": schema_name,
+            "table_name": table_name,
+            "action": action,
+            "table_version": table_version,
+            "status_code": status_code,
+        }
+        if self.queue.full():
+            self.dropped += 1
+            if self.overflow_policy == "drop_newest":
+                return
+            self.queue.get_nowait()
+
+        self.queue.put_nowait(event)
+        self.enqueued += 1
+        if self.queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    async def write(self, events: list[dict]) -> bool:
+        start = time.monotonic()
+        try:
+            await ensure_monthly_partitions(
+                AuditEvent.__tablename__, {event["occurred_at"] for event in events}
+            )
+            async with asession_maker() as db:
+                await db.execute(insert(AuditEvent), events)
+                await db.commit()
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning(f"Could not write {len(events)} audit events: {e}")
+            self.failed_writes += 1
+            return False
+
+        self.written += len(events)
+        self.last_write_at = time.time()
+        self.last_write_duration = time.monotonic() - start
+        return True
+
+    async def flush(self):
+        while True:
+            if self._retry is None:
+                if self.queue.empty():
+                    return
+                self._retry = [
+                    self.queue.get_nowait()
+                    for _ in range(min(self.batch_size, self.queue.qsize()))
+                ]
+            if not await self.write(self._retry):
+                return
+            self._retry = None
+
+    async def run_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except TimeoutError:
+                pass
+            self._batch_ready.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"Audit log flush failed: {e}")
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        try:
+            await asyncio.wait_for(self.flush(), self.shutdown_timeout)
+        except TimeoutError:
+            pass
+        lost = self.queue.qsize() + len(self._retry or ())
+        if lost:
+            logger.error(f"Lost {lost} audit events on shutdown")
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "overflow_policy": self.overflow_policy,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "retrying": len(self._retry or ()),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_writes": self.failed_writes,
+            "last_write_at": self.last_write_at,
+            "last_write_duration": self.last_write_duration,
+        }
+
+
+audit_log = AuditLog(
+    enabled=settings.AUDIT_LOG_ENABLED,
+    max_queue_size=settings.AUDIT_LOG_QUEUE_SIZE,
+    batch_size=settings.AUDIT_LOG_BATCH_SIZE,
+    flush_interval=settings.AUDIT_LOG_FLUSH_INTERVAL_SECONDS,
+    overflow_policy=settings.AUDIT_LOG_OVERFLOW_POLICY,
+    shutdown_timeout=settings.AUDIT_LOG_SHUTDOWN_TIMEOUT_SECONDS,
+)
+
+register_collector("audit_log", audit_log.metrics)
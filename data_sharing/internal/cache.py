@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class TTLCache:
+    """
+    In-process LRU cache whose entries expire after `ttl` seconds.
+
+    `get_or_fetch` collapses concurrent misses for the same key into a single call
+    to `fetch`, so a burst of requests for a cold key results in one upstream call.
+
+    With `maxbytes`, the total `sizeof` of the entries is bounded as well, and
+    values larger than `maxbytes` are not stored.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        maxbytes: int | None = None,
+        sizeof: Callable[[Any], int] | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        # key -> (expiry, value, size)
+        self._data: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        # Incremented by `clear`, so that fetches started before are not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self.invalidate(key)
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self.invalidate(key)
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+
+        self._data[key] = (time.monotonic() + self.ttl, value, size)
+        self.nbytes += size
+        while len(self._data) > self.maxsize or (
+            self.maxbytes is not None and self.nbytes > self.maxbytes
+        ):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self.nbytes -= evicted_size
+
+    def invalidate(self, key: Hashable):
+        if (entry := self._data.pop(key, None)) is not None:
+            self.nbytes -= entry[2]
+
+    def clear(self):
+        self._data.clear()
+        self.nbytes = 0
+        self._inflight.clear()
+        self._generation += 1
+
+    async def get_or_fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        sentinel = object()
+        if (value := self.get(key, sentinel)) is not sentinel:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        if (inflight := self._inflight.get(key)) is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            if generation == self._generation:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if not future.done():
+                future.cancel()
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
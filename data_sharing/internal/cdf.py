@@ -0,0 +1,199 @@
+import asyncio
+from typing import Any
+
+import httpx
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from data_sharing.internal.arrow import InvalidQueryError
+from data_sharing.internal.cache import TTLCache
+from data_sharing.internal.files import file_cache, get_local_path
+from data_sharing.internal.sharing import fetch_table_changes, fetch_table_version
+from data_sharing.settings import settings
+
+change_file_client = httpx.AsyncClient(timeout=300)
+
+compacted_cdf_cache = TTLCache(
+    maxsize=settings.COMPACTED_CDF_CACHE_MAX_SIZE,
+    ttl=settings.COMPACTED_CDF_CACHE_TTL_SECONDS,
+    maxbytes=settings.COMPACTED_CDF_CACHE_MAX_BYTES,
+    sizeof=lambda changes: 0 if changes is None else changes.nbytes,
+)
+
+CHANGE_TYPE = "_change_type"
+COMMIT_VERSION = "_commit_version"
+_SEQUENCE = "_sequence"
+
+# Rows of `add` and `remove` files are inserts and deletes; `cdf` files have a
+# `_change_type` column
+_FILE_CHANGE_TYPES = {"cdf": None, "add": "insert", "remove": "delete"}
+
+# Within a commit, the pre-image of a row comes before its post-image
+_EXISTS_BEFORE = ("delete", "update_preimage")
+_EXISTS_AFTER = ("insert", "update_postimage")
+
+
+def get_change_files(content: bytes) -> list[dict[str, Any]]:
+    """Get the `cdf`, `add` and `remove` files of a `/changes` response."""
+    files = []
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+
+        obj = orjson.loads(line)
+        for key, change_type in _FILE_CHANGE_TYPES.items():
+            if (file := obj.get(key)) is not None:
+                files.append({**file, "changeType": change_type})
+    return files
+
+
+async def fetch_change_file(url: str) -> str | pa.BufferReader:
+    """
+    Get a change file from the file cache if it is enabled, as for the `/files`
+    route, or else from the local disk for `file://` URLs or from storage into
+    memory.
+    """
+    if settings.FILE_CACHE_ENABLED:
+        return str(await file_cache.get(url))
+    if (path := get_local_path(url)) is not None:
+        return str(path)
+
+    res = await change_file_client.get(url)
+    res.raise_for_status()
+    return pa.BufferReader(res.content)
+
+
+def read_change_file(source, file: dict[str, Any]) -> pa.Table:
+    table = pq.read_table(source)
+    for column, value in (file.get("partitionValues") or {}).items():
+        if column not in table.column_names:
+            table = table.append_column(column, pa.array([value] * table.num_rows))
+    if file["changeType"] is not None:
+        table = table.append_column(
+            CHANGE_TYPE, pa.array([file["changeType"]] * table.num_rows)
+        )
+    return table.append_column(
+        COMMIT_VERSION, pa.array([file["version"]] * table.num_rows, pa.int64())
+    )
+
+
+def compact_changes(events: pa.Table, keys: list[str]) -> pa.Table:
+    """
+    Collapse row-level change events into the net change of each key over the whole
+    range: `insert` if the row did not exist before the range, `delete` if it does
+    not exist after it, and `update` otherwise. Rows which were inserted and deleted
+    within the range are dropped. Each output row holds the last image of the key.
+    """
+    if unknown := set(keys).difference(events.column_names):
+        raise InvalidQueryError(
+            f"Unknown key column(s): {', '.join(f'`{k}`' for k in sorted(unknown))}"
+        )
+
+    num_rows = events.num_rows
+    is_after = pc.is_in(events[CHANGE_TYPE], value_set=pa.array(_EXISTS_AFTER))
+    # Total order of the events: by commit version, pre-images first, then arrival.
+    # The row index is the remainder, so the first and last row can be recovered.
+    sequence = pc.add(
+        pc.multiply(
+            pc.add(
+                pc.multiply(events[COMMIT_VERSION], 2), pc.cast(is_after, pa.int64())
+            ),
+            num_rows,
+        ),
+        pa.array(range(num_rows), pa.int64()),
+    )
+    bounds = (
+        events.select(keys)
+        .append_column(_SEQUENCE, sequence)
+        .group_by(keys)
+        .aggregate([(_SEQUENCE, "min"), (_SEQUENCE, "max")])
+    )
+    first = pc.subtract(
+        bounds[f"{_SEQUENCE}_min"],
+        pc.multiply(pc.divide(bounds[f"{_SEQUENCE}_min"], num_rows), num_rows),
+    )
+    last = pc.subtract(
+        bounds[f"{_SEQUENCE}_max"],
+        pc.multiply(pc.divide(bounds[f"{_SEQUENCE}_max"], num_rows), num_rows),
+    )
+
+    out = events.take(last)
+    existed_before = pc.is_in(
+        events[CHANGE_TYPE].take(first), value_set=pa.array(_EXISTS_BEFORE)
+    )
+    exists_after = pc.is_in(out[CHANGE_TYPE], value_set=pa.array(_EXISTS_AFTER))
+    net_change_type = pc.if_else(
+        exists_after,
+        pc.if_else(existed_before, "update", "insert"),
+        pc.if_else(existed_before, "delete", pa.scalar(None, pa.string())),
+    )
+
+    out = out.set_column(
+        out.schema.get_field_index(CHANGE_TYPE), CHANGE_TYPE, net_change_type
+    )
+    return out.filter(pc.is_valid(out[CHANGE_TYPE])).sort_by(
+        [(key, "ascending") for key in keys]
+    )
+
+
+async def load_change_events(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    starting_version: int,
+    ending_version: int,
+) -> pa.Table | None:
+    content = await fetch_table_changes(
+        share_name, schema_name, table_name, starting_version, ending_version
+    )
+    files = get_change_files(content)
+    if not files:
+        return None
+
+    semaphore = asyncio.Semaphore(settings.COMPACTED_CDF_CONCURRENCY)
+
+    async def read(file: dict[str, Any]) -> pa.Table:
+        async with semaphore:
+            source = await fetch_change_file(file["url"])
+            return await asyncio.to_thread(read_change_file, source, file)
+
+    tables = await asyncio.gather(*[read(file) for file in files])
+    return pa.concat_tables(tables, promote_options="default")
+
+
+async def get_compacted_changes(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    keys: list[str],
+    starting_version: int,
+    ending_version: int | None = None,
+) -> pa.Table | None:
+    """
+    Get the net changes of a table between two versions, inclusive. Results are
+    cached per (table, starting version, ending version, keys).
+    """
+    if ending_version is None:
+        ending_version = await fetch_table_version(share_name, schema_name, table_name)
+
+    async def fetch():
+        events = await load_change_events(
+            share_name, schema_name, table_name, starting_version, ending_version
+        )
+        if events is None:
+            return None
+        return await asyncio.to_thread(compact_changes, events, keys)
+
+    return await compacted_cdf_cache.get_or_fetch(
+        (
+            share_name,
+            schema_name,
+            table_name,
+            starting_version,
+            ending_version,
+            tuple(keys),
+        ),
+        fetch,
+    )
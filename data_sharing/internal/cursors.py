@@ -0,0 +1,110 @@
+from collections.abc import AsyncIterator
+
+import httpx
+from pydantic import UUID4
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from data_sharing.db import get_db_context
+from data_sharing.internal.files import rewrite_file_url
+from data_sharing.models import CdfCursor
+from data_sharing.settings import settings
+from data_sharing.utils.streams import iter_ndjson_lines
+
+
+async def get_cursor(
+    db: AsyncSession,
+    api_key_id: UUID4,
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+) -> CdfCursor | None:
+    return await db.scalar(
+        select(CdfCursor).where(
+            CdfCursor.api_key_id == api_key_id,
+            CdfCursor.share_name == share_name,
+            CdfCursor.schema_name == schema_name,
+            CdfCursor.table_name == table_name,
+        )
+    )
+
+
+async def delete_cursor(
+    db: AsyncSession,
+    api_key_id: UUID4,
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+) -> bool:
+    result = await db.execute(
+        delete(CdfCursor).where(
+            CdfCursor.api_key_id == api_key_id,
+            CdfCursor.share_name == share_name,
+            CdfCursor.schema_name == schema_name,
+            CdfCursor.table_name == table_name,
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def advance_cursor(
+    api_key_id: UUID4,
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    version: int,
+):
+    """
+    Store the last version read by an API key. Uses its own session, as it runs
+    after the response has been streamed, and never moves a cursor backwards.
+    """
+    statement = insert(CdfCursor).values(
+        api_key_id=api_key_id,
+        share_name=share_name,
+        schema_name=schema_name,
+        table_name=table_name,
+        version=version,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[
+            CdfCursor.api_key_id,
+            CdfCursor.share_name,
+            CdfCursor.schema_name,
+            CdfCursor.table_name,
+        ],
+        set_={"version": statement.excluded.version, "updated": func.now()},
+        where=CdfCursor.version < statement.excluded.version,
+    )
+    async with get_db_context() as db:
+        await db.execute(statement)
+        await db.commit()
+
+
+async def stream_changes_and_advance_cursor(
+    sharing_res: httpx.Response,
+    api_key_id: UUID4,
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    ending_version: int,
+) -> AsyncIterator[bytes]:
+    """
+    Relay a streamed `/changes` response, then advance the cursor to
+    `ending_version`. If the upstream response fails or the client disconnects
+    midway, the generator does not run to completion and the cursor is kept.
+    """
+    try:
+        if settings.FILE_CACHE_ENABLED:
+            async for line in iter_ndjson_lines(sharing_res.aiter_bytes()):
+                yield rewrite_file_url(line) + b"\n"
+        else:
+            async for chunk in sharing_res.aiter_bytes():
+                yield chunk
+    finally:
+        await sharing_res.aclose()
+
+    await advance_cursor(
+        api_key_id, share_name, schema_name, table_name, ending_version
+    )
@@ -0,0 +1,214 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import shutil
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+import httpx
+import orjson
+from loguru import logger
+
+from data_sharing.internal.actions import File, parse_action
+from data_sharing.internal.metrics import register_collector
+from data_sharing.settings import settings
+
+
+class InvalidFileTokenError(ValueError):
+    pass
+
+
+def get_cache_key(url: str) -> str:
+    """
+    Pre-signed URLs of the same file differ only in their query string, so the key
+    is derived from the storage location alone.
+    """
+    parts = urlsplit(url)
+    return hashlib.sha256(f"{parts.netloc}{parts.path}".encode()).hexdigest()
+
+
+def _sign(payload: bytes) -> str:
+    return (
+        base64.urlsafe_b64encode(
+            hmac.new(settings.SECRET_KEY.encode(), payload, hashlib.sha256).digest()
+        )
+        .decode()
+        .rstrip("=")
+    )
+
+
+def create_file_token(url: str, expiration_timestamp: int | None = None) -> str:
+    """
+    Create an opaque token for the `/files` route. It carries the pre-signed storage
+    URL and expires together with it; `expiration_timestamp` is in milliseconds.
+    """
+    if expiration_timestamp is None:
+        expiration_timestamp = int(
+            (time.time() + settings.FILE_CACHE_URL_TTL_SECONDS) * 1000
+        )
+    payload = base64.urlsafe_b64encode(
+        orjson.dumps({"u": url, "e": expiration_timestamp})
+    ).rstrip(b"=")
+    return f"{payload.decode()}.{_sign(payload)}"
+
+
+def read_file_token(token: str) -> str:
+    payload, _, signature = token.partition(".")
+    if not hmac.compare_digest(_sign(payload.encode()), signature):
+        raise InvalidFileTokenError("Invalid file token")
+
+    data = orjson.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    if data["e"] < time.time() * 1000:
+        raise InvalidFileTokenError("File token has expired")
+    return data["u"]
+
+
+def get_local_path(url: str) -> Path | None:
+    """
+    The path of a `file://` URL, as returned for tables in a local directory, e.g.
+    one standing in for blob storage in development and tests.
+    """
+    if not url.startswith("file://"):
+        return None
+    return Path(url2pathname(urlsplit(url).path))
+
+
+def rewrite_file_url(line: bytes) -> bytes:
+    """
+    Point the storage URL of a `file`, `add`, `remove` or `cdf` line to the `/files`
+    route of this proxy. Other lines are returned as-is.
+    """
+    if b'"url"' not in line and b'"path"' not in line:
+        return line
+
+    action = parse_action(line)
+    if not isinstance(action, File) or not (
+        isinstance(action.url, str) and action.url.startswith(("http", "file://"))
+    ):
+        return line
+
+    token = create_file_token(action.url, action.expiration_timestamp)
+    return action.replace(url=f"https://{settings.INGRESS_HOST}/files/{token}").dumps()
+
+
+def rewrite_file_urls(content: bytes) -> bytes:
+    return b"".join(
+        rewrite_file_url(line) + b"\n" for line in content.splitlines() if line.strip()
+    )
+
+
+class FileCache:
+    """
+    Size-bounded, least-recently-used cache of data files on local disk. Concurrent
+    misses for the same file result in a single download.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._client = httpx.AsyncClient(timeout=300)
+        self._loaded = False
+
+    def load(self):
+        """Index the files left over from a previous run, oldest access first."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in self.directory.glob("*.part"):
+            path.unlink(missing_ok=True)
+
+        paths = sorted(self.directory.iterdir(), key=lambda p: p.stat().st_atime)
+        for path in paths:
+            self._entries[path.name] = path.stat().st_size
+            self.total_bytes += self._entries[path.name]
+        self._loaded = True
+        self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            (self.directory / key).unlink(missing_ok=True)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    async def _download(self, url: str, destination: Path):
+        temp = destination.with_suffix(".part")
+        try:
+            if (source := get_local_path(url)) is not None:
+                await asyncio.to_thread(shutil.copyfile, source, temp)
+            else:
+                async with self._client.stream("GET", url) as res:
+                    res.raise_for_status()
+                    f = await asyncio.to_thread(open, temp, "wb")
+                    try:
+                        async for chunk in res.aiter_bytes():
+                            await asyncio.to_thread(f.write, chunk)
+                    finally:
+                        await asyncio.to_thread(f.close)
+            temp.rename(destination)
+        finally:
+            temp.unlink(missing_ok=True)
+
+    async def get(self, url: str) -> Path:
+        if not self._loaded:
+            await asyncio.to_thread(self.load)
+
+        key = get_cache_key(url)
+        path = self.directory / key
+        if key in self._entries:
+            if path.exists():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return path
+            # Removed from disk behind the back of the cache, so it is downloaded
+            # again and counted anew
+            self.total_bytes -= self._entries.pop(key)
+
+        self.misses += 1
+        if (inflight := self._inflight.get(key)) is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            await self._download(url, path)
+        except Exception as e:
+            logger.warning(f"Could not download {urlsplit(url).path}: {e}")
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            size = path.stat().st_size
+            self._entries[key] = size
+            self.total_bytes += size
+            self._evict()
+            future.set_result(path)
+            return path
+        finally:
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(key, None)
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": settings.FILE_CACHE_ENABLED,
+            "files": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+file_cache = FileCache(Path(settings.FILE_CACHE_DIR), settings.FILE_CACHE_MAX_BYTES)
+
+register_collector("file_cache", file_cache.metrics)
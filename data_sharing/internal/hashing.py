@@ -1,6 +1,10 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
 from data_sharing.constants import constants
+from data_sharing.settings import settings
 
 hash_context = CryptContext(
     schemes=["argon2", "bcrypt"],
@@ -8,6 +12,11 @@ hash_context = CryptContext(
     argon2__rounds=constants.ARGON2_NUM_ITERATIONS,
 )
 
+# argon2 releases the GIL while hashing, so threads hash in parallel
+hash_executor = ThreadPoolExecutor(
+    max_workers=settings.KEY_HASH_WORKERS, thread_name_prefix="key-hash"
+)
+
 
 def verify_key(plain_key: str, hashed_key: str):
     return hash_context.verify(plain_key, hashed_key)
@@ -15,3 +24,11 @@ def verify_key(plain_key: str, hashed_key: str):
 
 def get_key_hash(key: str):
     return hash_context.hash(key)
+
+
+async def get_key_hashes(keys: list[str]) -> list[str]:
+    """Hash keys in the worker pool, keeping the event loop free."""
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *[loop.run_in_executor(hash_executor, get_key_hash, key) for key in keys]
+    )
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from datetime import UTC, datetime
+from uuid import UUID
+
+import sqlalchemy as sa
+from loguru import logger
+from sqlalchemy import func, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from data_sharing.db import asession_maker
+from data_sharing.internal.metrics import register_collector
+from data_sharing.models import ApiKey
+from data_sharing.settings import settings
+
+
+class LastUsedTracker:
+    """
+    Tracks when each API key was last used and how many requests it made, without
+    writing to the database on the request path. Authenticated requests only update
+    an in-memory map, which a background task flushes periodically with one
+    `UPDATE ... FROM (VALUES ...)` per batch of keys.
+
+    At most one interval of usage is lost if the process dies before a flush. If a
+    flush fails, its entries are merged back and retried on the next interval.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        # key id -> [last used timestamp, request count]
+        self.pending: dict[UUID, list] = {}
+        self.flushes = 0
+        self.flushed_keys = 0
+        self.errors = 0
+        self.last_flush_at: float | None = None
+        self.last_flush_duration: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def record(self, key_id: UUID):
+        entry = self.pending.get(key_id)
+        if entry is None:
+            self.pending[key_id] = [time.time(), 1]
+        else:
+            entry[0] = time.time()
+            entry[1] += 1
+
+    def _merge_back(self, entries: dict[UUID, list]):
+        for key_id, (used_at, count) in entries.items():
+            entry = self.pending.get(key_id)
+            if entry is None:
+                self.pending[key_id] = [used_at, count]
+            else:
+                entry[0] = max(entry[0], used_at)
+                entry[1] += count
+
+    @staticmethod
+    def update_statement(rows: list[tuple[UUID, datetime, int]]) -> sa.Update:
+        usage = sa.values(
+            sa.column("id", ApiKey.id.type),
+            sa.column("used_at", ApiKey.last_used_at.type),
+            sa.column("count", sa.BigInteger),
+            name="usage",
+        ).data(rows)
+        return (
+            update(ApiKey)
+            .where(ApiKey.id == usage.c.id)
+            .values(
+                last_used_at=func.greatest(ApiKey.last_used_at, usage.c.used_at),
+                request_count=ApiKey.request_count + usage.c.count,
+            )
+        )
+
+    async def flush(self):
+        if not self.pending:
+            return
+
+        start = time.monotonic()
+        entries, self.pending = self.pending, {}
+        rows = [
+            (key_id, datetime.fromtimestamp(used_at, UTC), count)
+            for key_id, (used_at, count) in entries.items()
+        ]
+        try:
+            async with asession_maker() as db:
+                for i in range(0, len(rows), self.batch_size):
+                    await db.execute(
+                        self.update_statement(rows[i : i + self.batch_size]),
+                        execution_options={"synchronize_session": False},
+                    )
+                await db.commit()
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning(f"Could not flush API key usage of {len(rows)} keys: {e}")
+            self.errors += 1
+            self._merge_back(entries)
+            return
+
+        self.flushes += 1
+        self.flushed_keys += len(rows)
+        self.last_flush_at = time.time()
+        self.last_flush_duration = time.monotonic() - start
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"API key usage flush failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def metrics(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "pending_keys": len(self.pending),
+            "flushes": self.flushes,
+            "flushed_keys": self.flushed_keys,
+            "errors": self.errors,
+            "last_flush_at": self.last_flush_at,
+            "last_flush_duration": self.last_flush_duration,
+        }
+
+
+last_used_tracker = LastUsedTracker(
+    interval=settings.LAST_USED_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.LAST_USED_FLUSH_BATCH_SIZE,
+)
+
+register_collector("last_used_tracker", last_used_tracker.metrics)
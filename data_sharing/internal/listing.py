@@ -0,0 +1,149 @@
+import asyncio
+from typing import Any
+
+import httpx
+import orjson
+from fastapi.responses import ORJSONResponse
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+
+from data_sharing.internal.metrics import register_collector
+from data_sharing.internal.sharing import (
+    SharingError,
+    get_error_content,
+    get_sharing_headers,
+    sharing_client,
+)
+from data_sharing.schemas import delta_sharing
+from data_sharing.settings import settings
+
+
+def _drop_none(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _drop_none(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_none(v) for v in value]
+    return value
+
+
+def is_shape_compatible(model: type[BaseModel], sample: dict) -> bool:
+    """
+    Check that serializing `sample` through `model`, as FastAPI does for a
+    `response_model`, gives the same object apart from `null` fields.
+    """
+    try:
+        validated = model.model_validate(sample)
+    except ValidationError as e:
+        logger.error(f"Upstream response does not match {model.__name__}: {e}")
+        return False
+
+    serialized = validated.model_dump(mode="json", by_alias=True, exclude_none=True)
+    if serialized != _drop_none(sample):
+        logger.error(f"Upstream response has fields not in {model.__name__}")
+        return False
+    return True
+
+
+class ListingSerializer:
+    """
+    Listing responses come from the Delta Sharing server, so validating every item
+    against the `response_model` of the route only costs time. In trusted mode the
+    (filtered) upstream JSON is serialized directly with orjson, while the routes
+    keep their `response_model` for the OpenAPI schema.
+
+    Trusted mode only starts once a self-check has validated a sample of each
+    listing against its model, and is not used if the shapes differ. While the
+    Delta Sharing server cannot be reached, e.g. as it starts, the check is retried
+    with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        sample_size: int,
+        retry_interval: float = 5,
+        max_retry_interval: float = 300,
+    ):
+        self.enabled = enabled
+        self.sample_size = sample_size
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.trusted = False
+        self.checked = False
+        self.attempts = 0
+        self._task: asyncio.Task | None = None
+
+    def response(self, content: dict) -> ORJSONResponse | dict:
+        if self.trusted:
+            return ORJSONResponse(content)
+        return content
+
+    async def _fetch(self, path: str) -> dict:
+        sharing_res = await sharing_client.get(
+            f"/sharing{path}",
+            params={"maxResults": self.sample_size},
+            headers=get_sharing_headers(),
+        )
+        if sharing_res.is_error:
+            raise SharingError(sharing_res.status_code, get_error_content(sharing_res))
+        return orjson.loads(sharing_res.content)
+
+    async def check(self) -> bool:
+        """Check the listing shapes, and return whether the check could be run."""
+        self.attempts += 1
+        try:
+            shares = await self._fetch("/shares")
+            samples = [(delta_sharing.Pagination[delta_sharing.Share], shares)]
+            for share in shares.get("items", [])[:1]:
+                samples += [
+                    (
+                        delta_sharing.Pagination[delta_sharing.Schema],
+                        await self._fetch(f"/shares/{share['name']}/schemas"),
+                    ),
+                    (
+                        delta_sharing.Pagination[delta_sharing.Table],
+                        await self._fetch(f"/shares/{share['name']}/all-tables"),
+                    ),
+                ]
+        except (SharingError, httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Could not check the shape of listing responses: {e}")
+            return False
+
+        if all(is_shape_compatible(model, sample) for model, sample in samples):
+            self.trusted = True
+        else:
+            logger.error("Validating listing responses against their response models")
+        self.checked = True
+        return True
+
+    async def run(self):
+        delay = self.retry_interval
+        while not await self.check():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_interval)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "trusted": self.trusted,
+            "checked": self.checked,
+            "attempts": self.attempts,
+        }
+
+
+listing_serializer = ListingSerializer(
+    enabled=settings.TRUSTED_UPSTREAM_LISTINGS,
+    sample_size=settings.LISTING_SELF_CHECK_SAMPLE_SIZE,
+)
+
+register_collector("listing_serializer", listing_serializer.metrics)
@@ -0,0 +1,235 @@
+import asyncio
+import re
+import time
+from datetime import UTC, datetime
+from uuid import UUID
+
+from loguru import logger
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.types import Message
+
+from data_sharing.db import asession_maker
+from data_sharing.internal.metrics import register_collector
+from data_sharing.internal.partitions import ensure_monthly_partitions
+from data_sharing.models import ApiKeyUsage
+from data_sharing.settings import settings
+
+UsageKey = tuple[UUID, str, str, str, int]
+
+# Lines of actions which reference a data file: `file`, `add`, `cdf` and `remove`,
+# as opposed to `protocol`, `metaData` and `endStreamAction`. The first line of a
+# response is always the protocol, so every file action follows a newline. A single
+# pattern scans the body once, which is about three times faster than counting each
+# action separately.
+FILE_ACTION = re.compile(rb'\n\{"[facr]')
+_TAIL_SIZE = 3
+
+
+class UsageMeter:
+    """
+    Meters the requests, data files and response bytes served per API key, table
+    and hour. Counts are aggregated in memory and upserted periodically into the
+    monthly partitions of `api_key_usage`, in batches.
+
+    As for the last used tracker, at most one interval of usage is lost if the
+    process dies before a flush, and entries of a failed flush are retried.
+    """
+
+    def __init__(self, enabled: bool, interval: float, batch_size: int):
+        self.enabled = enabled
+        self.interval = interval
+        self.batch_size = batch_size
+        # (key id, share, schema, table, hour) -> [requests, files, bytes]
+        self.pending: dict[UsageKey, list[int]] = {}
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.errors = 0
+        self.last_flush_at: float | None = None
+        self.last_flush_duration: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def record(
+        self,
+        key_id: UUID,
+        share_name: str,
+        schema_name: str,
+        table_name: str,
+        files: int,
+        num_bytes: int,
+    ):
+        key = (key_id, share_name, schema_name, table_name, int(time.time() // 3600))
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = [1, files, num_bytes]
+        else:
+            entry[0] += 1
+            entry[1] += files
+            entry[2] += num_bytes
+
+    def _merge_back(self, entries: dict[UsageKey, list[int]]):
+        for key, counts in entries.items():
+            entry = self.pending.setdefault(key, [0, 0, 0])
+            for i, count in enumerate(counts):
+                entry[i] += count
+
+    @staticmethod
+    def upsert_statement(rows: list[dict]):
+        statement = insert(ApiKeyUsage).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=[
+                ApiKeyUsage.api_key_id,
+                ApiKeyUsage.share_name,
+                ApiKeyUsage.schema_name,
+                ApiKeyUsage.table_name,
+                ApiKeyUsage.hour,
+            ],
+            set_={
+                column: getattr(ApiKeyUsage, column) + statement.excluded[column]
+                for column in ("requests", "files", "bytes")
+            },
+        )
+
+    async def flush(self):
+        if not self.pending:
+            return
+
+        start = time.monotonic()
+        entries, self.pending = self.pending, {}
+        rows = [
+            {
+                "api_key_id": key_id,
+                "share_name": share_name,
+                "schema_name": schema_name,
+                "table_name": table_name,
+                "hour": datetime.fromtimestamp(hour * 3600, UTC),
+                "requests": requests,
+                "files": files,
+                "bytes": num_bytes,
+            }
+            for (key_id, share_name, schema_name, table_name, hour), (
+                requests,
+                files,
+                num_bytes,
+            ) in entries.items()
+        ]
+        try:
+            await ensure_monthly_partitions(
+                ApiKeyUsage.__tablename__, {row["hour"] for row in rows}
+            )
+            async with asession_maker() as db:
+                for i in range(0, len(rows), self.batch_size):
+                    await db.execute(
+                        self.upsert_statement(rows[i : i + self.batch_size])
+                    )
+                await db.commit()
+        except (SQLAlchemyError, OSError) as e:
+            logger.warning(f"Could not flush {len(rows)} usage rows: {e}")
+            self.errors += 1
+            self._merge_back(entries)
+            return
+
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+        self.last_flush_at = time.time()
+        self.last_flush_duration = time.monotonic() - start
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"Usage flush failed: {e}")
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "pending_rows": len(self.pending),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "errors": self.errors,
+            "last_flush_at": self.last_flush_at,
+            "last_flush_duration": self.last_flush_duration,
+        }
+
+
+class ResponseCounter:
+    """
+    Counts the bytes and file actions of a response body, and keeps its status and
+    table version. Streamed responses may be sent a line at a time, so bodies are
+    buffered and scanned in larger blocks.
+    """
+
+    __slots__ = (
+        "status",
+        "version",
+        "ndjson",
+        "files",
+        "bytes",
+        "buffer",
+        "buffered",
+        "tail",
+    )
+
+    block_size = 64 * 1024
+
+    def __init__(self):
+        self.status: int | None = None
+        self.version: int | None = None
+        self.ndjson = False
+        self.files = 0
+        self.bytes = 0
+        self.buffer: list[bytes] = []
+        self.buffered = 0
+        self.tail = b""
+
+    def start(self, message: Message):
+        self.status = message["status"]
+        for name, value in message.get("headers", ()):
+            name = name.lower()
+            if name == b"content-type":
+                self.ndjson = b"ndjson" in value
+            elif name == b"delta-table-version" and value.isdigit():
+                self.version = int(value)
+
+    def feed(self, body: bytes):
+        self.bytes += len(body)
+        if self.ndjson and body:
+            self.buffer.append(body)
+            self.buffered += len(body)
+            if self.buffered >= self.block_size:
+                self.scan()
+
+    def scan(self):
+        if not self.buffer:
+            return
+        block = b"".join(self.buffer)
+        self.buffer.clear()
+        self.buffered = 0
+        self.files += len(FILE_ACTION.findall(block))
+        # Only actions split across the previous bytes and this block fit in here
+        window = self.tail + block[:_TAIL_SIZE]
+        self.files += len(FILE_ACTION.findall(window))
+        self.tail = (self.tail + block[-_TAIL_SIZE:])[-_TAIL_SIZE:]
+
+
+usage_meter = UsageMeter(
+    enabled=settings.USAGE_METERING_ENABLED,
+    interval=settings.USAGE_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.USAGE_FLUSH_BATCH_SIZE,
+)
+
+register_collector("usage_meter", usage_meter.metrics)
@@ -0,0 +1,16 @@
+from collections.abc import Callable
+from typing import Any
+
+_collectors: dict[str, Callable[[], dict[str, Any]]] = {}
+
+
+def register_collector(name: str, collector: Callable[[], dict[str, Any]]):
+    """
+    Register a callable that returns a snapshot of a component's metrics. It is
+    called on every request to `/metrics`, so it must be cheap and non-blocking.
+    """
+    _collectors[name] = collector
+
+
+def collect() -> dict[str, dict[str, Any]]:
+    return {name: collector() for name, collector in _collectors.items()}
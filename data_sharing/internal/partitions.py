@@ -0,0 +1,46 @@
+from collections.abc import Iterable
+from datetime import UTC, date, datetime
+
+from sqlalchemy import text
+
+from data_sharing.db import aengine
+
+_existing: set[tuple[str, date]] = set()
+
+
+def month_start(value: datetime) -> date:
+    return value.astimezone(UTC).date().replace(day=1)
+
+
+def next_month(month: date) -> date:
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+async def ensure_monthly_partitions(table: str, timestamps: Iterable[datetime]):
+    """
+    Create the monthly partitions of a table partitioned by `RANGE` on a timestamp
+    column, for the months of `timestamps`. Partitions are created in their own
+    transaction, and remembered so that each is only checked once per process.
+    """
+    months = {month_start(value) for value in timestamps}
+    missing = sorted(month for month in months if (table, month) not in _existing)
+    if not missing:
+        return
+
+    async with aengine.begin() as conn:
+        for month in missing:
+            await conn.execute(
+                text(
+                    f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}"'
+                    f' PARTITION OF "{table}" FOR VALUES'
+                    f" FROM ('{month.isoformat()} 00:00:00+00')"
+                    f" TO ('{next_month(month).isoformat()} 00:00:00+00')"
+                )
+            )
+    _existing.update((table, month) for month in missing)
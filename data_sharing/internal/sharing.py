@@ -0,0 +1,442 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+import httpx
+import orjson
+from fastapi.responses import StreamingResponse
+
+from data_sharing.internal.actions import parse_action
+from data_sharing.internal.cache import TTLCache
+from data_sharing.internal.files import rewrite_file_url
+from data_sharing.internal.metering import ResponseCounter
+from data_sharing.settings import settings
+from data_sharing.utils.header import normalize_capabilities_header
+from data_sharing.utils.streams import iter_ndjson_lines
+
+sharing_client = httpx.AsyncClient(
+    base_url=f"http://{settings.DELTA_SHARING_HOST}", timeout=300
+)
+
+metadata_cache = TTLCache(
+    maxsize=settings.METADATA_CACHE_MAX_SIZE, ttl=settings.METADATA_CACHE_TTL_SECONDS
+)
+
+query_cache = TTLCache(
+    maxsize=settings.QUERY_CACHE_MAX_SIZE, ttl=settings.QUERY_CACHE_TTL_SECONDS
+)
+
+
+class SharingError(Exception):
+    """An error response returned by the Delta Sharing server."""
+
+    def __init__(self, status_code: int, content: dict):
+        super().__init__(status_code, content)
+        self.status_code = status_code
+        self.content = content
+
+
+def get_error_content(sharing_res: httpx.Response) -> dict:
+    """
+    The error object of an error response, also if its body is not JSON, e.g. a
+    gateway error page or an empty body.
+    """
+    try:
+        return sharing_res.json()
+    except ValueError:
+        return {
+            "errorCode": sharing_res.reason_phrase.upper().replace(" ", "_"),
+            "message": sharing_res.text,
+        }
+
+
+def get_transport_error(e: httpx.HTTPError) -> tuple[int, dict]:
+    """
+    The status code and error object to report for a request to the Delta Sharing
+    server that failed without a response, e.g. when it is unreachable or timed out.
+    """
+    if isinstance(e, httpx.TimeoutException):
+        return 504, {
+            "errorCode": "GATEWAY_TIMEOUT",
+            "message": "The Delta Sharing server did not respond in time",
+        }
+    return 502, {
+        "errorCode": "BAD_GATEWAY",
+        "message": "Could not retrieve the response of the Delta Sharing server",
+    }
+
+
+def get_sharing_headers(additional_headers: dict[str, str] = None) -> dict[str, str]:
+    return {
+        **(additional_headers or {}),
+        "Authorization": f"Bearer {settings.DELTA_BEARER_TOKEN}",
+    }
+
+
+def get_table_path(
+    share_name: str, schema_name: str, table_name: str, action: str
+) -> str:
+    return f"/sharing/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/{action}"
+
+
+_RELAYED_HEADERS = ("content-type", "delta-table-version")
+
+
+async def iter_sharing_response(sharing_res: httpx.Response) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in sharing_res.aiter_bytes():
+            yield chunk
+    finally:
+        await sharing_res.aclose()
+
+
+def relay_sharing_response(sharing_res: httpx.Response) -> StreamingResponse:
+    """
+    Stream a Delta Sharing server response on to the client as it arrives, without
+    decoding and re-encoding its body. `sharing_res` must have been sent with
+    `stream=True`; it is closed once relayed.
+    """
+    return StreamingResponse(
+        iter_sharing_response(sharing_res),
+        status_code=sharing_res.status_code,
+        headers={
+            key: value
+            for key in _RELAYED_HEADERS
+            if (value := sharing_res.headers.get(key)) is not None
+        },
+    )
+
+
+def parse_table_query(content: bytes) -> dict[str, Any]:
+    """
+    Decode the body of a `/query` request, which is forwarded as-is, and check only
+    the fields that the proxy acts on itself. The rest is left to the Delta Sharing
+    server. An empty body is an empty query.
+    """
+    try:
+        query = orjson.loads(content) if content.strip() else {}
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON body: {e}") from e
+    if not isinstance(query, dict):
+        raise ValueError("The body must be a JSON object")
+
+    for name in ("limitHint", "startingVersion"):
+        value = query.get(name)
+        if value is not None and (
+            not isinstance(value, int) or isinstance(value, bool) or value < 0
+        ):
+            raise ValueError(f"`{name}` must be a non-negative integer")
+    return query
+
+
+def get_num_records(file_line: bytes) -> int | None:
+    """
+    Get `numRecords` from the `stats` of a `file` line, in either the parquet or the
+    delta response format. Returns `None` if the line has no usable stats.
+    """
+    return parse_action(file_line).num_records
+
+
+async def stream_limited_files(
+    sharing_res: httpx.Response, limit_hint: int
+) -> AsyncIterator[bytes]:
+    """
+    Relay a streamed `/query` response, but stop emitting files once their
+    `numRecords` add up to `limit_hint`. Files without stats are always emitted,
+    as they may contain any number of records.
+    """
+    num_records = 0
+    try:
+        async for line in iter_ndjson_lines(sharing_res.aiter_bytes()):
+            if not line.startswith(b'{"file"'):
+                yield line + b"\n"
+                continue
+
+            if num_records >= limit_hint:
+                break
+
+            if (count := get_num_records(line)) is not None:
+                num_records += count
+            if settings.FILE_CACHE_ENABLED:
+                line = rewrite_file_url(line)
+            yield line + b"\n"
+    finally:
+        await sharing_res.aclose()
+
+
+def get_source_prefix(share_name: str, schema_name: str, table_name: str) -> bytes:
+    """
+    Build the bytes that turn an upstream NDJSON object into a tagged one, i.e.
+    `{"protocol": ...}` becomes `{"source": {...}, "protocol": ...}`.
+    """
+    source = orjson.dumps(
+        {"share": share_name, "schema": schema_name, "name": table_name}
+    )
+    return b'{"source":' + source + b","
+
+
+def get_tagged_error(prefix: bytes, status_code: int, content: dict) -> bytes:
+    """Build the tagged NDJSON line that reports an error for a single table."""
+    error = {"error": content, "statusCode": status_code}
+    return prefix + orjson.dumps(error)[1:] + b"\n"
+
+
+def start_counter(counter: ResponseCounter, sharing_res: httpx.Response):
+    """Feed the status and table version of a query response to `counter`."""
+    version = sharing_res.headers.get("delta-table-version")
+    counter.status = sharing_res.status_code
+    counter.ndjson = True
+    if version is not None and version.isdigit():
+        counter.version = int(version)
+
+
+async def stream_tagged_table_query(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    body: dict,
+    additional_headers: dict[str, str] = None,
+    counter: ResponseCounter | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Stream the query response of a table with each line tagged with its source.
+    The untagged response is fed to `counter`, if given, as if it had been sent by
+    itself.
+    """
+    prefix = get_source_prefix(share_name, schema_name, table_name)
+    request = sharing_client.build_request(
+        method="POST",
+        url=get_table_path(share_name, schema_name, table_name, "query"),
+        headers=get_sharing_headers(additional_headers),
+        json=body,
+    )
+    try:
+        sharing_res = await sharing_client.send(request, stream=True)
+    except httpx.HTTPError as e:
+        status_code, content = get_transport_error(e)
+        if counter is not None:
+            counter.status = status_code
+        yield get_tagged_error(prefix, status_code, content)
+        return
+
+    version = sharing_res.headers.get("delta-table-version")
+    if counter is not None:
+        start_counter(counter, sharing_res)
+    try:
+        if sharing_res.is_error:
+            await sharing_res.aread()
+            yield get_tagged_error(
+                prefix, sharing_res.status_code, get_error_content(sharing_res)
+            )
+            return
+
+        if version is not None:
+            yield prefix + orjson.dumps({"deltaTableVersion": int(version)})[1:] + b"\n"
+
+        async for line in iter_ndjson_lines(sharing_res.aiter_bytes()):
+            if settings.FILE_CACHE_ENABLED:
+                line = rewrite_file_url(line)
+            if counter is not None:
+                counter.feed(line + b"\n")
+            yield prefix + line[1:] + b"\n"
+    except httpx.HTTPError as e:
+        # The response broke off, which is reported after the lines already sent
+        yield get_tagged_error(prefix, *get_transport_error(e))
+    finally:
+        await sharing_res.aclose()
+
+
+async def list_all_tables(share_name: str) -> list[dict]:
+    """List every table in a share, following `nextPageToken` until exhausted."""
+    items = []
+    params = {}
+    while True:
+        sharing_res = await sharing_client.get(
+            f"/sharing/shares/{share_name}/all-tables",
+            params=params,
+            headers=get_sharing_headers(),
+        )
+        if sharing_res.is_error:
+            raise SharingError(sharing_res.status_code, get_error_content(sharing_res))
+
+        page = sharing_res.json()
+        items.extend(page.get("items", []))
+        if not (page_token := page.get("nextPageToken")):
+            return items
+        params = {"pageToken": page_token}
+
+
+async def fetch_table_metadata(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    delta_sharing_capabilities: str | None = None,
+) -> dict:
+    """
+    Fetch the version, protocol and metadata of a table, merged into one object.
+    """
+    additional_headers = {}
+    if delta_sharing_capabilities is not None:
+        additional_headers["delta-sharing-capabilities"] = delta_sharing_capabilities
+
+    sharing_res = await sharing_client.get(
+        get_table_path(share_name, schema_name, table_name, "metadata"),
+        headers=get_sharing_headers(additional_headers),
+    )
+    if sharing_res.is_error:
+        raise SharingError(sharing_res.status_code, get_error_content(sharing_res))
+
+    out = {"deltaTableVersion": int(sharing_res.headers["delta-table-version"])}
+    for line in sharing_res.content.splitlines():
+        if line.strip():
+            out.update(orjson.loads(line))
+    return out
+
+
+async def get_cached_response(
+    cache: TTLCache,
+    key: tuple,
+    fetch: Callable[[], Awaitable[dict]],
+    min_version: int | None = None,
+) -> dict:
+    """
+    Get a cached response with a `deltaTableVersion`, fetching it again if it is of
+    a version before `min_version`, i.e. it was cached before the latest commit.
+    """
+    response = await cache.get_or_fetch(key, fetch)
+    if min_version is not None and response["deltaTableVersion"] < min_version:
+        cache.invalidate(key)
+        response = await cache.get_or_fetch(key, fetch)
+    return response
+
+
+async def get_table_metadata(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    delta_sharing_capabilities: str | None = None,
+    min_version: int | None = None,
+) -> dict:
+    # Keyed by the known capabilities only, which also bounds the number of keys
+    # a client can create through the header
+    delta_sharing_capabilities = normalize_capabilities_header(
+        delta_sharing_capabilities
+    )
+    return await get_cached_response(
+        metadata_cache,
+        (share_name, schema_name, table_name, delta_sharing_capabilities),
+        lambda: fetch_table_metadata(
+            share_name, schema_name, table_name, delta_sharing_capabilities
+        ),
+        min_version,
+    )
+
+
+def serialize_table_metadata(metadata: dict) -> bytes:
+    """Turn a merged metadata object back into the `/metadata` NDJSON response."""
+    return b"".join(
+        orjson.dumps({key: metadata[key]}) + b"\n" for key in ("protocol", "metaData")
+    )
+
+
+async def fetch_table_version(
+    share_name: str, schema_name: str, table_name: str
+) -> int:
+    sharing_res = await sharing_client.get(
+        get_table_path(share_name, schema_name, table_name, "version"),
+        headers=get_sharing_headers(),
+    )
+    if sharing_res.is_error:
+        raise SharingError(sharing_res.status_code, get_error_content(sharing_res))
+
+    return int(sharing_res.headers["delta-table-version"])
+
+
+async def fetch_default_table_query(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    delta_sharing_capabilities: str | None = None,
+    version: int | None = None,
+) -> dict:
+    """
+    Fetch the response of a `/query` call without any predicates or hints, i.e.
+    every file in the latest snapshot of the table, or in the one of `version`.
+    """
+    additional_headers = {}
+    if delta_sharing_capabilities is not None:
+        additional_headers["delta-sharing-capabilities"] = delta_sharing_capabilities
+
+    sharing_res = await sharing_client.post(
+        get_table_path(share_name, schema_name, table_name, "query"),
+        headers=get_sharing_headers(additional_headers),
+        json={} if version is None else {"version": version},
+    )
+    if sharing_res.is_error:
+        raise SharingError(sharing_res.status_code, get_error_content(sharing_res))
+
+    return {
+        "deltaTableVersion": int(sharing_res.headers["delta-table-version"]),
+        "content": sharing_res.content,
+    }
+
+
+async def fetch_table_changes(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    starting_version: int,
+    ending_version: int,
+) -> bytes:
+    """Fetch the change data feed of a table in the parquet response format."""
+    sharing_res = await sharing_client.get(
+        get_table_path(share_name, schema_name, table_name, "changes"),
+        params={"startingVersion": starting_version, "endingVersion": ending_version},
+        headers=get_sharing_headers(),
+    )
+    if sharing_res.is_error:
+        raise SharingError(sharing_res.status_code, get_error_content(sharing_res))
+
+    return sharing_res.content
+
+
+async def get_default_table_query(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    delta_sharing_capabilities: str | None = None,
+    min_version: int | None = None,
+) -> dict:
+    # Keyed by the known capabilities only, which also bounds the number of keys
+    # a client can create through the header
+    delta_sharing_capabilities = normalize_capabilities_header(
+        delta_sharing_capabilities
+    )
+    return await get_cached_response(
+        query_cache,
+        (share_name, schema_name, table_name, delta_sharing_capabilities),
+        lambda: fetch_default_table_query(
+            share_name, schema_name, table_name, delta_sharing_capabilities
+        ),
+        min_version,
+    )
+
+
+async def stream_tagged_table_metadata(
+    share_name: str,
+    schema_name: str,
+    table_name: str,
+    delta_sharing_capabilities: str | None = None,
+) -> AsyncIterator[bytes]:
+    prefix = get_source_prefix(share_name, schema_name, table_name)
+    try:
+        metadata = await get_table_metadata(
+            share_name, schema_name, table_name, delta_sharing_capabilities
+        )
+    except SharingError as e:
+        yield get_tagged_error(prefix, e.status_code, e.content)
+        return
+    except httpx.HTTPError as e:
+        yield get_tagged_error(prefix, *get_transport_error(e))
+        return
+
+    yield prefix + orjson.dumps(metadata)[1:] + b"\n"
@@ -0,0 +1,183 @@
+import asyncio
+from typing import Any
+
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data_sharing.internal.cache import TTLCache
+from data_sharing.internal.sharing import (
+    fetch_default_table_query,
+    fetch_table_version,
+)
+from data_sharing.settings import settings
+
+stats_cache = TTLCache(
+    maxsize=settings.STATS_CACHE_MAX_SIZE, ttl=settings.STATS_CACHE_TTL_SECONDS
+)
+
+_STAT_KINDS = {"nullCount": "nullCount", "minValues": "min", "maxValues": "max"}
+
+
+def _flatten(values: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+    """Flatten the stats of struct columns into dotted column names."""
+    out = {}
+    for key, value in values.items():
+        if isinstance(value, dict):
+            out.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            out[f"{prefix}{key}"] = value
+    return out
+
+
+def _to_array(values: list[Any]) -> pa.Array:
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed types across files, e.g. after a schema change, compare as strings
+        return pa.array([None if v is None else str(v) for v in values])
+
+
+def _partition_key(partition_values: dict[str, str]) -> bytes:
+    return orjson.dumps(partition_values, option=orjson.OPT_SORT_KEYS)
+
+
+def _scalar(value: pa.Scalar) -> Any:
+    return value.as_py() if value.is_valid else None
+
+
+def build_file_stats_table(content: bytes) -> pa.Table:
+    """
+    Build an Arrow table with one row per `file` line of a `/query` response, with
+    columns `partition`, `size`, `numRecords` and one column per (stat, column) pair,
+    e.g. `minValues.school_id`.
+    """
+    partitions, sizes, num_records = [], [], []
+    stats: dict[str, list[Any]] = {}
+    for line in content.splitlines():
+        if not line.startswith(b'{"file"'):
+            continue
+
+        file = orjson.loads(line)["file"]
+        file_stats = orjson.loads(file["stats"]) if file.get("stats") else {}
+        partitions.append(_partition_key(file.get("partitionValues") or {}))
+        sizes.append(file.get("size"))
+        num_records.append(file_stats.get("numRecords"))
+        for kind in _STAT_KINDS:
+            for column, value in _flatten(file_stats.get(kind) or {}).items():
+                values = stats.setdefault(f"{kind}.{column}", [])
+                # Pad columns that were not present in the previous files
+                values.extend([None] * (len(sizes) - 1 - len(values)))
+                values.append(value)
+
+    columns = {
+        "partition": pa.array(partitions, type=pa.binary()),
+        "size": pa.array(sizes, type=pa.int64()),
+        "numRecords": pa.array(num_records, type=pa.int64()),
+    }
+    for name, values in stats.items():
+        values.extend([None] * (len(sizes) - len(values)))
+        columns[name] = _to_array(values)
+    return pa.table(columns)
+
+
+def _aggregations(table: pa.Table) -> list[tuple[str, str]]:
+    aggregations = [("size", "sum"), ("numRecords", "sum"), ("numRecords", "count")]
+    for name in table.column_names:
+        if pa.types.is_null(table[name].type):
+            continue
+
+        kind = name.split(".", 1)[0]
+        if kind == "nullCount":
+            aggregations.append((name, "sum"))
+        elif kind == "minValues":
+            aggregations.append((name, "min"))
+        elif kind == "maxValues":
+            aggregations.append((name, "max"))
+    return aggregations
+
+
+def _to_statistics(row: dict[str, Any], num_files: int) -> dict[str, Any]:
+    """Turn a row of aggregates, named `<column>_<function>`, into statistics."""
+    columns: dict[str, dict[str, Any]] = {}
+    for name, value in row.items():
+        kind, _, column = name.rsplit("_", 1)[0].partition(".")
+        if kind in _STAT_KINDS:
+            columns.setdefault(column, {})[_STAT_KINDS[kind]] = value
+
+    return {
+        "numFiles": num_files,
+        "numFilesWithoutStats": num_files - row["numRecords_count"],
+        "numRecords": row["numRecords_sum"] or 0,
+        "size": row["size_sum"] or 0,
+        "columns": columns,
+    }
+
+
+def aggregate_file_stats(table: pa.Table, by_partition: bool = False) -> dict[str, Any]:
+    aggregations = _aggregations(table)
+    totals = {}
+    for column, function in aggregations:
+        match function:
+            case "sum":
+                value = pc.sum(table[column])
+            case "count":
+                value = pc.count(table[column])
+            case _:
+                value = pc.min_max(table[column])[function]
+        totals[f"{column}_{function}"] = _scalar(value)
+
+    out = _to_statistics(totals, table.num_rows)
+    if not by_partition:
+        return out
+
+    grouped = table.group_by("partition").aggregate(
+        [*aggregations, ("partition", "count")]
+    )
+    partitions = [
+        {
+            "partitionValues": orjson.loads(row["partition"]),
+            **_to_statistics(row, row["partition_count"]),
+        }
+        for row in grouped.to_pylist()
+    ]
+    out["partitions"] = sorted(
+        partitions, key=lambda p: _partition_key(p["partitionValues"])
+    )
+    return out
+
+
+def compute_table_statistics(content: bytes, by_partition: bool) -> dict[str, Any]:
+    return aggregate_file_stats(build_file_stats_table(content), by_partition)
+
+
+async def get_table_statistics(
+    share_name: str, schema_name: str, table_name: str, by_partition: bool = False
+) -> dict[str, Any]:
+    """
+    Aggregate the per-file stats of the latest snapshot of a table, without reading
+    any parquet data. Results are cached per table version.
+    """
+    version = await fetch_table_version(share_name, schema_name, table_name)
+
+    async def fetch():
+        # Pinned, so that the stats match the version they are cached under even if
+        # the table changes meanwhile
+        query = await fetch_default_table_query(
+            share_name, schema_name, table_name, version=version
+        )
+        statistics = await asyncio.to_thread(
+            compute_table_statistics, query["content"], by_partition
+        )
+        return {"deltaTableVersion": query["deltaTableVersion"], **statistics}
+
+    return await stats_cache.get_or_fetch(
+        (
+            share_name,
+            schema_name,
+            table_name,
+            version,
+            by_partition,
+        ),
+        fetch,
+    )
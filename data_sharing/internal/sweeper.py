@@ -0,0 +1,119 @@
+import asyncio
+import time
+from datetime import timedelta
+
+from loguru import logger
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from data_sharing.db import asession_maker
+from data_sharing.internal.metrics import register_collector
+from data_sharing.models import ApiKey
+from data_sharing.settings import settings
+
+
+class ExpiredKeySweeper:
+    """
+    Periodically deletes API keys which expired more than `grace_period` ago. Their
+    grants and CDF cursors are deleted with them by the foreign key cascades, while
+    their metered usage is kept.
+
+    Keys are deleted oldest expiration first in batches, each in its own short
+    transaction, using the `expiration` index. Rows locked by another instance are
+    skipped, so several instances can sweep at the same time.
+    """
+
+    def __init__(
+        self, enabled: bool, interval: float, batch_size: int, grace_period: timedelta
+    ):
+        self.enabled = enabled
+        self.interval = interval
+        self.batch_size = batch_size
+        self.grace_period = grace_period
+        self.runs = 0
+        self.deleted_keys = 0
+        self.errors = 0
+        self.last_run_at: float | None = None
+        self.last_run_duration: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def delete_statement(self):
+        expired = (
+            select(ApiKey.id)
+            .where(
+                ApiKey.expiration < func.now() - self.grace_period,
+                ApiKey.id != settings.ADMIN_API_KEY,
+            )
+            .order_by(ApiKey.expiration)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return (
+            delete(ApiKey)
+            .where(ApiKey.id.in_(expired))
+            .returning(ApiKey.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def sweep(self) -> int:
+        start = time.monotonic()
+        deleted = 0
+        statement = self.delete_statement()
+        while True:
+            async with asession_maker() as db:
+                ids = (await db.scalars(statement)).all()
+                await db.commit()
+            deleted += len(ids)
+            if len(ids) < self.batch_size:
+                break
+
+        if deleted:
+            logger.info(f"Deleted {deleted} expired API keys")
+        self.runs += 1
+        self.deleted_keys += deleted
+        self.last_run_at = time.time()
+        self.last_run_duration = time.monotonic() - start
+        return deleted
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.sweep()
+            except (SQLAlchemyError, OSError) as e:
+                logger.warning(f"Could not delete expired API keys: {e}")
+                self.errors += 1
+            except Exception as e:
+                logger.exception(f"Expired API key sweep failed: {e}")
+                self.errors += 1
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "runs": self.runs,
+            "deleted_keys": self.deleted_keys,
+            "errors": self.errors,
+            "last_run_at": self.last_run_at,
+            "last_run_duration": self.last_run_duration,
+        }
+
+
+expired_key_sweeper = ExpiredKeySweeper(
+    enabled=settings.EXPIRED_KEY_SWEEPER_ENABLED,
+    interval=settings.EXPIRED_KEY_SWEEPER_INTERVAL_SECONDS,
+    batch_size=settings.EXPIRED_KEY_SWEEPER_BATCH_SIZE,
+    grace_period=timedelta(days=settings.EXPIRED_KEY_GRACE_PERIOD_DAYS),
+)
+
+register_collector("expired_key_sweeper", expired_key_sweeper.metrics)
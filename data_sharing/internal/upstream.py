@@ -0,0 +1,202 @@
+import asyncio
+import time
+
+import httpx
+from loguru import logger
+
+from data_sharing.internal.arrow import load_table_locations
+from data_sharing.internal.cdf import compacted_cdf_cache
+from data_sharing.internal.metrics import register_collector
+from data_sharing.internal.sharing import (
+    get_sharing_headers,
+    get_table_path,
+    metadata_cache,
+    query_cache,
+    sharing_client,
+)
+from data_sharing.internal.stats import stats_cache
+from data_sharing.internal.warmer import cache_warmer
+from data_sharing.settings import settings
+
+
+class UpstreamSwitch:
+    """
+    Blue/green switch between two Delta Sharing servers, so that the catalog can be
+    reloaded without downtime. When the config changes, the server container starts
+    a second server with the new config on the standby host, and stops the old one
+    after a drain period.
+
+    Each host is probed every `interval`, and counts as up or down after
+    `threshold` consecutive probes, so that a single failed probe does not switch.
+    When the standby host comes up while the active one is up, the hot tables of the
+    cache warmer are loaded on it first, then new requests are sent to it and the
+    catalog caches of the proxy are cleared. Requests in flight finish on the old
+    server. If the active host goes down, requests fail over to the standby host
+    right away.
+    """
+
+    def __init__(
+        self,
+        hosts: list[str],
+        active: str,
+        interval: float,
+        threshold: int,
+        warm_timeout: float,
+        concurrency: int,
+    ):
+        self.enabled = len(hosts) > 1
+        self.hosts = hosts
+        self.active = active
+        self.interval = interval
+        self.threshold = threshold
+        self.warm_timeout = warm_timeout
+        self.concurrency = concurrency
+        # host -> whether it is up, unknown until `threshold` probes agree
+        self.up: dict[str, bool | None] = dict.fromkeys(hosts)
+        # host -> number of consecutive successful (> 0) or failed (< 0) probes
+        self.streaks: dict[str, int] = dict.fromkeys(hosts, 0)
+        self.switches = 0
+        self.failovers = 0
+        self.last_switch_at: float | None = None
+        self.last_warm_duration: float | None = None
+        self.last_warmed_tables = 0
+        self._clients = {
+            host: httpx.AsyncClient(base_url=f"http://{host}", timeout=warm_timeout)
+            for host in hosts
+        }
+        self._task: asyncio.Task | None = None
+
+    async def probe(self, host: str) -> bool:
+        try:
+            res = await self._clients[host].get(
+                "/sharing/shares",
+                params={"maxResults": 1},
+                headers=get_sharing_headers(),
+                timeout=self.interval,
+            )
+        except httpx.HTTPError:
+            return False
+        return res.is_success
+
+    def observe(self, host: str, healthy: bool) -> bool:
+        """Records a probe, and returns whether the host just came up."""
+        streak = self.streaks[host]
+        streak = max(streak, 0) + 1 if healthy else min(streak, 0) - 1
+        self.streaks[host] = streak
+
+        was_up = self.up[host]
+        if streak >= self.threshold:
+            self.up[host] = True
+        elif streak <= -self.threshold:
+            self.up[host] = False
+        return was_up is False and self.up[host] is True
+
+    async def warm(self, host: str):
+        client = self._clients[host]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tables = cache_warmer.hot_tables()
+
+        async def warm(key: tuple[str, str, str, str | None]):
+            share_name, schema_name, table_name, delta_sharing_capabilities = key
+            additional_headers = {}
+            if delta_sharing_capabilities is not None:
+                additional_headers["delta-sharing-capabilities"] = (
+                    delta_sharing_capabilities
+                )
+            async with semaphore:
+                try:
+                    await client.get(
+                        get_table_path(share_name, schema_name, table_name, "metadata"),
+                        headers=get_sharing_headers(additional_headers),
+                    )
+                except httpx.HTTPError as e:
+                    logger.warning(f"Could not warm {key} on {host}: {e}")
+
+        start = time.monotonic()
+        await asyncio.gather(*[warm(key) for key in tables])
+        self.last_warm_duration = time.monotonic() - start
+        self.last_warmed_tables = len(tables)
+
+    def switch(self, host: str):
+        logger.info(f"Switching Delta Sharing server from {self.active} to {host}")
+        sharing_client.base_url = f"http://{host}"
+        # The new server may serve another catalog, so nothing cached from the old
+        # one is served after the switch
+        for cache in (metadata_cache, query_cache, stats_cache, compacted_cdf_cache):
+            cache.clear()
+        load_table_locations.cache_clear()
+        self.active = host
+        self.switches += 1
+        self.last_switch_at = time.time()
+
+    async def promote(self, host: str):
+        try:
+            await asyncio.wait_for(self.warm(host), self.warm_timeout)
+        except TimeoutError:
+            logger.warning(f"Warming {host} timed out, switching anyway")
+
+        if not await self.probe(host):
+            logger.warning(f"{host} went down while warming, not switching")
+            self.up[host] = False
+            self.streaks[host] = 0
+            return
+        self.switch(host)
+
+    async def check(self):
+        results = await asyncio.gather(*[self.probe(host) for host in self.hosts])
+        came_up = []
+        for host, healthy in zip(self.hosts, results, strict=True):
+            if self.observe(host, healthy) and host != self.active:
+                came_up.append(host)
+
+        if self.up.get(self.active) is False:
+            standby = next((host for host in self.hosts if self.up[host]), None)
+            if standby is not None:
+                logger.warning(f"{self.active} is down, failing over")
+                self.failovers += 1
+                self.switch(standby)
+        elif came_up and self.up.get(self.active):
+            await self.promote(came_up[0])
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.exception(f"Upstream check failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "active": self.active,
+            "hosts": self.up,
+            "switches": self.switches,
+            "failovers": self.failovers,
+            "last_switch_at": self.last_switch_at,
+            "last_warm_duration": self.last_warm_duration,
+            "last_warmed_tables": self.last_warmed_tables,
+        }
+
+
+upstream_switch = UpstreamSwitch(
+    hosts=settings.DELTA_SHARING_HOSTS,
+    active=settings.DELTA_SHARING_HOST,
+    interval=settings.UPSTREAM_CHECK_INTERVAL_SECONDS,
+    threshold=settings.UPSTREAM_HEALTH_THRESHOLD,
+    warm_timeout=settings.UPSTREAM_WARM_TIMEOUT_SECONDS,
+    concurrency=settings.CACHE_WARMER_CONCURRENCY,
+)
+
+register_collector("upstream_switch", upstream_switch.metrics)
@@ -0,0 +1,198 @@
+import asyncio
+import time
+from collections import defaultdict
+
+import httpx
+from fastapi import Header, Path
+from loguru import logger
+
+from data_sharing.internal.metrics import register_collector
+from data_sharing.internal.sharing import (
+    SharingError,
+    fetch_default_table_query,
+    fetch_table_metadata,
+    fetch_table_version,
+    metadata_cache,
+    query_cache,
+)
+from data_sharing.settings import settings
+from data_sharing.utils.header import normalize_capabilities_header
+
+TableKey = tuple[str, str, str, str | None]
+
+
+class CacheWarmer:
+    """
+    Keeps the metadata (and optionally the default query) cache of the most
+    frequently requested tables fresh, so that the first requests after a new table
+    version is committed do not all hit the sharing server at once.
+
+    Request counts decay exponentially with the given half-life, so "hot" reflects
+    recent traffic while tables stay warm across quiet periods such as the nightly
+    ingestion window.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        half_life: float,
+        top_n: int,
+        concurrency: int,
+        warm_queries: bool,
+    ):
+        self.interval = interval
+        self.decay_factor = 0.5 ** (interval / half_life)
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.warm_queries = warm_queries
+        self.request_counts: defaultdict[TableKey, float] = defaultdict(float)
+        self.table_status: dict[TableKey, dict] = {}
+        self.cycles = 0
+        self.last_cycle_at: float | None = None
+        self.last_cycle_duration: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def record(self, key: TableKey):
+        self.request_counts[key] += 1
+
+    def hot_tables(self) -> list[TableKey]:
+        ranked = sorted(self.request_counts.items(), key=lambda x: x[1], reverse=True)
+        return [key for key, _ in ranked[: self.top_n]]
+
+    def decay(self):
+        for key in list(self.request_counts):
+            self.request_counts[key] *= self.decay_factor
+            if self.request_counts[key] < 0.05:
+                del self.request_counts[key]
+                self.table_status.pop(key, None)
+
+    async def warm(self, key: TableKey):
+        share_name, schema_name, table_name, delta_sharing_capabilities = key
+        status = self.table_status.setdefault(key, {})
+        status["checked_at"] = time.time()
+        try:
+            version = await fetch_table_version(share_name, schema_name, table_name)
+
+            cached = metadata_cache.get(key)
+            if cached is not None and cached["deltaTableVersion"] == version:
+                # Still current, so extend its lifetime instead of fetching again
+                metadata_cache.set(key, cached)
+            else:
+                metadata_cache.set(
+                    key,
+                    await fetch_table_metadata(
+                        share_name, schema_name, table_name, delta_sharing_capabilities
+                    ),
+                )
+                status["warmed_at"] = time.time()
+
+            # Query responses contain pre-signed URLs, so they are never extended
+            cached = query_cache.get(key)
+            if self.warm_queries and (
+                cached is None or cached["deltaTableVersion"] != version
+            ):
+                query_cache.set(
+                    key,
+                    await fetch_default_table_query(
+                        share_name, schema_name, table_name, delta_sharing_capabilities
+                    ),
+                )
+                status["warmed_at"] = time.time()
+        except (SharingError, httpx.HTTPError) as e:
+            logger.warning(f"Could not warm cache for {key}: {e}")
+            status["error"] = str(e)
+        else:
+            status.update(version=version, error=None)
+
+    async def run_once(self):
+        start = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm(key: TableKey):
+            async with semaphore:
+                await self.warm(key)
+
+        await asyncio.gather(*[warm(key) for key in self.hot_tables()])
+        self.decay()
+        self.cycles += 1
+        self.last_cycle_at = time.time()
+        self.last_cycle_duration = time.monotonic() - start
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.exception(f"Cache warmer cycle failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "cycles": self.cycles,
+            "last_cycle_at": self.last_cycle_at,
+            "last_cycle_duration": self.last_cycle_duration,
+            "tracked_tables": len(self.request_counts),
+            "metadata_cache": {
+                "size": len(metadata_cache),
+                "hits": metadata_cache.hits,
+                "misses": metadata_cache.misses,
+            },
+            "query_cache": {
+                "size": len(query_cache),
+                "hits": query_cache.hits,
+                "misses": query_cache.misses,
+            },
+            "hot_tables": [
+                {
+                    "share": key[0],
+                    "schema": key[1],
+                    "table": key[2],
+                    "capabilities": key[3],
+                    "score": self.request_counts.get(key, 0),
+                    **self.table_status.get(key, {}),
+                }
+                for key in self.hot_tables()
+            ],
+        }
+
+
+cache_warmer = CacheWarmer(
+    interval=settings.CACHE_WARMER_INTERVAL_SECONDS,
+    half_life=settings.CACHE_WARMER_HALF_LIFE_SECONDS,
+    top_n=settings.CACHE_WARMER_TOP_N,
+    concurrency=settings.CACHE_WARMER_CONCURRENCY,
+    warm_queries=settings.CACHE_WARMER_WARM_QUERIES,
+)
+
+register_collector("cache_warmer", cache_warmer.metrics)
+
+
+async def track_table_request(
+    share_name: str = Path(),
+    schema_name: str = Path(),
+    table_name: str = Path(),
+    delta_sharing_capabilities: str | None = Header(
+        None, alias="delta-sharing-capabilities", include_in_schema=False
+    ),
+):
+    # The header is normalized as in the cache keys, so that clients cannot grow the
+    # tracked tables with arbitrary headers, and warming hits the cached entries
+    cache_warmer.record(
+        (
+            share_name,
+            schema_name,
+            table_name,
+            normalize_capabilities_header(delta_sharing_capabilities),
+        )
+    )
@@ -0,0 +1,28 @@
+"""Add API key (created, id) index for keyset pagination
+
+Revision ID: add_api_key_created_index
+Revises: add_association_primary_keys
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_api_key_created_index"
+down_revision: Union[str, None] = "add_association_primary_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_api_keys_created_id", "api_keys", ["created", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_api_keys_created_id", table_name="api_keys")
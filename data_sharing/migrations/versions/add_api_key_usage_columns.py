@@ -0,0 +1,35 @@
+"""Add API key last used timestamp and request count
+
+Revision ID: add_api_key_usage_columns
+Revises: add_api_key_created_index
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_api_key_usage_columns"
+down_revision: Union[str, None] = "add_api_key_created_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "api_keys",
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "api_keys",
+        sa.Column("request_count", sa.BigInteger(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("api_keys", "request_count")
+    op.drop_column("api_keys", "last_used_at")
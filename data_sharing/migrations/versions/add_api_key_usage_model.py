@@ -0,0 +1,43 @@
+"""Add API key usage model, partitioned by month
+
+Revision ID: add_api_key_usage_model
+Revises: add_api_key_usage_columns
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_api_key_usage_model"
+down_revision: Union[str, None] = "add_api_key_usage_columns"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Monthly partitions are created by the proxy as usage is flushed
+    op.create_table(
+        "api_key_usage",
+        sa.Column("api_key_id", sa.Uuid(), nullable=False),
+        sa.Column("share_name", sa.String(), nullable=False),
+        sa.Column("schema_name", sa.String(), nullable=False),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("hour", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("requests", sa.BigInteger(), nullable=False),
+        sa.Column("files", sa.BigInteger(), nullable=False),
+        sa.Column("bytes", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint(
+            "api_key_id", "share_name", "schema_name", "table_name", "hour"
+        ),
+        postgresql_partition_by="RANGE (hour)",
+    )
+
+
+def downgrade() -> None:
+    # Drops the partitions too
+    op.drop_table("api_key_usage")
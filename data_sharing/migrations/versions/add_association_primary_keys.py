@@ -0,0 +1,46 @@
+"""Add primary keys and reverse indexes to association tables
+
+Revision ID: add_association_primary_keys
+Revises: add_cdf_cursor_model
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_association_primary_keys"
+down_revision: Union[str, None] = "add_cdf_cursor_model"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, primary key columns); the second column gets a reverse-direction index
+ASSOCIATION_TABLES = [
+    ("apikey_role_association_table", ("api_key_id", "role_id")),
+    ("apikey_schema_association_table", ("api_key_id", "schema_id")),
+    ("schema_role_association_table", ("schema_id", "role_id")),
+]
+
+
+def upgrade() -> None:
+    for table, (left, right) in ASSOCIATION_TABLES:
+        # Duplicate grants would violate the primary key, keep one row of each
+        op.execute(
+            sa.text(
+                f"DELETE FROM {table} a USING {table} b"
+                f" WHERE a.ctid < b.ctid AND a.{left} = b.{left} AND a.{right} = b.{right}"
+            )
+        )
+        op.create_primary_key(f"{table}_pkey", table, [left, right])
+        op.create_index(op.f(f"ix_{table}_{right}"), table, [right], unique=False)
+
+
+def downgrade() -> None:
+    # Duplicate rows removed by the upgrade are not restored
+    for table, (_, right) in reversed(ASSOCIATION_TABLES):
+        op.drop_index(op.f(f"ix_{table}_{right}"), table_name=table)
+        op.drop_constraint(f"{table}_pkey", table, type_="primary")
@@ -0,0 +1,48 @@
+"""Add audit event model, partitioned by month
+
+Revision ID: add_audit_event_model
+Revises: add_api_key_usage_model
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_audit_event_model"
+down_revision: Union[str, None] = "add_api_key_usage_model"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Monthly partitions are created by the proxy as events are written
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("api_key_id", sa.Uuid(), nullable=False),
+        sa.Column("share_name", sa.String(), nullable=False),
+        sa.Column("schema_name", sa.String(), nullable=False),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("action", sa.String(), nullable=False),
+        sa.Column("table_version", sa.BigInteger(), nullable=True),
+        sa.Column("status_code", sa.SmallInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id", "occurred_at"),
+        postgresql_partition_by="RANGE (occurred_at)",
+    )
+    op.create_index(
+        "ix_audit_events_api_key_id_occurred_at",
+        "audit_events",
+        ["api_key_id", "occurred_at"],
+    )
+
+
+def downgrade() -> None:
+    # Drops the partitions too
+    op.drop_index("ix_audit_events_api_key_id_occurred_at", table_name="audit_events")
+    op.drop_table("audit_events")
@@ -0,0 +1,44 @@
+"""Add CDF cursor model
+
+Revision ID: add_cdf_cursor_model
+Revises: add_schema_model
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_cdf_cursor_model"
+down_revision: Union[str, None] = "add_schema_model"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cdf_cursors",
+        sa.Column("api_key_id", sa.Uuid(), nullable=False),
+        sa.Column("share_name", sa.String(), nullable=False),
+        sa.Column("schema_name", sa.String(), nullable=False),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["api_key_id"], ["api_keys.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint(
+            "api_key_id", "share_name", "schema_name", "table_name"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cdf_cursors")
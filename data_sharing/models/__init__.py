@@ -6,4 +6,7 @@ from .api_key import (
     apikey_schema_association_table,
     schema_role_association_table,
 )
+from .api_key_usage import ApiKeyUsage
+from .audit_event import AuditEvent
 from .base import BaseModel
+from .cdf_cursor import CdfCursor
@@ -12,27 +12,48 @@ apikey_role_association_table = sa.Table(
     "apikey_role_association_table",
     BaseModel.metadata,
     sa.Column(
-        "api_key_id", sa.ForeignKey("api_keys.id", ondelete="CASCADE"), nullable=False
+        "api_key_id",
+        sa.ForeignKey("api_keys.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    sa.Column(
+        "role_id",
+        sa.ForeignKey("roles.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
-    sa.Column("role_id", sa.ForeignKey("roles.id", ondelete="CASCADE"), nullable=False),
 )
 
 apikey_schema_association_table = sa.Table(
     "apikey_schema_association_table",
     BaseModel.metadata,
     sa.Column(
-        "api_key_id", sa.ForeignKey("api_keys.id", ondelete="CASCADE"), nullable=False
+        "api_key_id",
+        sa.ForeignKey("api_keys.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    sa.Column(
+        "schema_id",
+        sa.ForeignKey("schemas.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
-    sa.Column("schema_id", sa.ForeignKey("schemas.id", ondelete="CASCADE"), nullable=False),
 )
 
 schema_role_association_table = sa.Table(
     "schema_role_association_table",
     BaseModel.metadata,
     sa.Column(
-        "schema_id", sa.ForeignKey("schemas.id", ondelete="CASCADE"), nullable=False
+        "schema_id",
+        sa.ForeignKey("schemas.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    sa.Column(
+        "role_id",
+        sa.ForeignKey("roles.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
-    sa.Column("role_id", sa.ForeignKey("roles.id", ondelete="CASCADE"), nullable=False),
 )
 
 
@@ -64,6 +85,7 @@ class Role(BaseModel):
 
 class ApiKey(BaseModel):
     __tablename__ = "api_keys"
+    __table_args__ = (sa.Index("ix_api_keys_created_id", "created", "id"),)
 
     id: Mapped[UUID4] = mapped_column(primary_key=True, index=True, default=uuid4)
     created: Mapped[datetime] = mapped_column(
@@ -74,6 +96,12 @@ class ApiKey(BaseModel):
     expiration: Mapped[datetime | None] = mapped_column(
         sa.DateTime(timezone=True), index=True, nullable=True
     )
+    last_used_at: Mapped[datetime | None] = mapped_column(
+        sa.DateTime(timezone=True), nullable=True
+    )
+    request_count: Mapped[int] = mapped_column(
+        sa.BigInteger, nullable=False, server_default="0"
+    )
     roles: Mapped[set[Role]] = relationship(
         secondary=apikey_role_association_table,
         lazy="selectin",
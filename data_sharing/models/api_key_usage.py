@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from pydantic import UUID4
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class ApiKeyUsage(BaseModel):
+    """
+    Requests, files and bytes served per API key, table and hour. Partitioned by
+    month on `hour`; partitions are created as usage is flushed. There is no foreign
+    key to `api_keys`, so the usage of revoked keys is kept.
+    """
+
+    __tablename__ = "api_key_usage"
+    __table_args__ = {"postgresql_partition_by": "RANGE (hour)"}
+
+    api_key_id: Mapped[UUID4] = mapped_column(primary_key=True)
+    share_name: Mapped[str] = mapped_column(primary_key=True)
+    schema_name: Mapped[str] = mapped_column(primary_key=True)
+    table_name: Mapped[str] = mapped_column(primary_key=True)
+    hour: Mapped[datetime] = mapped_column(sa.DateTime(timezone=True), primary_key=True)
+    requests: Mapped[int] = mapped_column(sa.BigInteger(), nullable=False)
+    files: Mapped[int] = mapped_column(sa.BigInteger(), nullable=False)
+    bytes: Mapped[int] = mapped_column(sa.BigInteger(), nullable=False)
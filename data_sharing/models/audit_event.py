@@ -0,0 +1,35 @@
+from datetime import datetime
+from uuid import uuid4
+
+import sqlalchemy as sa
+from pydantic import UUID4
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class AuditEvent(BaseModel):
+    """
+    Append-only log of table data accesses: which API key read which version of
+    which table, and when. Partitioned by month on `occurred_at`; partitions are
+    created as events are written. There is no foreign key to `api_keys`, so the
+    events of revoked keys are kept.
+    """
+
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        sa.Index("ix_audit_events_api_key_id_occurred_at", "api_key_id", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    id: Mapped[UUID4] = mapped_column(primary_key=True, default=uuid4)
+    occurred_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), primary_key=True
+    )
+    api_key_id: Mapped[UUID4] = mapped_column(nullable=False)
+    share_name: Mapped[str] = mapped_column(nullable=False)
+    schema_name: Mapped[str] = mapped_column(nullable=False)
+    table_name: Mapped[str] = mapped_column(nullable=False)
+    action: Mapped[str] = mapped_column(nullable=False)
+    table_version: Mapped[int | None] = mapped_column(sa.BigInteger(), nullable=True)
+    status_code: Mapped[int] = mapped_column(sa.SmallInteger(), nullable=False)
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from pydantic import UUID4
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class CdfCursor(BaseModel):
+    __tablename__ = "cdf_cursors"
+
+    api_key_id: Mapped[UUID4] = mapped_column(
+        sa.ForeignKey("api_keys.id", ondelete="CASCADE"), primary_key=True
+    )
+    share_name: Mapped[str] = mapped_column(primary_key=True)
+    schema_name: Mapped[str] = mapped_column(primary_key=True)
+    table_name: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(sa.BigInteger(), nullable=False)
+    updated: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
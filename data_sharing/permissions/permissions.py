@@ -1,57 +1,46 @@
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from fastapi import Depends, HTTPException, Path, Query, Request, status
 
-from fastapi import Depends, HTTPException, Path, Query, status
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from data_sharing.db import get_async_db
 from data_sharing.internal.hashing import verify_key
-from data_sharing.models import ApiKey
+from data_sharing.internal.last_used import last_used_tracker
 
 from .base import BasePermission
-from .utils import extract_sharing_key_components, get_current_user
+from .principal import Principal
+from .utils import extract_sharing_key_components, get_current_user, get_principal
 
 
 class IsAuthenticated(BasePermission):
     async def __call__(
         self,
+        request: Request,
         key=Depends(extract_sharing_key_components),
-        db: AsyncSession = Depends(get_async_db),
+        principal: Principal | None = Depends(get_principal),
     ):
-        key_id, secret = key
-        now = datetime.now().astimezone(ZoneInfo("UTC"))
-        result = await db.scalar(select(ApiKey).where(ApiKey.id == key_id))
-        if result is None:
+        _, secret = key
+        # Expired keys are filtered out when loading the principal
+        if principal is None:
             if self.raise_exceptions:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
             return False
 
-        if (
-            result.expiration is not None and result.expiration < now
-        ) or not verify_key(secret, result.secret):
+        if not verify_key(secret, principal.secret):
             if self.raise_exceptions:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
             return False
 
+        last_used_tracker.record(principal.id)
+        # For usage metering and the audit log
+        request.state.api_key_id = principal.id
         return True
 
 
 class IsAdmin(BasePermission):
-    async def __call__(
-        self,
-        key=Depends(extract_sharing_key_components),
-        db: AsyncSession = Depends(get_async_db),
-    ):
-        key_id, secret = key
-        result = await db.scalar(select(ApiKey).where(ApiKey.id == key_id))
-        if result is None:
+    async def __call__(self, principal: Principal | None = Depends(get_principal)):
+        if principal is None:
             if self.raise_exceptions:
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
             return False
 
-        role_codes = [r.id for r in result.roles]
-        if "ADMIN" not in role_codes:
+        if not principal.is_admin:
             if self.raise_exceptions:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
             return False
@@ -61,17 +50,15 @@ class IsAdmin(BasePermission):
 
 class HasSchemaPermissions(BasePermission):
     async def __call__(
-        self, 
-        current_user: ApiKey = Depends(get_current_user),
-        db: AsyncSession = Depends(get_async_db)
+        self,
+        current_user: Principal = Depends(get_current_user),
     ):
         """Check if user can access any schema or is admin"""
-        role_codes = [r.id for r in current_user.roles]
-        if "ADMIN" in role_codes:
+        if current_user.is_admin:
             return True
-        
+
         # If no schemas assigned, no access
-        if not current_user.schemas:
+        if not current_user.schema_ids:
             if self.raise_exceptions:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
             return False
@@ -81,19 +68,16 @@ class HasSchemaPermissions(BasePermission):
 
 class HasTablePermissions(BasePermission):
     async def __call__(
-        self, 
+        self,
         schema_name: str = Path(),
-        table_name: str = Path(), 
-        current_user: ApiKey = Depends(get_current_user),
-        db: AsyncSession = Depends(get_async_db)
+        table_name: str = Path(),
+        current_user: Principal = Depends(get_current_user),
     ):
-        role_codes = [r.id for r in current_user.roles]
-        if "ADMIN" in role_codes:
+        if current_user.is_admin:
             return True
 
         # Check schema access first
-        schema_ids = [s.id for s in current_user.schemas]
-        if schema_name not in schema_ids:
+        if schema_name not in current_user.schema_ids:
             if self.raise_exceptions:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -102,8 +86,8 @@ class HasTablePermissions(BasePermission):
             return False
         
         # Check table (country) access if roles are specified
-        if table_name and current_user.roles and "ADMIN" not in role_codes:
-            if table_name not in role_codes:
+        if table_name and current_user.role_ids:
+            if table_name not in current_user.role_ids:
                 if self.raise_exceptions:
                     raise HTTPException(
                         status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from data_sharing.models import (
+    ApiKey,
+    apikey_role_association_table,
+    apikey_schema_association_table,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    The identity and grants of an API key, as needed by the authentication and
+    permission checks. Unlike `ApiKey`, loading it does not load the role and
+    schema object graph.
+    """
+
+    id: UUID
+    secret: str
+    expiration: datetime | None
+    role_ids: frozenset[str]
+    schema_ids: frozenset[str]
+
+    @property
+    def is_admin(self) -> bool:
+        return "ADMIN" in self.role_ids
+
+
+_role_ids = (
+    select(func.array_agg(apikey_role_association_table.c.role_id))
+    .where(apikey_role_association_table.c.api_key_id == ApiKey.id)
+    .scalar_subquery()
+)
+
+_schema_ids = (
+    select(func.array_agg(apikey_schema_association_table.c.schema_id))
+    .where(apikey_schema_association_table.c.api_key_id == ApiKey.id)
+    .scalar_subquery()
+)
+
+principal_statement = select(
+    ApiKey.id,
+    ApiKey.secret,
+    ApiKey.expiration,
+    _role_ids.label("role_ids"),
+    _schema_ids.label("schema_ids"),
+).where(
+    ApiKey.id == bindparam("key_id"),
+    # Expired keys are not loaded, so they are rejected before hashing the secret
+    or_(ApiKey.expiration.is_(None), ApiKey.expiration > func.now()),
+)
+
+
+async def load_principal(db: AsyncSession, key_id: str | UUID) -> Principal | None:
+    """
+    Load an unexpired API key and the ids of its roles and schemas in a single
+    query.
+    """
+    try:
+        key_id = key_id if isinstance(key_id, UUID) else UUID(key_id)
+    except ValueError:
+        return None
+
+    row = (await db.execute(principal_statement, {"key_id": key_id})).one_or_none()
+    if row is None:
+        return None
+
+    return Principal(
+        id=row.id,
+        secret=row.secret,
+        expiration=row.expiration,
+        role_ids=frozenset(row.role_ids or ()),
+        schema_ids=frozenset(row.schema_ids or ()),
+    )
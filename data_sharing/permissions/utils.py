@@ -2,13 +2,12 @@ from typing import Annotated
 
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from data_sharing.db import get_async_db
-from data_sharing.models import ApiKey
 
+from .principal import Principal, load_principal
 from .scheme import auth_scheme
 
 
@@ -25,10 +24,35 @@ def extract_sharing_key_components(
     return split[0], split[1]
 
 
-async def get_current_user(
+async def get_principal(
     key=Depends(extract_sharing_key_components),
     db: AsyncSession = Depends(get_async_db),
-) -> ApiKey:
+) -> Principal | None:
+    """
+    Load the API key of the request. FastAPI caches dependencies per request, so
+    every permission check and route handler shares a single query. It is read from
+    the primary, so that revoked or expired keys and grants take effect right away
+    rather than after the replication delay of the read replica.
+    """
     id_, secret = key
-    result = await db.scalar(select(ApiKey).where(ApiKey.id == id_))
-    return result
+    return await load_principal(db, id_)
+
+
+async def get_current_user(
+    principal: Principal | None = Depends(get_principal),
+) -> Principal:
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return principal
+
+
+def has_table_access(
+    current_user: Principal, schema_name: str, table_name: str
+) -> bool:
+    if current_user.is_admin:
+        return True
+
+    if schema_name not in current_user.schema_ids:
+        return False
+
+    return not current_user.role_ids or table_name in current_user.role_ids
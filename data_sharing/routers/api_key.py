@@ -1,25 +1,57 @@
 from datetime import datetime, timedelta
 from secrets import token_urlsafe
+from typing import Annotated, Literal
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException, Security, status
-from pydantic import UUID4
-from sqlalchemy import delete, select
+import orjson
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    Security,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import UUID4, conint
+from sqlalchemy import Select, delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from data_sharing.annotations.api_key import ApiKeyDescriptions
 from data_sharing.constants import constants
-from data_sharing.db import get_async_db
-from data_sharing.internal.hashing import get_key_hash
+from data_sharing.db import get_async_db, get_async_read_db
+from data_sharing.internal.api_keys import (
+    InvalidGrantsError,
+    InvalidPageTokenError,
+    build_api_key_query,
+    build_profiles_zip,
+    bulk_create_api_keys,
+    bulk_grant,
+    bulk_revoke,
+    list_api_keys_page,
+    stream_api_keys_ndjson,
+)
+from data_sharing.internal.hashing import get_key_hashes
 from data_sharing.models import ApiKey, Role, Schema
 from data_sharing.permissions import IsAdmin, IsAuthenticated, auth_scheme
-from data_sharing.permissions.utils import extract_sharing_key_components, get_current_user
+from data_sharing.permissions.principal import Principal
+from data_sharing.permissions.utils import (
+    extract_sharing_key_components,
+    get_current_user,
+)
 from data_sharing.schemas.api_key import (
+    BulkCreateApiKeyRequest,
+    BulkGrantRequest,
+    BulkGrantResponse,
     CreateApiKeyRequest,
     SafeApiKey,
     UpdateApiKeyRequest,
 )
 from data_sharing.schemas.delta_sharing import ProfileFile
 from data_sharing.settings import settings
+from data_sharing.utils.responses import NDJSONResponse
 
 router = APIRouter(
     prefix="/api-keys",
@@ -28,16 +60,70 @@ router = APIRouter(
 )
 
 
+def api_key_query(
+    role: Annotated[
+        list[str] | None, Query(description=ApiKeyDescriptions.role_filter)
+    ] = None,
+    schema: Annotated[
+        list[str] | None, Query(description=ApiKeyDescriptions.schema_filter)
+    ] = None,
+    expired: Annotated[
+        bool | None, Query(description=ApiKeyDescriptions.expired_filter)
+    ] = None,
+    descriptionPrefix: Annotated[
+        str | None, Query(description=ApiKeyDescriptions.description_prefix)
+    ] = None,
+    pageToken: Annotated[
+        str | None, Query(description=ApiKeyDescriptions.page_token)
+    ] = None,
+) -> Select:
+    try:
+        return build_api_key_query(role, schema, expired, descriptionPrefix, pageToken)
+    except InvalidPageTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+
 @router.get(
     "", response_model=list[SafeApiKey], dependencies=[Security(IsAdmin.raises(True))]
 )
-async def list_api_keys(db: AsyncSession = Depends(get_async_db)):
-    return await db.scalars(select(ApiKey).order_by(ApiKey.created.desc()))
+async def list_api_keys(
+    response: Response,
+    query: Select = Depends(api_key_query),
+    maxResults: Annotated[
+        conint(ge=1) | None, Query(description=ApiKeyDescriptions.max_results)
+    ] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if maxResults is None:
+        return (await db.execute(query)).mappings().all()
+
+    items, next_page_token = await list_api_keys_page(db, query, maxResults)
+    if next_page_token is not None:
+        response.headers["next-page-token"] = next_page_token
+    return items
+
+
+@router.get(
+    "/export",
+    response_class=NDJSONResponse,
+    response_description="One API key per line, in the same format as the list route.",
+    dependencies=[Security(IsAdmin.raises(True))],
+)
+async def export_api_keys(query: Select = Depends(api_key_query)):
+    """
+    Export every API key matching the filters as NDJSON. Keys are streamed from the
+    database in batches, so memory use does not grow with the number of keys.
+    """
+    return StreamingResponse(
+        stream_api_keys_ndjson(query), media_type=NDJSONResponse.media_type
+    )
 
 
 @router.get("/me", response_model=SafeApiKey)
 async def view_api_key_details_for_current_user(
-    key=Depends(auth_scheme), db: AsyncSession = Depends(get_async_db)
+    key=Depends(auth_scheme), db: AsyncSession = Depends(get_async_read_db)
 ):
     key_id, key_secret = extract_sharing_key_components(key)
     queryset = await db.scalar(select(ApiKey).where(ApiKey.id == key_id))
@@ -52,7 +138,7 @@ async def view_api_key_details_for_current_user(
     dependencies=[Security(IsAdmin.raises(True))],
 )
 async def view_api_key_details(
-    api_key_id: UUID4, db: AsyncSession = Depends(get_async_db)
+    api_key_id: UUID4, db: AsyncSession = Depends(get_async_read_db)
 ):
     queryset = await db.scalar(select(ApiKey).where(ApiKey.id == str(api_key_id)))
     if queryset is None:
@@ -71,33 +157,34 @@ async def view_api_key_details(
     dependencies=[Security(IsAdmin.raises(True))],
 )
 async def generate_api_key(
-    body: CreateApiKeyRequest, 
+    body: CreateApiKeyRequest,
     db: AsyncSession = Depends(get_async_db),
-    current_user: ApiKey = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user),
 ):
     # Double-check: Verify the requesting user is an admin
-    role_codes = [r.id for r in current_user.roles]
-    if "ADMIN" not in role_codes:
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only administrators can create API keys"
+            detail="Only administrators can create API keys",
         )
-    
+
     # Check if ADMIN role is requested
     is_admin = "ADMIN" in body.roles if body.roles else False
-    
+
     # If not admin, schemas are required
     if not is_admin and not body.schemas:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Schemas are required for non-admin API keys",
         )
-    
+
     # If admin, no schemas needed
     if is_admin:
         schemas = []
     else:
-        schemas_result = await db.execute(select(Schema).where(Schema.id.in_(body.schemas)))
+        schemas_result = await db.execute(
+            select(Schema).where(Schema.id.in_(body.schemas))
+        )
         schemas = schemas_result.scalars().all()
         schema_ids = {schema.id for schema in schemas}
         if len(diff := set(body.schemas).difference(schema_ids)) > 0:
@@ -105,15 +192,15 @@ async def generate_api_key(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid schema(s): {', '.join([f'`{d}`' for d in diff])}",
             )
-    
+
     new_key = token_urlsafe(constants.API_KEY_BYTES_LENGTH)
     now = datetime.now().astimezone(ZoneInfo("UTC"))
     api_key = ApiKey(
         description=body.description,
-        secret=get_key_hash(new_key),
+        secret=(await get_key_hashes([new_key]))[0],
         expiration=now + timedelta(days=body.validity) if body.validity > 0 else None,
     )
-    
+
     # Handle roles
     if body.roles:
         roles_result = await db.execute(select(Role).where(Role.id.in_(body.roles)))
@@ -125,7 +212,7 @@ async def generate_api_key(
                 detail=f"Invalid role(s): {', '.join([f'`{d}`' for d in diff])}",
             )
         api_key.roles.update(roles)
-    
+
     # Handle schemas
     api_key.schemas.update(schemas)
     db.add(api_key)
@@ -135,6 +222,86 @@ async def generate_api_key(
     )
 
 
+@router.post(
+    "/bulk",
+    response_class=NDJSONResponse,
+    response_description=(
+        "The created keys, each with its Delta Sharing Protocol Profile File. Save"
+        " these in a secure location as they will not be shown again."
+    ),
+    dependencies=[Security(IsAdmin.raises(True))],
+)
+async def bulk_generate_api_keys(
+    body: BulkCreateApiKeyRequest,
+    format: Annotated[
+        Literal["ndjson", "zip"], Query(description=ApiKeyDescriptions.bulk_format)
+    ] = "ndjson",
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Create many API keys at once. Grants are validated for the whole batch, secrets
+    are hashed in parallel, and all keys are created in a single transaction.
+    """
+    try:
+        created = await bulk_create_api_keys(db, body.keys)
+    except InvalidGrantsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+    if format == "zip":
+        return Response(
+            await run_in_threadpool(build_profiles_zip, created),
+            media_type="application/zip",
+            headers={"content-disposition": 'attachment; filename="api-keys.zip"'},
+        )
+    return NDJSONResponse(b"".join(orjson.dumps(key) + b"\n" for key in created))
+
+
+@router.post(
+    "/bulk/grant",
+    response_model=BulkGrantResponse,
+    dependencies=[Security(IsAdmin.raises(True))],
+)
+async def bulk_grant_api_keys(
+    body: BulkGrantRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Grant roles and schemas to many keys at once. Grants the keys already have are
+    left unchanged.
+    """
+    try:
+        return await bulk_grant(
+            db, set(body.api_key_ids), set(body.roles), set(body.schemas)
+        )
+    except InvalidGrantsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+
+@router.post(
+    "/bulk/revoke",
+    response_model=BulkGrantResponse,
+    dependencies=[Security(IsAdmin.raises(True))],
+)
+async def bulk_revoke_api_keys(
+    body: BulkGrantRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Revoke roles and schemas from many keys at once. Nothing is revoked if a
+    non-admin key would be left without schemas, or a key would lose its last role.
+    """
+    try:
+        return await bulk_revoke(
+            db, set(body.api_key_ids), set(body.roles), set(body.schemas)
+        )
+    except InvalidGrantsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+
 @router.patch(
     "/{api_key_id}",
     response_model=SafeApiKey,
@@ -151,10 +318,10 @@ async def update_api_key(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="API key not found",
         )
-    
+
     role_codes = [r.id for r in api_key.roles]
     is_admin = "ADMIN" in role_codes
-    
+
     # Update schemas if provided
     if body.schemas is not None:
         if not is_admin and not body.schemas:
@@ -162,11 +329,13 @@ async def update_api_key(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Schemas are required for non-admin API keys",
             )
-        
+
         if is_admin:
             api_key.schemas.clear()
         else:
-            schemas_result = await db.execute(select(Schema).where(Schema.id.in_(body.schemas)))
+            schemas_result = await db.execute(
+                select(Schema).where(Schema.id.in_(body.schemas))
+            )
             schemas = schemas_result.scalars().all()
             schema_ids = {schema.id for schema in schemas}
             if len(diff := set(body.schemas).difference(schema_ids)) > 0:
@@ -176,7 +345,7 @@ async def update_api_key(
                 )
             api_key.schemas.clear()
             api_key.schemas.update(schemas)
-    
+
     # Update roles if provided
     if body.roles is not None:
         if "ADMIN" in body.roles:
@@ -197,7 +366,7 @@ async def update_api_key(
                 )
             api_key.roles.clear()
             api_key.roles.update(roles)
-    
+
     await db.commit()
     await db.refresh(api_key)
     return api_key
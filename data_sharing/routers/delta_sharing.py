@@ -1,13 +1,38 @@
 from datetime import datetime
+from functools import partial
 from typing import Annotated, Any, Literal, Optional
 
 import httpx
-from fastapi import APIRouter, Depends, Header, Path, Query, Security, status
+import orjson
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Security,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.requests import Request
-from fastapi.responses import ORJSONResponse, Response
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from httpx import HTTPError
 from pydantic import BaseModel, conint
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from data_sharing.annotations.delta_sharing import (
+    all_tables_metadata_ndjson_description,
+    arrow_columns_description,
+    arrow_filter_description,
+    arrow_limit_description,
+    arrow_stream_description,
+    arrow_version_description,
+    batch_query_ndjson_description,
+    cdf_cursor_ndjson_description,
+    cdf_cursor_starting_version_description,
+    compacted_cdf_key_description,
+    compacted_cdf_stream_description,
     delta_sharing_capabilities_header_description,
     ending_timestamp_description,
     ending_version_description,
@@ -17,58 +42,102 @@ from data_sharing.annotations.delta_sharing import (
     query_cdf_ndjson_description,
     query_data_ndjson_description,
     query_metadata_ndjson_description,
+    schema_filter_description,
     schema_name_description,
     share_name_description,
     starting_timestamp_description,
     starting_version_description,
+    statistics_by_partition_description,
+    table_filter_description,
     table_name_description,
 )
 from data_sharing.annotations.responses import other_common_responses
-from data_sharing.models import ApiKey
+from data_sharing.db import get_async_db
+from data_sharing.internal.access import stream_batch_table_query
+from data_sharing.internal.arrow import (
+    InvalidQueryError,
+    iter_arrow_stream,
+    open_table_scanner,
+)
+from data_sharing.internal.cdf import get_compacted_changes
+from data_sharing.internal.cursors import (
+    delete_cursor,
+    get_cursor,
+    stream_changes_and_advance_cursor,
+)
+from data_sharing.internal.files import rewrite_file_urls
+from data_sharing.internal.listing import listing_serializer
+from data_sharing.internal.sharing import (
+    SharingError,
+    fetch_table_version,
+    get_default_table_query,
+    get_error_content,
+    get_sharing_headers,
+    get_table_metadata,
+    get_table_path,
+    list_all_tables,
+    parse_table_query,
+    relay_sharing_response,
+    serialize_table_metadata,
+    sharing_client,
+    stream_limited_files,
+    stream_tagged_table_metadata,
+)
+from data_sharing.internal.stats import get_table_statistics
+from data_sharing.internal.warmer import track_table_request
 from data_sharing.permissions import (
     HasSchemaPermissions,
     HasTablePermissions,
     IsAuthenticated,
 )
-from data_sharing.permissions.utils import get_current_user
+from data_sharing.permissions.principal import Principal
+from data_sharing.permissions.utils import get_current_user, has_table_access
 from data_sharing.schemas import delta_sharing
-from data_sharing.schemas.delta_sharing import TableVersion
+from data_sharing.schemas.delta_sharing import CdfCursor, TableVersion
 from data_sharing.settings import settings
 from data_sharing.utils.qs import query_parametrize
-from data_sharing.utils.responses import NDJSONResponse
+from data_sharing.utils.responses import ArrowStreamResponse, NDJSONResponse
+from data_sharing.utils.streams import merge_streams
 
 router = APIRouter(
     tags=["delta_sharing"],
     dependencies=[Security(IsAuthenticated.raises(True))],
 )
 
-sharing_client = httpx.AsyncClient(
-    base_url=f"http://{settings.DELTA_SHARING_HOST}", timeout=300
-)
-
 
 async def forward_sharing_request(
     request: Request,
     response: Response,
     query: str = "",
     body: BaseModel = None,
-    response_type: Literal["json", "text", "full"] = "json",
+    response_type: Literal["json", "text", "full", "stream", "raw"] = "json",
     additional_headers: dict[str, str] = None,
+    content: bytes | None = None,
 ) -> tuple[dict[str, Any] | str | httpx.Response | Response, bool]:
-    additional_headers = additional_headers or {}
+    """
+    Forward a request to the Delta Sharing server under the same path. The request
+    body is either a validated `body` or the original `content` bytes. With
+    `response_type="raw"`, the upstream response is streamed on as-is, errors
+    included.
+    """
     url = httpx.URL(path=f"/sharing{request.url.path}", query=query.encode())
     sharing_req = sharing_client.build_request(
         url=url,
         method=request.method,
-        headers={
-            **additional_headers,
-            "Authorization": f"Bearer {settings.DELTA_BEARER_TOKEN}",
-        },
+        headers=get_sharing_headers(additional_headers),
         json=body.model_dump() if body else None,
+        content=content,
+    )
+    sharing_res = await sharing_client.send(
+        sharing_req, stream=response_type in ("stream", "raw")
     )
-    sharing_res = await sharing_client.send(sharing_req)
     if sharing_res.is_error:
-        json_content = sharing_res.json()
+        if response_type == "raw":
+            return relay_sharing_response(sharing_res), True
+        if response_type == "stream":
+            await sharing_res.aread()
+            await sharing_res.aclose()
+        json_content = get_error_content(sharing_res)
         status_code = sharing_res.status_code
         return (
             ORJSONResponse(json_content, status_code=status_code),
@@ -81,8 +150,10 @@ async def forward_sharing_request(
             return sharing_res.json(), False
         case "text":
             return sharing_res.text, False
-        case "full":
+        case "full" | "stream":
             return sharing_res, False
+        case "raw":
+            return relay_sharing_response(sharing_res), False
         case _:
             raise ValueError(f"Unknown {response_type=}")
 
@@ -103,7 +174,7 @@ async def list_shares(
     query_params = {"maxResults": maxResults, "pageToken": pageToken}
     parametrized_query = query_parametrize(query_params)
     sharing_res, _ = await forward_sharing_request(
-        request, response, parametrized_query
+        request, response, parametrized_query, response_type="raw"
     )
     return sharing_res
 
@@ -124,9 +195,8 @@ async def get_share(
 ):
     query_params = {"maxResults": maxResults, "pageToken": pageToken}
     parametrized_query = query_parametrize(query_params)
-
     sharing_res, _ = await forward_sharing_request(
-        request, response, parametrized_query
+        request, response, parametrized_query, response_type="raw"
     )
     return sharing_res
 
@@ -144,30 +214,25 @@ async def list_schemas(
         conint(ge=0), Query(description=max_results_description)
     ] = None,
     pageToken: Annotated[str, Query(description=page_token_description)] = None,
-    current_user: ApiKey = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     query_params = {"maxResults": maxResults, "pageToken": pageToken}
     parametrized_query = query_parametrize(query_params)
 
     sharing_res, error = await forward_sharing_request(
-        request, response, parametrized_query
+        request, response, parametrized_query, response_type="full"
     )
     if error:
         return sharing_res
-    
+
     # Filter schemas based on permissions
-    role_codes = [r.id for r in current_user.roles]
-    schema_ids = [s.id for s in current_user.schemas]
-    
-    if "ADMIN" not in role_codes:
-        if schema_ids:
-            sharing_res["items"] = list(
-                filter(lambda s: s["name"] in schema_ids, sharing_res["items"])
-            )
-        else:
-            sharing_res["items"] = []
-    
-    return sharing_res
+    content = orjson.loads(sharing_res.content)
+    if not current_user.is_admin:
+        content["items"] = [
+            s for s in content["items"] if s["name"] in current_user.schema_ids
+        ]
+
+    return listing_serializer.response(content)
 
 
 @router.get(
@@ -185,30 +250,86 @@ async def list_tables(
         conint(ge=0), Query(description=max_results_description)
     ] = None,
     pageToken: Annotated[str, Query(description=page_token_description)] = None,
-    current_user: ApiKey = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     query_params = {"maxResults": maxResults, "pageToken": pageToken}
     parametrized_query = query_parametrize(query_params)
     sharing_res, error = await forward_sharing_request(
-        request, response, parametrized_query
+        request, response, parametrized_query, response_type="full"
     )
     if error:
         return sharing_res
 
-    role_codes = [r.id for r in current_user.roles]
-    schema_ids = [s.id for s in current_user.schemas]
-    
-    if "ADMIN" not in role_codes:
+    content = orjson.loads(sharing_res.content)
+    role_codes = current_user.role_ids
+
+    if not current_user.is_admin:
         # Filter by schema
-        if schema_name not in schema_ids:
-            sharing_res["items"] = []
+        if schema_name not in current_user.schema_ids:
+            content["items"] = []
         # Filter by roles (countries) if specified
         elif role_codes:
-            sharing_res["items"] = list(
-                filter(lambda s: s["name"] in role_codes, sharing_res["items"])
-            )
+            content["items"] = [t for t in content["items"] if t["name"] in role_codes]
 
-    return sharing_res
+    return listing_serializer.response(content)
+
+
+@router.get(
+    "/shares/{share_name}/all-tables/metadata",
+    response_class=NDJSONResponse,
+    response_description=all_tables_metadata_ndjson_description,
+    responses=other_common_responses,
+)
+async def query_all_tables_metadata(
+    share_name: Annotated[str, Path(description=share_name_description)],
+    schema: Annotated[
+        list[str] | None, Query(description=schema_filter_description)
+    ] = None,
+    table: Annotated[
+        list[str] | None, Query(description=table_filter_description)
+    ] = None,
+    delta_sharing_capabilities: Annotated[
+        str | None,
+        Header(
+            alias="delta-sharing-capabilities",
+            description=delta_sharing_capabilities_header_description,
+        ),
+    ] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Get the version and metadata of every table visible to the API key, or of a
+    subset of them, in a single request.
+    """
+    try:
+        tables = await list_all_tables(share_name)
+    except SharingError as e:
+        return ORJSONResponse(e.content, status_code=e.status_code)
+
+    tables = [
+        t
+        for t in tables
+        if (schema is None or t["schema"] in schema)
+        and (table is None or t["name"] in table)
+        and has_table_access(current_user, t["schema"], t["name"])
+    ]
+
+    return StreamingResponse(
+        merge_streams(
+            [
+                partial(
+                    stream_tagged_table_metadata,
+                    share_name,
+                    t["schema"],
+                    t["name"],
+                    delta_sharing_capabilities,
+                )
+                for t in tables
+            ],
+            concurrency=settings.BATCH_QUERY_CONCURRENCY,
+        ),
+        media_type=NDJSONResponse.media_type,
+    )
 
 
 @router.get(
@@ -224,7 +345,7 @@ async def list_tables_in_share(
         conint(ge=0), Query(description=max_results_description)
     ] = None,
     pageToken: Annotated[str, Query(description=page_token_description)] = None,
-    current_user: ApiKey = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     sharing_res, error = await forward_sharing_request(
         request,
@@ -235,18 +356,19 @@ async def list_tables_in_share(
     if error:
         return sharing_res
 
-    sharing_json = sharing_res.json()
-    role_codes = [r.id for r in current_user.roles]
-    if "ADMIN" not in role_codes:
-        sharing_json["items"] = list(
-            filter(lambda s: s["name"] in role_codes, sharing_json["items"])
-        )
-    return sharing_json
+    content = orjson.loads(sharing_res.content)
+    role_codes = current_user.role_ids
+    if not current_user.is_admin:
+        content["items"] = [t for t in content["items"] if t["name"] in role_codes]
+    return listing_serializer.response(content)
 
 
 @router.get(
     "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/version",
-    dependencies=[Depends(HasTablePermissions.raises(True))],
+    dependencies=[
+        Depends(HasTablePermissions.raises(True)),
+        Depends(track_table_request),
+    ],
     response_model=TableVersion,
     responses=other_common_responses,
 )
@@ -260,6 +382,18 @@ async def query_table_version(
         datetime, Query(description=starting_timestamp_description)
     ] = None,
 ):
+    if startingTimestamp is None:
+        # Not cached, since clients poll the version to detect new data
+        try:
+            version = str(
+                await fetch_table_version(share_name, schema_name, table_name)
+            )
+        except SharingError as e:
+            return ORJSONResponse(e.content, status_code=e.status_code)
+
+        response.headers["delta-table-version"] = version
+        return {"delta-table-version": version}
+
     sharing_res, _ = await forward_sharing_request(
         request,
         response,
@@ -279,9 +413,43 @@ async def query_table_version(
     return sharing_res.headers
 
 
+@router.get(
+    "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/statistics",
+    dependencies=[
+        Depends(HasTablePermissions.raises(True)),
+        Depends(track_table_request),
+    ],
+    response_model=delta_sharing.TableStatistics,
+    response_model_exclude_none=True,
+    responses=other_common_responses,
+)
+async def query_table_statistics(
+    share_name: Annotated[str, Path(description=share_name_description)],
+    schema_name: Annotated[str, Path(description=schema_name_description)],
+    table_name: Annotated[str, Path(description=table_name_description)],
+    partitions: Annotated[
+        bool, Query(description=statistics_by_partition_description)
+    ] = False,
+):
+    """
+    Get the row count, size, and per-column null counts and min/max values of the
+    latest version of a table. These are aggregated from the file statistics of the
+    table, so no data is read.
+    """
+    try:
+        return await get_table_statistics(
+            share_name, schema_name, table_name, by_partition=partitions
+        )
+    except SharingError as e:
+        return ORJSONResponse(e.content, status_code=e.status_code)
+
+
 @router.get(
     "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/metadata",
-    dependencies=[Depends(HasTablePermissions.raises(True))],
+    dependencies=[
+        Depends(HasTablePermissions.raises(True)),
+        Depends(track_table_request),
+    ],
     response_class=NDJSONResponse,
     response_description=query_metadata_ndjson_description,
     responses=other_common_responses,
@@ -300,29 +468,43 @@ async def query_table_metadata(
         ),
     ] = None,
 ):
-    additional_headers = {}
-    if delta_sharing_capabilities is not None:
-        additional_headers["delta-sharing-capabilities"] = delta_sharing_capabilities
-
-    sharing_res, error = await forward_sharing_request(
-        request, response, response_type="full", additional_headers=additional_headers
-    )
-    if error:
-        return sharing_res
+    # The cached metadata is only served if it is of the latest version, so that it
+    # agrees with `/version`
+    try:
+        version = await fetch_table_version(share_name, schema_name, table_name)
+        metadata = await get_table_metadata(
+            share_name,
+            schema_name,
+            table_name,
+            delta_sharing_capabilities,
+            min_version=version,
+        )
+    except SharingError as e:
+        return ORJSONResponse(e.content, status_code=e.status_code)
 
-    response.headers["delta-table-version"] = sharing_res.headers.get(
-        "delta-table-version"
-    )
-    response.status_code = sharing_res.status_code
-    return sharing_res.content
+    response.headers["delta-table-version"] = str(metadata["deltaTableVersion"])
+    return serialize_table_metadata(metadata)
 
 
 @router.post(
     "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/query",
-    dependencies=[Depends(HasTablePermissions.raises(True))],
+    dependencies=[
+        Depends(HasTablePermissions.raises(True)),
+        Depends(track_table_request),
+    ],
     response_class=NDJSONResponse,
     response_description=query_data_ndjson_description,
     responses=other_common_responses,
+    # Documents the body, which is read as bytes rather than into the model
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": {"$ref": "#/components/schemas/TableQueryRequest"}
+                }
+            }
+        }
+    },
 )
 async def query_table_data(
     share_name: Annotated[str, Path(description=share_name_description)],
@@ -330,7 +512,6 @@ async def query_table_data(
     table_name: Annotated[str, Path(description=table_name_description)],
     request: Request,
     response: Response,
-    body: delta_sharing.TableQueryRequest = None,
     content_type: str | None = Header(None, alias="Content-Type"),
     delta_sharing_capabilities: Annotated[
         str | None,
@@ -340,19 +521,77 @@ async def query_table_data(
         ),
     ] = None,
 ):
+    # The body is not parsed into `TableQueryRequest`, as the original bytes are
+    # forwarded; only the fields the proxy acts on are checked
+    content = await request.body()
+    try:
+        query = parse_table_query(content)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+
     additional_headers = {}
     if delta_sharing_capabilities is not None:
         additional_headers["delta-sharing-capabilities"] = delta_sharing_capabilities
 
-    if content_type is not None:
-        additional_headers["Content-Type"] = content_type
+    additional_headers["Content-Type"] = content_type or "application/json"
+
+    if settings.CACHE_WARMER_WARM_QUERIES and all(v is None for v in query.values()):
+        try:
+            version = await fetch_table_version(share_name, schema_name, table_name)
+            cached = await get_default_table_query(
+                share_name,
+                schema_name,
+                table_name,
+                delta_sharing_capabilities,
+                min_version=version,
+            )
+        except SharingError as e:
+            return ORJSONResponse(e.content, status_code=e.status_code)
+
+        response.headers["delta-table-version"] = str(cached["deltaTableVersion"])
+        if settings.FILE_CACHE_ENABLED:
+            return rewrite_file_urls(cached["content"])
+        return cached["content"]
+
+    limit_hint = query.get("limitHint")
+    if limit_hint is not None and query.get("startingVersion") is None:
+        sharing_res, error = await forward_sharing_request(
+            request,
+            response,
+            response_type="stream",
+            additional_headers=additional_headers,
+            content=content,
+        )
+        if error:
+            return sharing_res
+
+        return StreamingResponse(
+            stream_limited_files(sharing_res, limit_hint),
+            status_code=sharing_res.status_code,
+            headers={
+                "delta-table-version": sharing_res.headers.get("delta-table-version")
+            },
+            media_type=NDJSONResponse.media_type,
+        )
+
+    if not settings.FILE_CACHE_ENABLED:
+        sharing_res, _ = await forward_sharing_request(
+            request,
+            response,
+            response_type="raw",
+            additional_headers=additional_headers,
+            content=content,
+        )
+        return sharing_res
 
     sharing_res, error = await forward_sharing_request(
         request,
         response,
-        body=body,
         response_type="full",
         additional_headers=additional_headers,
+        content=content,
     )
     if error:
         return sharing_res
@@ -361,7 +600,57 @@ async def query_table_data(
         "delta-table-version"
     )
     response.status_code = sharing_res.status_code
-    return sharing_res.content
+    return rewrite_file_urls(sharing_res.content)
+
+
+@router.get(
+    "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/arrow",
+    dependencies=[Depends(HasTablePermissions.raises(True))],
+    response_class=ArrowStreamResponse,
+    response_description=arrow_stream_description,
+    responses=other_common_responses,
+)
+async def query_table_arrow(
+    share_name: Annotated[str, Path(description=share_name_description)],
+    schema_name: Annotated[str, Path(description=schema_name_description)],
+    table_name: Annotated[str, Path(description=table_name_description)],
+    columns: Annotated[
+        list[str] | None, Query(description=arrow_columns_description)
+    ] = None,
+    filter: Annotated[
+        list[str] | None, Query(description=arrow_filter_description)
+    ] = None,
+    limit: Annotated[conint(ge=0), Query(description=arrow_limit_description)] = None,
+    version: Annotated[
+        conint(ge=0), Query(description=arrow_version_description)
+    ] = None,
+):
+    """
+    Read the rows of a table directly, with optional column projection and row
+    filtering, as an Arrow IPC stream. This is meant for consumers which only need a
+    few columns or rows of a table, as only those are sent over the wire.
+    """
+    try:
+        scanner, table_version = await run_in_threadpool(
+            open_table_scanner,
+            share_name,
+            schema_name,
+            table_name,
+            columns,
+            filter,
+            version,
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e)) from e
+    except InvalidQueryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+
+    return ArrowStreamResponse(
+        iter_arrow_stream(scanner.projected_schema, scanner.to_batches(), limit),
+        headers={"delta-table-version": str(table_version)},
+    )
 
 
 @router.get(
@@ -416,14 +705,262 @@ async def query_table_change_data_feed(
                 "includeHistoricalMetadata": includeHistoricalMetadata,
             },
         ),
-        response_type="full",
+        response_type="full" if settings.FILE_CACHE_ENABLED else "raw",
         additional_headers=additional_headers,
     )
-    if error:
+    if error or not settings.FILE_CACHE_ENABLED:
         return sharing_res
 
     response.headers["delta-table-version"] = sharing_res.headers.get(
         "delta-table-version"
     )
     response.status_code = sharing_res.status_code
-    return sharing_res.content
+    return rewrite_file_urls(sharing_res.content)
+
+
+@router.get(
+    "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/changes/compacted",
+    dependencies=[Depends(HasTablePermissions.raises(True))],
+    response_class=ArrowStreamResponse,
+    response_description=compacted_cdf_stream_description,
+    responses=other_common_responses,
+)
+async def query_table_compacted_change_data_feed(
+    share_name: Annotated[str, Path(description=share_name_description)],
+    schema_name: Annotated[str, Path(description=schema_name_description)],
+    table_name: Annotated[str, Path(description=table_name_description)],
+    key: Annotated[list[str], Query(description=compacted_cdf_key_description)],
+    startingVersion: Annotated[
+        conint(ge=0), Query(description=starting_version_description)
+    ] = 0,
+    endingVersion: Annotated[
+        conint(ge=0) | None, Query(description=ending_version_description)
+    ] = None,
+):
+    """
+    Get the change data feed of a table collapsed into the net inserts, updates and
+    deletes of each row over the version range, instead of every intermediate
+    change. This is meant for consumers which sync periodically, as they only need
+    the latest state of each changed row.
+    """
+    try:
+        if endingVersion is None:
+            endingVersion = await fetch_table_version(
+                share_name, schema_name, table_name
+            )
+        changes = await get_compacted_changes(
+            share_name, schema_name, table_name, key, startingVersion, endingVersion
+        )
+    except SharingError as e:
+        return ORJSONResponse(e.content, status_code=e.status_code)
+    except InvalidQueryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        ) from e
+    except HTTPError as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not retrieve the change files from storage",
+        ) from e
+
+    headers = {"delta-table-version": str(endingVersion)}
+    if changes is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+
+    return ArrowStreamResponse(
+        iter_arrow_stream(
+            changes.schema, changes.to_batches(max_chunksize=settings.ARROW_BATCH_SIZE)
+        ),
+        headers=headers,
+    )
+
+
+@router.get(
+    "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/changes/cursor",
+    dependencies=[Depends(HasTablePermissions.raises(True))],
+    response_class=NDJSONResponse,
+    response_description=cdf_cursor_ndjson_description,
+    responses=other_common_responses,
+)
+async def query_table_change_data_feed_since_cursor(
+    share_name: Annotated[str, Path(description=share_name_description)],
+    schema_name: Annotated[str, Path(description=schema_name_description)],
+    table_name: Annotated[str, Path(description=table_name_description)],
+    delta_sharing_capabilities: Annotated[
+        str | None,
+        Header(
+            alias="delta-sharing-capabilities",
+            description=delta_sharing_capabilities_header_description,
+        ),
+    ] = None,
+    startingVersion: Annotated[
+        conint(ge=0), Query(description=cdf_cursor_starting_version_description)
+    ] = 0,
+    includeHistoricalMetadata: Annotated[
+        Optional[bool], Query(description=include_historical_metadata_description)
+    ] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the change data feed of a table since the last call by the same API key.
+    The proxy keeps track of the last version read per API key and table, so that
+    incremental consumers do not need to persist it themselves.
+    """
+    cursor = await get_cursor(db, current_user.id, share_name, schema_name, table_name)
+    if cursor is not None:
+        startingVersion = cursor.version + 1
+
+    try:
+        ending_version = await fetch_table_version(share_name, schema_name, table_name)
+    except SharingError as e:
+        return ORJSONResponse(e.content, status_code=e.status_code)
+
+    headers = {"delta-table-version": str(ending_version)}
+    if startingVersion > ending_version:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+
+    additional_headers = {}
+    if delta_sharing_capabilities is not None:
+        additional_headers["delta-sharing-capabilities"] = delta_sharing_capabilities
+
+    sharing_req = sharing_client.build_request(
+        "GET",
+        get_table_path(share_name, schema_name, table_name, "changes"),
+        params=query_parametrize(
+            {
+                "startingVersion": startingVersion,
+                "endingVersion": ending_version,
+                "includeHistoricalMetadata": includeHistoricalMetadata,
+            }
+        ),
+        headers=get_sharing_headers(additional_headers),
+    )
+    sharing_res = await sharing_client.send(sharing_req, stream=True)
+    if sharing_res.is_error:
+        await sharing_res.aread()
+        await sharing_res.aclose()
+        return ORJSONResponse(
+            get_error_content(sharing_res), status_code=sharing_res.status_code
+        )
+
+    return StreamingResponse(
+        stream_changes_and_advance_cursor(
+            sharing_res,
+            current_user.id,
+            share_name,
+            schema_name,
+            table_name,
+            ending_version,
+        ),
+        status_code=sharing_res.status_code,
+        headers=headers,
+        media_type=NDJSONResponse.media_type,
+    )
+
+
+@router.get(
+    "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/cursor",
+    dependencies=[Depends(HasTablePermissions.raises(True))],
+    response_model=CdfCursor,
+    responses=other_common_responses,
+)
+async def get_table_cursor(
+    share_name: Annotated[str, Path(description=share_name_description)],
+    schema_name: Annotated[str, Path(description=schema_name_description)],
+    table_name: Annotated[str, Path(description=table_name_description)],
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get the change data feed cursor of the current API key on a table."""
+    cursor = await get_cursor(db, current_user.id, share_name, schema_name, table_name)
+    if cursor is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No cursor for table `{share_name}`.`{schema_name}`.`{table_name}`",
+        )
+    return cursor
+
+
+@router.delete(
+    "/shares/{share_name}/schemas/{schema_name}/tables/{table_name}/cursor",
+    dependencies=[Depends(HasTablePermissions.raises(True))],
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses=other_common_responses,
+)
+async def delete_table_cursor(
+    share_name: Annotated[str, Path(description=share_name_description)],
+    schema_name: Annotated[str, Path(description=schema_name_description)],
+    table_name: Annotated[str, Path(description=table_name_description)],
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Reset the change data feed cursor of the current API key on a table, so that
+    the next `changes/cursor` call starts from its `startingVersion` again.
+    """
+    if not await delete_cursor(
+        db, current_user.id, share_name, schema_name, table_name
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No cursor for table `{share_name}`.`{schema_name}`.`{table_name}`",
+        )
+
+
+@router.post(
+    "/shares/{share_name}/batch-query",
+    response_class=NDJSONResponse,
+    response_description=batch_query_ndjson_description,
+    responses=other_common_responses,
+)
+async def batch_query_table_data(
+    share_name: Annotated[str, Path(description=share_name_description)],
+    body: delta_sharing.BatchTableQueryRequest,
+    delta_sharing_capabilities: Annotated[
+        str | None,
+        Header(
+            alias="delta-sharing-capabilities",
+            description=delta_sharing_capabilities_header_description,
+        ),
+    ] = None,
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Query the data of multiple tables in a single request. The tables are queried
+    concurrently, so the total time is close to that of the slowest table instead of
+    the sum of all of them.
+    """
+    denied = [
+        f"`{q.tableSchema}`.`{q.table}`"
+        for q in body.queries
+        if not has_table_access(current_user, q.tableSchema, q.table)
+    ]
+    if denied:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Table(s) not found or access denied: {', '.join(denied)}",
+        )
+
+    additional_headers = {}
+    if delta_sharing_capabilities is not None:
+        additional_headers["delta-sharing-capabilities"] = delta_sharing_capabilities
+
+    return StreamingResponse(
+        merge_streams(
+            [
+                partial(
+                    stream_batch_table_query,
+                    current_user.id,
+                    share_name,
+                    q.tableSchema,
+                    q.table,
+                    q.query.model_dump(mode="json", exclude_none=True),
+                    additional_headers,
+                )
+                for q in body.queries
+            ],
+            concurrency=settings.BATCH_QUERY_CONCURRENCY,
+        ),
+        media_type=NDJSONResponse.media_type,
+    )
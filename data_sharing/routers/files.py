@@ -0,0 +1,72 @@
+import os
+from typing import Annotated
+
+import httpx
+from fastapi import APIRouter, Header, HTTPException, Path, status
+from fastapi.responses import Response
+
+from data_sharing.annotations.delta_sharing import file_token_description
+from data_sharing.internal.files import (
+    InvalidFileTokenError,
+    file_cache,
+    read_file_token,
+)
+from data_sharing.settings import settings
+from data_sharing.utils.header import parse_range_header
+from data_sharing.utils.responses import RangeFileResponse
+
+router = APIRouter(
+    prefix="/files",
+    tags=["delta_sharing"],
+)
+
+
+@router.api_route("/{token}", methods=["GET", "HEAD"], response_class=Response)
+async def get_file(
+    token: Annotated[str, Path(description=file_token_description)],
+    range_header: Annotated[str | None, Header(alias="Range")] = None,
+):
+    """
+    Download a data file returned by a table query when the proxy file cache is
+    enabled. The file is served from the local cache of the proxy, and supports
+    `Range` requests.
+    """
+    if not settings.FILE_CACHE_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    try:
+        url = read_file_token(token)
+    except (InvalidFileTokenError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e)) from e
+
+    try:
+        path = await file_cache.get(url)
+    except (httpx.HTTPError, OSError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not retrieve the file from storage",
+        ) from e
+
+    # Open right away, so the file stays readable even if it is evicted meanwhile
+    file = open(path, "rb")
+    size = os.fstat(file.fileno()).st_size
+    try:
+        byte_range = parse_range_header(range_header, size)
+    except ValueError as e:
+        file.close()
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"content-range": f"bytes */{size}"},
+        ) from e
+
+    if byte_range is None:
+        return RangeFileResponse(file, 0, size - 1)
+
+    start, end = byte_range
+    return RangeFileResponse(
+        file,
+        start,
+        end,
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        headers={"content-range": f"bytes {start}-{end}/{size}"},
+    )
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Security
+
+from data_sharing.internal.metrics import collect
+from data_sharing.permissions import IsAdmin, IsAuthenticated
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["core"],
+    dependencies=[
+        Security(IsAuthenticated.raises(True)),
+        Security(IsAdmin.raises(True)),
+    ],
+)
+
+
+@router.get("")
+async def get_metrics():
+    """Get a snapshot of the internal metrics of this proxy instance."""
+    return collect()
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, Security
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from data_sharing.db import get_async_db
+from data_sharing.db import get_async_read_db
 from data_sharing.models import Role, Schema
 from data_sharing.permissions import IsAdmin
 from data_sharing.schemas.api_key import Role as RoleSchema, Schema as SchemaSchema
@@ -15,11 +15,11 @@ router = APIRouter(
 
 
 @router.get("", response_model=list[RoleSchema])
-async def list_roles(db: AsyncSession = Depends(get_async_db)):
+async def list_roles(db: AsyncSession = Depends(get_async_read_db)):
     return await db.scalars(select(Role).order_by(Role.id))
 
 
 @router.get("/schemas", response_model=list[SchemaSchema])
-async def list_schemas(db: AsyncSession = Depends(get_async_db)):
+async def list_schemas(db: AsyncSession = Depends(get_async_read_db)):
     """List all available schemas"""
     return await db.scalars(select(Schema).order_by(Schema.id))
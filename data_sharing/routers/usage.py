@@ -0,0 +1,83 @@
+from datetime import UTC, datetime, timedelta
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, Query, Security
+from pydantic import UUID4, AwareDatetime
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from data_sharing.annotations.usage import UsageDescriptions
+from data_sharing.db import get_async_read_db
+from data_sharing.models import ApiKeyUsage
+from data_sharing.permissions import IsAdmin, IsAuthenticated
+from data_sharing.schemas.usage import UsageRollup
+
+router = APIRouter(
+    prefix="/usage",
+    tags=["usage"],
+    dependencies=[
+        Security(IsAuthenticated.raises(True)),
+        Security(IsAdmin.raises(True)),
+    ],
+)
+
+
+@router.get("", response_model=list[UsageRollup])
+async def get_usage(
+    start: Annotated[
+        AwareDatetime | None, Query(description=UsageDescriptions.start)
+    ] = None,
+    end: Annotated[
+        AwareDatetime | None, Query(description=UsageDescriptions.end)
+    ] = None,
+    granularity: Annotated[
+        Literal["hour", "day", "month"],
+        Query(description=UsageDescriptions.granularity),
+    ] = "day",
+    apiKeyId: Annotated[
+        UUID4 | None, Query(description=UsageDescriptions.api_key_filter)
+    ] = None,
+    schema: Annotated[
+        str | None, Query(description=UsageDescriptions.schema_filter)
+    ] = None,
+    table: Annotated[
+        str | None, Query(description=UsageDescriptions.table_filter)
+    ] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Get the requests, files and bytes served per API key and table, rolled up per
+    hour, day or month, newest first. Usage is flushed periodically, so the last
+    minute or so may not be included yet.
+    """
+    end = end or datetime.now(UTC)
+    start = start or end - timedelta(days=30)
+    period = func.date_trunc(granularity, ApiKeyUsage.hour, "UTC").label("period")
+    query = (
+        select(
+            period,
+            ApiKeyUsage.api_key_id,
+            ApiKeyUsage.share_name,
+            ApiKeyUsage.schema_name,
+            ApiKeyUsage.table_name,
+            func.sum(ApiKeyUsage.requests).label("requests"),
+            func.sum(ApiKeyUsage.files).label("files"),
+            func.sum(ApiKeyUsage.bytes).label("bytes"),
+        )
+        .where(ApiKeyUsage.hour >= start, ApiKeyUsage.hour < end)
+        .group_by(
+            period,
+            ApiKeyUsage.api_key_id,
+            ApiKeyUsage.share_name,
+            ApiKeyUsage.schema_name,
+            ApiKeyUsage.table_name,
+        )
+        .order_by(period.desc(), func.sum(ApiKeyUsage.bytes).desc())
+    )
+    if apiKeyId is not None:
+        query = query.where(ApiKeyUsage.api_key_id == apiKeyId)
+    if schema is not None:
+        query = query.where(ApiKeyUsage.schema_name == schema)
+    if table is not None:
+        query = query.where(ApiKeyUsage.table_name == table)
+    return (await db.execute(query)).mappings().all()
@@ -1,6 +1,7 @@
 from pydantic import UUID4, AwareDatetime, BaseModel, Field, conint, constr
 
 from data_sharing.annotations.api_key import ApiKeyDescriptions
+from data_sharing.settings import settings
 
 
 class Schema(BaseModel):
@@ -18,6 +19,10 @@ class SafeApiKey(BaseModel):
     created: AwareDatetime
     description: str = Field(None)
     expiration: AwareDatetime | None
+    last_used_at: AwareDatetime | None = Field(
+        None, description=ApiKeyDescriptions.last_used_at
+    )
+    request_count: int = Field(0, description=ApiKeyDescriptions.request_count)
     roles: list[Role]
     schemas: list[Schema]
 
@@ -39,6 +44,29 @@ class CreateApiKeyRequest(BaseModel):
         from_attributes = True
 
 
+class BulkCreateApiKeyRequest(BaseModel):
+    keys: list[CreateApiKeyRequest] = Field(
+        min_length=1,
+        max_length=settings.BULK_API_KEY_MAX_KEYS,
+        description=ApiKeyDescriptions.bulk_keys,
+    )
+
+
+class BulkGrantRequest(BaseModel):
+    api_key_ids: list[UUID4] = Field(
+        min_length=1,
+        max_length=settings.BULK_API_KEY_MAX_KEYS,
+        description=ApiKeyDescriptions.bulk_api_key_ids,
+    )
+    roles: list[str] = Field(default=[], description=ApiKeyDescriptions.bulk_roles)
+    schemas: list[str] = Field(default=[], description=ApiKeyDescriptions.bulk_schemas)
+
+
+class BulkGrantResponse(BaseModel):
+    roles: int = Field(description=ApiKeyDescriptions.bulk_roles_changed)
+    schemas: int = Field(description=ApiKeyDescriptions.bulk_schemas_changed)
+
+
 class UpdateApiKeyRequest(BaseModel):
     schemas: list[str] = Field(default=[], description="List of schemas to grant access to")
     roles: list[str] = Field(default=[], description="List of roles (countries) to grant access to")
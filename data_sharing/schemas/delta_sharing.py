@@ -1,10 +1,12 @@
 from datetime import datetime
-from typing import Generic, TypeVar
+from typing import Any, Generic, TypeVar
 
 from pydantic import UUID4, AnyHttpUrl, BaseModel, Field, conint
 
 from data_sharing.annotations.delta_sharing import (
     ProfileFileDescriptions,
+    cdf_cursor_version_description,
+    statistics_files_without_stats_description,
     table_version_description,
 )
 from data_sharing.settings import settings
@@ -45,6 +47,31 @@ class TableVersion(BaseModel):
     )
 
 
+class ColumnStatistics(BaseModel):
+    nullCount: int | None = Field(None)
+    min: Any = Field(None)
+    max: Any = Field(None)
+
+
+class Statistics(BaseModel):
+    numFiles: conint(ge=0)
+    numFilesWithoutStats: conint(ge=0) = Field(
+        description=statistics_files_without_stats_description
+    )
+    numRecords: conint(ge=0)
+    size: conint(ge=0)
+    columns: dict[str, ColumnStatistics]
+
+
+class PartitionStatistics(Statistics):
+    partitionValues: dict[str, str | None]
+
+
+class TableStatistics(Statistics):
+    deltaTableVersion: conint(ge=0) = Field(description=table_version_description)
+    partitions: list[PartitionStatistics] | None = Field(None)
+
+
 class ProfileFile(BaseModel):
     shareCredentialsVersion: conint(ge=1) = Field(
         1, description=ProfileFileDescriptions.share_credentials_version
@@ -74,6 +101,39 @@ class TableQueryRequest(BaseModel):
     }
 
 
+class BatchTableQuery(BaseModel):
+    tableSchema: str = Field(alias="schema")
+    table: str
+    query: TableQueryRequest = Field(default_factory=TableQueryRequest)
+
+
+class BatchTableQueryRequest(BaseModel):
+    queries: list[BatchTableQuery] = Field(
+        min_length=1, max_length=settings.BATCH_QUERY_MAX_TABLES
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "queries": [
+                        {"schema": "school-master", "table": "BRA", "query": {}},
+                        {"schema": "school-master", "table": "PHL", "query": {}},
+                    ]
+                }
+            ],
+        }
+    }
+
+
+class CdfCursor(BaseModel):
+    version: conint(ge=0) = Field(description=cdf_cursor_version_description)
+    updated: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class Error(BaseModel):
     errorCode: str
     message: str
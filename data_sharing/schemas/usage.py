@@ -0,0 +1,14 @@
+from pydantic import UUID4, AwareDatetime, BaseModel, Field
+
+from data_sharing.annotations.usage import UsageDescriptions
+
+
+class UsageRollup(BaseModel):
+    period: AwareDatetime = Field(description=UsageDescriptions.period)
+    api_key_id: UUID4 = Field(description=UsageDescriptions.api_key_id)
+    share_name: str
+    schema_name: str
+    table_name: str
+    requests: int = Field(description=UsageDescriptions.requests)
+    files: int = Field(description=UsageDescriptions.files)
+    bytes: int = Field(description=UsageDescriptions.bytes)
@@ -1,3 +1,4 @@
+import os
 from functools import lru_cache
 from pathlib import Path
 from typing import Literal
@@ -22,14 +23,84 @@ class Settings(BaseSettings):
     CONTAINER_NAME: str
     CONTAINER_PATH: str
     DELTA_SHARING_HOST: str
+    # Catalog of the Delta Sharing server, read by the proxy for direct table reads;
+    # point it to the same ConfigMap as the server when it is mounted from one
+    DELTA_SHARING_CONFIG_PATH: Path = (
+        Path(__file__).parent.parent / "conf-template" / "delta-sharing-server.yaml"
+    )
+    # Blue and green Delta Sharing servers for hot catalog reloads, including
+    # `DELTA_SHARING_HOST`, e.g. ["delta:8890", "delta:8891"]
+    DELTA_SHARING_HOSTS: list[str] = []
     POSTGRESQL_USERNAME: str
     POSTGRESQL_PASSWORD: str
     POSTGRESQL_DATABASE: str
     DB_HOST: str
+    # Optional read replica for read-only sessions, e.g. listings. API keys are always
+    # authenticated against the primary, so that revocations apply right away
+    DB_READ_REPLICA_HOST: str = ""
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 30 * 60
+    DB_POOL_PRE_PING: bool = True
+    # Per-connection cache of asyncpg prepared statements; set to 0 behind PgBouncer
+    # in transaction pooling mode
+    DB_STATEMENT_CACHE_SIZE: int = 500
     INGRESS_HOST: str
     ADMIN_API_KEY: UUID4
     SENTRY_DSN: str = ""
     COMMIT_SHA: str = ""
+    BATCH_QUERY_MAX_TABLES: int = 100
+    BATCH_QUERY_CONCURRENCY: int = 8
+    METADATA_CACHE_MAX_SIZE: int = 2048
+    METADATA_CACHE_TTL_SECONDS: int = 60
+    QUERY_CACHE_MAX_SIZE: int = 128
+    # Must stay well below `preSignedUrlTimeoutSeconds` of the sharing server, as the
+    # cached responses contain pre-signed URLs
+    QUERY_CACHE_TTL_SECONDS: int = 900
+    STATS_CACHE_MAX_SIZE: int = 512
+    STATS_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    CACHE_WARMER_ENABLED: bool = True
+    CACHE_WARMER_INTERVAL_SECONDS: int = 30
+    CACHE_WARMER_HALF_LIFE_SECONDS: int = 6 * 60 * 60
+    CACHE_WARMER_TOP_N: int = 20
+    CACHE_WARMER_CONCURRENCY: int = 4
+    CACHE_WARMER_WARM_QUERIES: bool = False
+    ARROW_BATCH_SIZE: int = 64 * 1024
+    FILE_CACHE_ENABLED: bool = False
+    FILE_CACHE_DIR: Path = Path("/tmp/giga-data-sharing/files")
+    FILE_CACHE_MAX_BYTES: int = 10 * 1024**3
+    FILE_CACHE_URL_TTL_SECONDS: int = 3600
+    COMPACTED_CDF_CACHE_MAX_SIZE: int = 16
+    # Bound on the Arrow buffers of the cached results; larger results are not cached
+    COMPACTED_CDF_CACHE_MAX_BYTES: int = 1024**3
+    COMPACTED_CDF_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    COMPACTED_CDF_CONCURRENCY: int = 8
+    TRUSTED_UPSTREAM_LISTINGS: bool = True
+    LISTING_SELF_CHECK_SAMPLE_SIZE: int = 50
+    KEY_HASH_WORKERS: int = os.cpu_count() or 1
+    BULK_API_KEY_MAX_KEYS: int = 1000
+    LAST_USED_FLUSH_INTERVAL_SECONDS: int = 60
+    LAST_USED_FLUSH_BATCH_SIZE: int = 1000
+    USAGE_METERING_ENABLED: bool = True
+    USAGE_FLUSH_INTERVAL_SECONDS: int = 60
+    USAGE_FLUSH_BATCH_SIZE: int = 1000
+    EXPIRED_KEY_SWEEPER_ENABLED: bool = True
+    EXPIRED_KEY_SWEEPER_INTERVAL_SECONDS: int = 60 * 60
+    EXPIRED_KEY_SWEEPER_BATCH_SIZE: int = 500
+    # Expired keys are kept this long, e.g. so that they can still be listed
+    EXPIRED_KEY_GRACE_PERIOD_DAYS: int = 30
+    AUDIT_LOG_ENABLED: bool = True
+    AUDIT_LOG_QUEUE_SIZE: int = 10_000
+    AUDIT_LOG_BATCH_SIZE: int = 500
+    AUDIT_LOG_FLUSH_INTERVAL_SECONDS: int = 5
+    # Which event to drop when the queue is full, e.g. while the database is down
+    AUDIT_LOG_OVERFLOW_POLICY: Literal["drop_newest", "drop_oldest"] = "drop_oldest"
+    AUDIT_LOG_SHUTDOWN_TIMEOUT_SECONDS: int = 10
+    UPSTREAM_CHECK_INTERVAL_SECONDS: int = 5
+    # Consecutive probes needed before a Delta Sharing server counts as up or down
+    UPSTREAM_HEALTH_THRESHOLD: int = 2
+    UPSTREAM_WARM_TIMEOUT_SECONDS: int = 120
 
     @property
     def IN_PRODUCTION(self) -> bool:
@@ -43,6 +114,12 @@ class Settings(BaseSettings):
     def ASYNC_DATABASE_URL(self) -> str:
         return f"postgresql+asyncpg://{self.POSTGRESQL_USERNAME}:{self.POSTGRESQL_PASSWORD}@{self.DB_HOST}:5432/{self.POSTGRESQL_DATABASE}"
 
+    @property
+    def ASYNC_READ_REPLICA_DATABASE_URL(self) -> str:
+        if not self.DB_READ_REPLICA_HOST:
+            return self.ASYNC_DATABASE_URL
+        return f"postgresql+asyncpg://{self.POSTGRESQL_USERNAME}:{self.POSTGRESQL_PASSWORD}@{self.DB_READ_REPLICA_HOST}:5432/{self.POSTGRESQL_DATABASE}"
+
 
 @lru_cache
 def get_settings():
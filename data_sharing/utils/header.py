@@ -12,3 +12,70 @@ def parse_capabilities_header(header: str | None) -> dict[str, str]:
 
 def create_capabilities_header(header: dict[str, str]) -> str:
     return ",".join([f"{key}={value}" for key, value in header.items()])
+
+
+# The capabilities understood by the Delta Sharing server, with their known values.
+# Other capabilities and values have no effect on the response.
+KNOWN_CAPABILITIES: dict[str, frozenset[str]] = {
+    "responseformat": frozenset({"parquet", "delta"}),
+    "readerfeatures": frozenset(
+        {
+            "columnmapping",
+            "deletionvectors",
+            "timestampntz",
+            "typewidening",
+            "typewidening-preview",
+            "v2checkpoint",
+            "vacuumprotocolcheck",
+            "varianttype",
+            "varianttype-preview",
+        }
+    ),
+    "includeendstreamaction": frozenset({"true", "false"}),
+}
+
+
+def normalize_capabilities_header(header: str | None) -> str | None:
+    """
+    Reduce a `delta-sharing-capabilities` header to the known capabilities and
+    values, lowercased and sorted, so that equivalent headers are equal. Malformed
+    entries are dropped. Returns `None` if no known capability is left.
+    """
+    if header is None:
+        return None
+
+    normalized = {}
+    for split in header.split(";"):
+        key, sep, value = split.partition("=")
+        key = key.strip().lower()
+        if not sep or key not in KNOWN_CAPABILITIES:
+            continue
+        values = {v.strip().lower() for v in value.split(",")}
+        values &= KNOWN_CAPABILITIES[key]
+        if values:
+            normalized[key] = ",".join(sorted(values))
+    if not normalized:
+        return None
+    return ";".join(f"{key}={normalized[key]}" for key in sorted(normalized))
+
+
+def parse_range_header(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single-range `Range` header into an inclusive (start, end) byte range.
+    Returns `None` if the whole file should be sent, which is also what is done for
+    multiple ranges. Raises `ValueError` if the range cannot be satisfied.
+    """
+    if header is None or not header.startswith("bytes=") or "," in header:
+        return None
+
+    start, _, end = header.removeprefix("bytes=").strip().partition("-")
+    if start == "":
+        if end == "" or int(end) == 0:
+            raise ValueError(header)
+        return max(size - int(end), 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
@@ -1,5 +1,85 @@
-from fastapi.responses import Response
+from typing import BinaryIO
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 
 
 class NDJSONResponse(Response):
     media_type = "application/x-ndjson"
+
+
+class ArrowStreamResponse(StreamingResponse):
+    media_type = "application/vnd.apache.arrow.stream"
+
+
+class RangeFileResponse(Response):
+    """
+    Send (part of) an open file. The file is sent with `sendfile` through the ASGI
+    `http.response.zerocopy` extension if the server supports it, and read in chunks
+    otherwise, as under uvicorn, which does not offer the extension.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        start: int,
+        end: int,
+        status_code: int = 200,
+        headers: dict[str, str] = None,
+        media_type: str = "application/octet-stream",
+    ):
+        self.file = file
+        self.start = start
+        self.length = end - start + 1
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(
+            {
+                **(headers or {}),
+                "accept-ranges": "bytes",
+                "content-length": str(self.length),
+            }
+        )
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if scope["method"] == "HEAD" or self.length == 0:
+                await send({"type": "http.response.body", "body": b""})
+            elif "http.response.zerocopy" in scope.get("extensions", {}):
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": self.file,
+                        "offset": self.start,
+                        "count": self.length,
+                    }
+                )
+            else:
+                await run_in_threadpool(self.file.seek, self.start)
+                remaining = self.length
+                while remaining > 0:
+                    chunk = await run_in_threadpool(
+                        self.file.read, min(self.chunk_size, remaining)
+                    )
+                    remaining -= len(chunk)
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": remaining > 0 and len(chunk) > 0,
+                        }
+                    )
+                    if not chunk:
+                        break
+        finally:
+            self.file.close()
@@ -0,0 +1,69 @@
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+
+_DONE = object()
+
+
+async def iter_ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Re-split an arbitrarily chunked byte stream into NDJSON lines, without the
+    trailing newline. Blank lines are dropped.
+    """
+    # Parts of the current line, so a long line is joined once instead of being
+    # copied again with every chunk
+    partial: list[bytes] = []
+    async for chunk in chunks:
+        if b"\n" not in chunk:
+            partial.append(chunk)
+            continue
+        first, *lines, rest = chunk.split(b"\n")
+        partial.append(first)
+        line = b"".join(partial)
+        if line.strip():
+            yield line
+        for line in lines:
+            if line.strip():
+                yield line
+        partial = [rest]
+    line = b"".join(partial)
+    if line.strip():
+        yield line
+
+
+async def merge_streams(
+    factories: Iterable[Callable[[], AsyncIterator[bytes]]],
+    concurrency: int,
+    queue_size: int = 256,
+) -> AsyncIterator[bytes]:
+    """
+    Run the given stream factories concurrently, at most `concurrency` at a time,
+    and yield their chunks as soon as they are produced. Ordering is only
+    preserved within a single stream.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def produce(factory: Callable[[], AsyncIterator[bytes]]):
+        try:
+            async with semaphore:
+                async for chunk in factory():
+                    await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(produce(factory)) for factory in factories]
+    pending = len(tasks)
+    try:
+        while pending > 0:
+            item = await queue.get()
+            if item is _DONE:
+                pending -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
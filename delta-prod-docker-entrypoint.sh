@@ -6,10 +6,121 @@ sed -e "s|{{.STORAGE_ACCESS_KEY}}|$STORAGE_ACCESS_KEY|" \
     -e "s|{{.STORAGE_ACCOUNT_NAME}}|$STORAGE_ACCOUNT_NAME|" \
     -i conf/core-site.xml
 
-sed -e "s!{{.DELTA_BEARER_TOKEN}}!$DELTA_BEARER_TOKEN!" \
-    -e "s|{{.STORAGE_ACCOUNT_NAME}}|$STORAGE_ACCOUNT_NAME|" \
-    -e "s|{{.CONTAINER_NAME}}|$CONTAINER_NAME|" \
-    -e "s|{{.CONTAINER_PATH}}|$CONTAINER_PATH|" \
-    -i conf/delta-sharing-server.yaml
+template_config() {
+  sed -e "s!{{.DELTA_BEARER_TOKEN}}!$DELTA_BEARER_TOKEN!" \
+      -e "s|{{.STORAGE_ACCOUNT_NAME}}|$STORAGE_ACCOUNT_NAME|" \
+      -e "s|{{.CONTAINER_NAME}}|$CONTAINER_NAME|" \
+      -e "s|{{.CONTAINER_PATH}}|$CONTAINER_PATH|" \
+      "$@"
+}
+
+if [[ "${DELTA_RELOAD_MODE:-restart}" != "blue-green" ]]; then
+  template_config -i conf/delta-sharing-server.yaml
+  ./bin/delta-sharing-server -- --config ./conf/delta-sharing-server.yaml
+  exit
+fi
+
+# Blue/green mode: whenever the config template changes, start a second server with
+# the new config on the other port. Once it is healthy, the proxy warms it and sends
+# new requests to it, and the old server is stopped after the drain period.
+set +x
+
+CONFIG_TEMPLATE="${DELTA_CONFIG_TEMPLATE:-./conf/delta-sharing-server.yaml}"
+PORTS=("${DELTA_BLUE_PORT:-8890}" "${DELTA_GREEN_PORT:-8891}")
+POLL_SECONDS="${DELTA_RELOAD_POLL_SECONDS:-30}"
+START_TIMEOUT_SECONDS="${DELTA_RELOAD_START_TIMEOUT_SECONDS:-300}"
+# Must cover the proxy's health checks, warm-up and longest requests
+DRAIN_SECONDS="${DELTA_RELOAD_DRAIN_SECONDS:-450}"
+
+declare -A pids
+
+start_server() {
+  local port=$1
+  echo "Starting Delta Sharing server on port $port"
+  template_config -e "s|^port: .*|port: $port|" "$CONFIG_TEMPLATE" \
+    >"conf/delta-sharing-server-$port.yaml"
+  ./bin/delta-sharing-server -- --config "./conf/delta-sharing-server-$port.yaml" &
+  pids[$port]=$!
+}
+
+stop_server() {
+  local port=$1
+  echo "Stopping Delta Sharing server on port $port"
+  kill -TERM "${pids[$port]}" 2>/dev/null || true
+  wait "${pids[$port]}" || true
+  unset "pids[$port]"
+}
+
+is_running() {
+  kill -0 "${pids[$1]}" 2>/dev/null
+}
+
+is_healthy() {
+  wget -q --spider \
+    --header "Authorization: Bearer $DELTA_BEARER_TOKEN" \
+    "http://localhost:$1/sharing/shares" 2>/dev/null
+}
+
+wait_healthy() {
+  local port=$1
+  local deadline=$((SECONDS + START_TIMEOUT_SECONDS))
+  while ((SECONDS < deadline)); do
+    is_running "$port" || return 1
+    is_healthy "$port" && return 0
+    sleep 2
+  done
+  return 1
+}
+
+shutdown() {
+  for port in "${!pids[@]}"; do
+    stop_server "$port"
+  done
+  exit 0
+}
+
+trap shutdown TERM INT
+
+config_checksum() {
+  md5sum "$CONFIG_TEMPLATE" | cut -d " " -f 1
+}
+
+active=0
+checksum=$(config_checksum)
+start_server "${PORTS[$active]}"
+if ! wait_healthy "${PORTS[$active]}"; then
+  echo "Delta Sharing server on port ${PORTS[$active]} did not become healthy"
+  exit 1
+fi
+
+while true; do
+  # Sleep in the background, so that the trap runs as soon as a signal arrives
+  sleep "$POLL_SECONDS" &
+  wait $!
+
+  if ! is_running "${PORTS[$active]}"; then
+    echo "Delta Sharing server on port ${PORTS[$active]} exited"
+    exit 1
+  fi
+
+  new_checksum=$(config_checksum)
+  if [[ "$new_checksum" == "$checksum" ]]; then
+    continue
+  fi
+  checksum=$new_checksum
+
+  standby=$((1 - active))
+  start_server "${PORTS[$standby]}"
+  if ! wait_healthy "${PORTS[$standby]}"; then
+    echo "Delta Sharing server on port ${PORTS[$standby]} did not become healthy," \
+      "keeping port ${PORTS[$active]}"
+    stop_server "${PORTS[$standby]}"
+    continue
+  fi
 
-./bin/delta-sharing-server -- --config ./conf/delta-sharing-server.yaml
+  echo "Draining Delta Sharing server on port ${PORTS[$active]} for ${DRAIN_SECONDS}s"
+  sleep "$DRAIN_SECONDS" &
+  wait $!
+  stop_server "${PORTS[$active]}"
+  active=$standby
+done
@@ -0,0 +1,184 @@
+"""
+Benchmark API key lookups and cascade deletes on the ACL association tables, with
+and without the primary keys and reverse indexes added by the
+`add_association_primary_keys` migration.
+
+Runs against the configured database in a scratch `acl_benchmark` schema, which is
+dropped afterwards, so existing data is not touched.
+
+    python -m scripts.benchmark_acl_tables --keys 100000
+
+With the defaults on a local PostgreSQL 16.2, the migration takes about 2s and the
+operations go from (ms/op, before -> after):
+
+    lookup                   38-39 -> 0.3
+    revoke_api_key cascade   36-43 -> 0.2-0.3
+    delete role cascade      28-31 -> 2.9-3.4
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from loguru import logger
+from sqlalchemy import Connection, create_engine, text
+
+from data_sharing.settings import settings
+
+SCHEMA = "acl_benchmark"
+
+CREATE_TABLES = """
+CREATE TABLE api_keys (id uuid PRIMARY KEY, secret varchar NOT NULL);
+CREATE TABLE roles (id varchar(5) PRIMARY KEY);
+CREATE TABLE schemas (id varchar(50) PRIMARY KEY);
+CREATE TABLE apikey_role_association_table (
+    api_key_id uuid NOT NULL REFERENCES api_keys (id) ON DELETE CASCADE,
+    role_id varchar(5) NOT NULL REFERENCES roles (id) ON DELETE CASCADE
+);
+CREATE TABLE apikey_schema_association_table (
+    api_key_id uuid NOT NULL REFERENCES api_keys (id) ON DELETE CASCADE,
+    schema_id varchar(50) NOT NULL REFERENCES schemas (id) ON DELETE CASCADE
+);
+CREATE TABLE schema_role_association_table (
+    schema_id varchar(50) NOT NULL REFERENCES schemas (id) ON DELETE CASCADE,
+    role_id varchar(5) NOT NULL REFERENCES roles (id) ON DELETE CASCADE
+);
+"""
+
+POPULATE = """
+INSERT INTO roles SELECT 'R' || i FROM generate_series(1, :roles) i;
+INSERT INTO schemas SELECT 'schema-' || i FROM generate_series(1, :schemas) i;
+INSERT INTO api_keys SELECT gen_random_uuid(), md5(random()::text)
+    FROM generate_series(1, :keys);
+INSERT INTO apikey_role_association_table
+    SELECT k.id, 'R' || (1 + (abs(hashtext(k.id::text || r)) % :roles))
+    FROM api_keys k, generate_series(1, :roles_per_key) r;
+INSERT INTO apikey_schema_association_table
+    SELECT k.id, 'schema-' || (1 + (abs(hashtext(k.id::text || s)) % :schemas))
+    FROM api_keys k, generate_series(1, :schemas_per_key) s;
+INSERT INTO schema_role_association_table SELECT s.id, r.id FROM schemas s, roles r;
+-- Duplicate grants, as accumulated without a unique constraint
+INSERT INTO apikey_role_association_table
+    SELECT * FROM apikey_role_association_table TABLESAMPLE BERNOULLI (1);
+"""
+
+# Same as the `add_association_primary_keys` migration
+ASSOCIATION_TABLES = [
+    ("apikey_role_association_table", ("api_key_id", "role_id")),
+    ("apikey_schema_association_table", ("api_key_id", "schema_id")),
+    ("schema_role_association_table", ("schema_id", "role_id")),
+]
+
+LOOKUP = text(
+    """
+    SELECT k.id, k.secret,
+        (SELECT array_agg(role_id) FROM apikey_role_association_table
+            WHERE api_key_id = k.id) AS role_ids,
+        (SELECT array_agg(schema_id) FROM apikey_schema_association_table
+            WHERE api_key_id = k.id) AS schema_ids
+    FROM api_keys k WHERE k.id = :id
+    """
+)
+
+
+def add_constraints(conn: Connection):
+    for table, (left, right) in ASSOCIATION_TABLES:
+        conn.execute(
+            text(
+                f"DELETE FROM {table} a USING {table} b"
+                f" WHERE a.ctid < b.ctid AND a.{left} = b.{left} AND a.{right} = b.{right}"
+            )
+        )
+        conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY ({left}, {right})"))
+        conn.execute(text(f"CREATE INDEX ON {table} ({right})"))
+    conn.execute(text("ANALYZE"))
+
+
+def timed(name: str, fn: Callable[[], int]):
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    logger.info(f"  {name:<24} {elapsed / count * 1000:10.3f} ms/op ({count} ops)")
+
+
+def run_benchmarks(conn: Connection, samples: int, offset: int):
+    key_ids = conn.scalars(
+        text("SELECT id FROM api_keys ORDER BY id OFFSET :offset LIMIT :limit"),
+        {"offset": offset, "limit": samples * 2},
+    ).all()
+    lookup_ids, delete_ids = key_ids[:samples], key_ids[samples:]
+
+    def lookup():
+        for key_id in lookup_ids:
+            conn.execute(LOOKUP, {"id": key_id}).one()
+        return len(lookup_ids)
+
+    def revoke_api_key():
+        for key_id in delete_ids:
+            conn.execute(text("DELETE FROM api_keys WHERE id = :id"), {"id": key_id})
+        return len(delete_ids)
+
+    def delete_roles():
+        roles = conn.scalars(text("SELECT id FROM roles ORDER BY id LIMIT 5")).all()
+        for role in roles:
+            conn.execute(text("DELETE FROM roles WHERE id = :id"), {"id": role})
+        return len(roles)
+
+    timed("lookup", lookup)
+    timed("revoke_api_key cascade", revoke_api_key)
+    timed("delete role cascade", delete_roles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--roles", type=int, default=250)
+    parser.add_argument("--schemas", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        try:
+            conn.execute(text(CREATE_TABLES))
+            start = time.perf_counter()
+            for statement in filter(str.strip, POPULATE.split(";")):
+                conn.execute(
+                    text(statement),
+                    {
+                        "keys": args.keys,
+                        "roles": args.roles,
+                        "schemas": args.schemas,
+                        "roles_per_key": 3,
+                        "schemas_per_key": 2,
+                    },
+                )
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+            logger.info(
+                f"Populated {args.keys} keys in {time.perf_counter() - start:.1f}s"
+            )
+
+            logger.info("Without primary keys and reverse indexes")
+            run_benchmarks(conn, args.samples, offset=0)
+            conn.commit()
+
+            start = time.perf_counter()
+            add_constraints(conn)
+            conn.commit()
+            logger.info(f"Migrated in {time.perf_counter() - start:.1f}s")
+
+            logger.info("With primary keys and reverse indexes")
+            run_benchmarks(conn, args.samples, offset=args.samples * 2)
+            conn.commit()
+        finally:
+            conn.rollback()
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            conn.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Compare parsing a synthetic `/query` response with the streaming action parser
+against naive `json.loads` of the whole body and Pydantic validation.
+
+    python -m scripts.benchmark_action_parser --lines 100000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from collections.abc import AsyncIterator, Callable
+from uuid import uuid4
+
+import orjson
+from loguru import logger
+
+from data_sharing.internal.actions import File, parse_actions, serialize_actions
+from data_sharing.schemas import parquet
+
+CHUNK_SIZE = 64 * 1024
+
+
+def generate_body(num_lines: int) -> bytes:
+    lines = [
+        orjson.dumps({"protocol": {"minReaderVersion": 1}}),
+        orjson.dumps(
+            {
+                "metaData": {
+                    "id": str(uuid4()),
+                    "format": {"provider": "parquet"},
+                    "schemaString": '{"type":"struct","fields":[]}',
+                    "partitionColumns": ["country"],
+                }
+            }
+        ),
+    ]
+    for i in range(num_lines):
+        stats = {
+            "numRecords": 1000 + i % 100,
+            "minValues": {"school_id_giga": f"{i:08x}", "latitude": -10.5},
+            "maxValues": {"school_id_giga": f"{i + 999:08x}", "latitude": 10.5},
+            "nullCount": {"school_id_giga": 0, "latitude": i % 3},
+        }
+        lines.append(
+            orjson.dumps(
+                {
+                    "file": {
+                        "id": f"{i:032x}",
+                        "url": (
+                            "https://storage.blob.core.windows.net/container/"
+                            f"school-master/country=BRA/part-{i:05d}.snappy.parquet"
+                            "?sv=2023-01-03&se=2030-01-01T00%3A00%3A00Z&sig=abc"
+                        ),
+                        "partitionValues": {"country": "BRA"},
+                        "size": 123456 + i,
+                        "stats": orjson.dumps(stats).decode(),
+                        "expirationTimestamp": 1893456000000,
+                    }
+                }
+            )
+        )
+    return b"\n".join(lines) + b"\n"
+
+
+async def iter_chunks(body: bytes) -> AsyncIterator[bytes]:
+    view = memoryview(body)
+    for i in range(0, len(body), CHUNK_SIZE):
+        yield bytes(view[i : i + CHUNK_SIZE])
+
+
+def naive_json(body: bytes) -> int:
+    objects = [json.loads(line) for line in body.decode().splitlines()]
+    return sum(1 for obj in objects if "file" in obj)
+
+
+def pydantic(body: bytes) -> int:
+    files = [
+        parquet.File.model_validate(orjson.loads(line)["file"])
+        for line in body.splitlines()
+        if line.startswith(b'{"file"')
+    ]
+    return len(files)
+
+
+def streaming(body: bytes) -> int:
+    async def run():
+        count = 0
+        async for action in parse_actions(iter_chunks(body)):
+            if isinstance(action, File):
+                count += 1
+        return count
+
+    return asyncio.run(run())
+
+
+def streaming_roundtrip(body: bytes) -> int:
+    async def run():
+        size = 0
+        async for chunk in serialize_actions(parse_actions(iter_chunks(body))):
+            size += len(chunk)
+        assert size == len(body)
+        return size
+
+    return asyncio.run(run())
+
+
+def measure(name: str, fn: Callable[[bytes], int], body: bytes):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(body)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    logger.info(
+        f"{name:<20} {elapsed:8.3f}s {len(body) / elapsed / 2**20:8.1f} MiB/s"
+        f" peak {peak / 2**20:8.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100_000)
+    args = parser.parse_args()
+
+    body = generate_body(args.lines)
+    logger.info(f"Body of {args.lines} file lines, {len(body) / 2**20:.1f} MiB")
+
+    measure("json.loads", naive_json, body)
+    measure("pydantic", pydantic, body)
+    measure("streaming", streaming, body)
+    measure("streaming roundtrip", streaming_roundtrip, body)
+
+
+if __name__ == "__main__":
+    main()
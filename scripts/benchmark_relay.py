@@ -0,0 +1,214 @@
+"""
+Measure the proxy overhead per request of relaying Delta Sharing server responses,
+i.e. the CPU time and memory allocated by the proxy itself. The Delta Sharing server
+is replaced by an in-memory transport which sends the body in chunks, and
+authentication and permission checks are bypassed, so only the forwarding path is
+measured.
+
+Run it on two revisions to compare them:
+
+    python -m scripts.benchmark_relay --requests 200 --files 10000
+
+With the defaults, streaming the /query response (1.6 MiB) on instead of buffering
+it, and reading the query body as bytes instead of into `TableQueryRequest`, went
+from (per request, before -> after):
+
+    /shares  CPU 0.3-0.6 -> 0.5-0.8 ms (noise), peak 0.0 -> 0.0 MiB
+    /query   CPU 2.3-2.7 -> 2.1-2.3 ms,         peak 3.2 -> 0.1 MiB
+
+With `--files 10`, /query stays at 1.3 ms CPU, so parsing the body was not a
+measurable cost.
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+from uuid import uuid4
+
+import httpx
+import orjson
+from loguru import logger
+
+from data_sharing.app import app
+from data_sharing.internal.sharing import sharing_client
+from data_sharing.permissions.base import BasePermission
+from data_sharing.permissions.utils import get_current_user
+
+
+class AdminKey:
+    id = uuid4()
+    roles = [type("Role", (), {"id": "ADMIN"})()]
+    schemas = []
+
+
+def generate_query_response(num_files: int) -> bytes:
+    lines = [
+        orjson.dumps({"protocol": {"minReaderVersion": 1}}),
+        orjson.dumps(
+            {
+                "metaData": {
+                    "id": str(uuid4()),
+                    "format": {"provider": "parquet"},
+                    "schemaString": '{"type":"struct","fields":[]}',
+                    "partitionColumns": [],
+                }
+            }
+        ),
+    ]
+    for i in range(num_files):
+        lines.append(
+            orjson.dumps(
+                {
+                    "file": {
+                        "id": f"{i:032x}",
+                        "url": f"https://storage/part-{i:05d}.parquet?sig=abc",
+                        "partitionValues": {},
+                        "size": 123456,
+                        "stats": '{"numRecords":1000}',
+                    }
+                }
+            )
+        )
+    return b"\n".join(lines) + b"\n"
+
+
+def generate_shares_response(num_shares: int) -> bytes:
+    return orjson.dumps(
+        {
+            "items": [
+                {"name": f"share-{i}", "id": str(uuid4())} for i in range(num_shares)
+            ]
+        }
+    )
+
+
+async def iter_chunks(content: bytes, chunk_size: int = 64 * 1024):
+    """Send a body in chunks, as it arrives from a real upstream."""
+    for start in range(0, len(content), chunk_size):
+        yield content[start : start + chunk_size]
+
+
+def install_fakes(query_response: bytes, shares_response: bytes):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/query"):
+            return httpx.Response(
+                200,
+                content=iter_chunks(query_response),
+                headers={
+                    "content-type": "application/x-ndjson; charset=utf-8",
+                    "delta-table-version": "1",
+                },
+            )
+        return httpx.Response(
+            200,
+            content=shares_response,
+            headers={"content-type": "application/json; charset=utf-8"},
+        )
+
+    sharing_client._transport = httpx.MockTransport(handler)
+
+    async def allow():
+        return True
+
+    for route in app.routes:
+        for dependency in getattr(route, "dependencies", []):
+            if isinstance(dependency.dependency, BasePermission):
+                app.dependency_overrides[dependency.dependency] = allow
+    app.dependency_overrides[get_current_user] = AdminKey
+
+
+async def call_app(method: str, path: str, body: bytes) -> int:
+    """
+    Call the app without a client, which would buffer the response, so that only
+    the memory held by the proxy is traced. Returns the size of the response body.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"proxy"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("proxy", 80),
+    }
+    size = 0
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # The client stays connected until the response is sent
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal size
+        size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return size
+
+
+async def measure(
+    name: str,
+    client: httpx.AsyncClient,
+    num_requests: int,
+    method: str,
+    url: str,
+    body: bytes = b"",
+):
+    res = await client.request(method, url, content=body)
+    assert res.is_success, res.text
+
+    start = time.process_time()
+    for _ in range(num_requests):
+        await call_app(method, url, body)
+    elapsed = time.process_time() - start
+
+    # Traced separately, as tracing slows down every allocation
+    tracemalloc.start()
+    size = await call_app(method, url, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    logger.info(
+        f"{name:<8} {elapsed / num_requests * 1000:8.2f} ms CPU/request"
+        f" peak {peak / 2**20:8.1f} MiB, response {size / 2**20:.1f} MiB"
+    )
+
+
+async def run(num_requests: int, num_files: int, num_shares: int):
+    install_fakes(
+        generate_query_response(num_files), generate_shares_response(num_shares)
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://proxy"
+    ) as client:
+        await measure("shares", client, num_requests, "GET", "/shares")
+        await measure(
+            "query",
+            client,
+            num_requests,
+            "POST",
+            "/shares/gold/schemas/school-master/tables/BRA/query",
+            orjson.dumps({"predicateHints": ["id = 1"], "version": 1}),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--shares", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.files, args.shares))
+
+
+if __name__ == "__main__":
+    main()
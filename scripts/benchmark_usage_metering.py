@@ -0,0 +1,138 @@
+"""
+Measure the overhead of usage metering on table queries, i.e. the CPU time per
+request of the proxy with metering enabled and disabled. Both the relayed response
+of a plain query, sent as a single body, and the streamed response of a query with
+a `limitHint`, sent a line at a time, are measured.
+
+The Delta Sharing server is replaced by an in-memory transport, and authentication
+and permission checks are bypassed, so only the forwarding and metering paths are
+measured. Metered usage is not flushed to the database.
+
+Also checks that the metered file counts match the responses, including when lines
+are split across body chunks.
+
+    python -m scripts.benchmark_usage_metering --requests 200 --files 10000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from uuid import uuid4
+
+import httpx
+from fastapi import Request
+from loguru import logger
+
+from data_sharing.app import app
+from data_sharing.internal.metering import ResponseCounter, usage_meter
+from data_sharing.internal.sharing import sharing_client
+from data_sharing.permissions.base import BasePermission
+from data_sharing.permissions.utils import get_current_user
+from scripts.benchmark_relay import AdminKey, generate_query_response
+
+QUERY_URL = "/shares/gold/schemas/school-master/tables/BRA/query"
+
+
+def install_fakes(query_response: bytes):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            content=query_response,
+            headers={
+                "content-type": "application/x-ndjson; charset=utf-8",
+                "delta-table-version": "1",
+            },
+        )
+
+    sharing_client._transport = httpx.MockTransport(handler)
+
+    async def allow(request: Request):
+        request.state.api_key_id = AdminKey.id
+        return True
+
+    for route in app.routes:
+        for dependency in getattr(route, "dependencies", []):
+            if isinstance(dependency.dependency, BasePermission):
+                app.dependency_overrides[dependency.dependency] = allow
+    app.dependency_overrides[get_current_user] = AdminKey
+
+
+class UnbufferedCounter(ResponseCounter):
+    block_size = 1
+
+
+def check_split_lines(query_response: bytes, num_files: int):
+    counter = UnbufferedCounter()
+    counter.ndjson = True
+    i = 0
+    while i < len(query_response):
+        size = random.randint(1, 64)
+        counter.feed(query_response[i : i + size])
+        i += size
+    counter.scan()
+    assert counter.files == num_files, f"Counted {counter.files} files in chunks"
+
+
+async def measure(client: httpx.AsyncClient, num_requests: int, body: dict) -> float:
+    start = time.process_time()
+    for _ in range(num_requests):
+        res = await client.post(QUERY_URL, json=body)
+        assert res.is_success, res.text
+    return (time.process_time() - start) / num_requests * 1000
+
+
+async def compare(
+    name: str, client: httpx.AsyncClient, num_requests: int, num_files: int, body: dict
+):
+    await client.post(QUERY_URL, json=body)
+    usage_meter.pending.clear()
+
+    results = {}
+    for enabled in (False, True, False, True):
+        usage_meter.enabled = enabled
+        results.setdefault(enabled, []).append(
+            await measure(client, num_requests, body)
+        )
+
+    (requests, files, _), *_ = usage_meter.pending.values()
+    expected = num_requests * 2
+    assert requests == expected, f"Metered {requests} requests, expected {expected}"
+    assert files == expected * num_files, f"Metered {files} files"
+
+    disabled, enabled = min(results[False]), min(results[True])
+    logger.info(
+        f"{name:<8} disabled {disabled:8.3f} ms CPU/request,"
+        f" enabled {enabled:8.3f} ms CPU/request,"
+        f" overhead {(enabled - disabled) / disabled:6.1%}"
+    )
+
+
+async def run(num_requests: int, num_files: int):
+    query_response = generate_query_response(num_files)
+    check_split_lines(query_response, num_files)
+    install_fakes(query_response)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://proxy"
+    ) as client:
+        await compare("relay", client, num_requests, num_files, {"predicateHints": []})
+        await compare(
+            "stream",
+            client,
+            num_requests,
+            num_files,
+            {"predicateHints": [], "limitHint": 2**40},
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--files", type=int, default=10_000)
+    args = parser.parse_args()
+    AdminKey.id = uuid4()
+    asyncio.run(run(args.requests, args.files))
+
+
+if __name__ == "__main__":
+    main()
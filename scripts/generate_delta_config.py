@@ -1,26 +1,100 @@
+"""
+Regenerate the tables of the Delta Sharing server config from the country
+directories and files found in storage, and assign new countries an ID in
+`countries.yaml`.
+
+The storage listings run concurrently on a shared client, and only schemas whose
+set of tables changed since the last run are rewritten; existing table entries are
+kept as is. Nothing is written if nothing changed.
+
+    python -m scripts.generate_delta_config
+
+`--local-root` lists a local directory laid out like the container instead, e.g.
+to test the script without storage access:
+
+    python -m scripts.generate_delta_config --local-root /tmp/container
+"""
+
+import argparse
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
 from uuid import uuid4
 
 import yaml
 from loguru import logger
 
 from azure.core.exceptions import ResourceNotFoundError
-from azure.storage.filedatalake import DataLakeServiceClient, PathProperties
-from data_sharing.schemas.delta_sharing_config import Share, Table
+from azure.storage.filedatalake import (
+    DataLakeServiceClient,
+    FileSystemClient,
+    PathProperties,
+)
+from data_sharing.schemas.delta_sharing_config import Schema, Share, Table
 from data_sharing.settings import settings
 
 MASTER_SCHEMA_INDEX = 0
 REFERENCE_SCHEMA_INDEX = 1
 QOS_SCHEMA_INDEX = 2
 
+COUNTRIES_FILE = settings.BASE_DIR / "scripts" / "countries.yaml"
+CONFIG_FILE = settings.BASE_DIR / "conf-template" / "delta-sharing-server.yaml"
+
+# (path, are_directories) of each listing, in the order of `get_available_countries`
+LISTINGS = (
+    ("updated_master_schema/master", False),
+    ("updated_master_schema/master_updates", True),
+    ("updated_master_schema/reference", False),
+    ("gold/qos", True),
+)
+
+
+class LocalPath(NamedTuple):
+    name: str
+    is_directory: bool
+
+
+class LocalFileSystemClient:
+    """
+    Stand-in for the DataLake `FileSystemClient`, which lists a local directory
+    laid out like the container.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def get_paths(self, path: str, recursive: bool = False) -> Iterator[LocalPath]:
+        directory = self.root / path
+        if not directory.is_dir():
+            raise ResourceNotFoundError(f"{path} does not exist")
+
+        for entry in sorted(directory.iterdir()):
+            yield LocalPath(
+                name=entry.relative_to(self.root).as_posix(),
+                is_directory=entry.is_dir(),
+            )
+
+
+def get_file_system_client(
+    local_root: Path | None = None,
+) -> FileSystemClient | LocalFileSystemClient:
+    if local_root is not None:
+        return LocalFileSystemClient(local_root)
 
-def get_paths(root_path: str, are_directories: bool = False):
     service_client = DataLakeServiceClient(
         account_url=f"https://{settings.STORAGE_ACCOUNT_NAME}.dfs.core.windows.net",
         credential=settings.STORAGE_ACCESS_KEY,
     )
-    fs_client = service_client.get_file_system_client(settings.CONTAINER_NAME)
+    return service_client.get_file_system_client(settings.CONTAINER_NAME)
+
 
-    out = []
+def get_paths(
+    fs_client: FileSystemClient | LocalFileSystemClient,
+    root_path: str,
+    are_directories: bool = False,
+) -> set[str]:
+    out = set()
 
     try:
         logger.info(f"Looking in {root_path}...")
@@ -29,112 +103,129 @@ def get_paths(root_path: str, are_directories: bool = False):
             condition = path.is_directory if are_directories else not path.is_directory
 
             if condition:
-                name = path.name.split("/")[-1].split("_")[0].upper()
-                out.append({"id": "", "name": name})
+                out.add(path.name.split("/")[-1].split("_")[0].upper())
     except ResourceNotFoundError:
         pass
 
     return out
 
 
-def get_available_countries():
-    master = get_paths("updated_master_schema/master")
-    master.extend(
-        get_paths("updated_master_schema/master_updates", are_directories=True)
-    )
-    master.append({"id": "", "name": "ZCDF"})
-
-    reference = get_paths("updated_master_schema/reference")
-    qos = get_paths("gold/qos", are_directories=True)
-
-    return master, reference, qos
-
+def get_available_countries(
+    fs_client: FileSystemClient | LocalFileSystemClient,
+) -> tuple[set[str], set[str], set[str]]:
+    with ThreadPoolExecutor(max_workers=len(LISTINGS)) as executor:
+        master, master_updates, reference, qos = executor.map(
+            lambda listing: get_paths(fs_client, *listing), LISTINGS
+        )
 
-def enrich_id(country: dict[str, str], countries: list[dict[str, str]]):
-    if country["name"] in [c["name"] for c in countries]:
-        country["id"] = next(c["id"] for c in countries if c["name"] == country["name"])
-    else:
-        country["id"] = str(uuid4())
+    return master | master_updates | {"ZCDF"}, reference, qos
 
 
-def enrich_master_reference_list():
-    with open(settings.BASE_DIR / "scripts" / "countries.yaml") as f:
+def update_country_ids(
+    names: set[str], write: bool = True
+) -> tuple[dict[str, str], set[str]]:
+    with open(COUNTRIES_FILE) as f:
         countries: list[dict[str, str]] = yaml.safe_load(f)
-
-    master, reference, qos = get_available_countries()
-
-    unique_countries = {
-        *[m["name"] for m in master],
-        *[r["name"] for r in reference],
-        *[q["name"] for q in qos],
-    }
-
-    for country in unique_countries:
-        if country not in [c["name"] for c in countries]:
-            countries.append({"id": str(uuid4()), "name": country})
-
-    for country in master:
-        enrich_id(country, countries)
-    for country in reference:
-        enrich_id(country, countries)
-    for country in qos:
-        enrich_id(country, countries)
-
-    countries = sorted(countries, key=lambda x: x["name"])
-    with open(settings.BASE_DIR / "scripts" / "countries.yaml", "w") as f:
-        yaml.safe_dump(countries, f, indent=2)
-
-    return (
-        sorted(master, key=lambda x: x["name"]),
-        sorted(reference, key=lambda x: x["name"]),
-        sorted(qos, key=lambda x: x["name"]),
+    country_ids = {country["name"]: country["id"] for country in countries}
+
+    new_countries = names - country_ids.keys()
+    if not new_countries:
+        return country_ids, new_countries
+
+    logger.info(f"New countries: {', '.join(sorted(new_countries))}")
+    for name in new_countries:
+        country_ids[name] = str(uuid4())
+
+    if write:
+        with open(COUNTRIES_FILE, "w") as f:
+            yaml.safe_dump(
+                [
+                    {"id": id_, "name": name}
+                    for name, id_ in sorted(country_ids.items())
+                ],
+                f,
+                indent=2,
+            )
+    return country_ids, new_countries
+
+
+def update_schema_tables(
+    schema: Schema, database: str, names: set[str], country_ids: dict[str, str]
+) -> tuple[set[str], set[str]]:
+    existing = {table.name: table for table in schema.tables}
+    if existing.keys() == names:
+        logger.info(f"{schema.name}: {len(names)} tables, unchanged")
+        return set(), set()
+
+    added = names - existing.keys()
+    removed = existing.keys() - names
+    logger.info(
+        f"{schema.name}: {len(names)} tables,"
+        f" added {sorted(added)}, removed {sorted(removed)}"
     )
-
-
-def main():
-    master, reference, qos = enrich_master_reference_list()
-
-    with open(settings.BASE_DIR / "conf-template" / "delta-sharing-server.yaml") as f:
-        config = yaml.safe_load(f)
-
-    share = Share(**config["shares"][0])
-
-    share.schemas[MASTER_SCHEMA_INDEX].tables = [
-        Table(
-            id=country["id"],
-            name=country["name"],
-            location=f"wasbs://{{{{.CONTAINER_NAME}}}}@{{{{.STORAGE_ACCOUNT_NAME}}}}.blob.core.windows.net/{{{{.CONTAINER_PATH}}}}/school_master.db/{country['name'].lower()}",
+    schema.tables = [
+        existing.get(name)
+        or Table(
+            id=country_ids[name],
+            name=name,
+            location=f"wasbs://{{{{.CONTAINER_NAME}}}}@{{{{.STORAGE_ACCOUNT_NAME}}}}.blob.core.windows.net/{{{{.CONTAINER_PATH}}}}/{database}/{name.lower()}",
             historyShared=True,
         )
-        for country in master
+        for name in sorted(names)
     ]
+    return added, removed
+
+
+def update_delta_config(
+    master: set[str],
+    reference: set[str],
+    qos: set[str],
+    country_ids: dict[str, str],
+    write: bool = True,
+) -> tuple[list[str], dict[str, tuple[set[str], set[str]]]]:
+    """
+    Returns the names of all schemas of the share, and the added and removed tables
+    of each changed schema.
+    """
+    with open(CONFIG_FILE) as f:
+        config = yaml.safe_load(f)
 
-    share.schemas[REFERENCE_SCHEMA_INDEX].tables = [
-        Table(
-            id=country["id"],
-            name=country["name"],
-            location=f"wasbs://{{{{.CONTAINER_NAME}}}}@{{{{.STORAGE_ACCOUNT_NAME}}}}.blob.core.windows.net/{{{{.CONTAINER_PATH}}}}/school_reference.db/{country['name'].lower()}",
-            historyShared=True,
-        )
-        for country in reference
-    ]
+    share = Share(**config["shares"][0])
+
+    changes = {}
+    for index, database, names in (
+        (MASTER_SCHEMA_INDEX, "school_master.db", master),
+        (REFERENCE_SCHEMA_INDEX, "school_reference.db", reference),
+        (QOS_SCHEMA_INDEX, "qos.db", qos),
+    ):
+        schema = share.schemas[index]
+        added, removed = update_schema_tables(schema, database, names, country_ids)
+        if added or removed:
+            changes[schema.name] = (added, removed)
+
+    schema_names = [schema.name for schema in share.schemas]
+    if not changes:
+        logger.info("Delta Sharing server config is up to date")
+        return schema_names, changes
+
+    if write:
+        config["shares"][0] = share.model_dump(mode="json")
+        with open(CONFIG_FILE, "w") as f:
+            yaml.safe_dump(config, f, indent=2)
+    return schema_names, changes
 
-    share.schemas[QOS_SCHEMA_INDEX].tables = [
-        Table(
-            id=country["id"],
-            name=country["name"],
-            location=f"wasbs://{{{{.CONTAINER_NAME}}}}@{{{{.STORAGE_ACCOUNT_NAME}}}}.blob.core.windows.net/{{{{.CONTAINER_PATH}}}}/qos.db/{country['name'].lower()}",
-            historyShared=True,
-        )
-        for country in qos
-    ]
 
-    config["shares"][0] = share.model_dump(mode="json")
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--local-root", type=Path)
+    args = parser.parse_args()
 
-    with open(
-        settings.BASE_DIR / "conf-template" / "delta-sharing-server.yaml", "w"
-    ) as f:
-        yaml.safe_dump(config, f, indent=2)
+    fs_client = get_file_system_client(args.local_root)
+    master, reference, qos = get_available_countries(fs_client)
+    country_ids, _ = update_country_ids(master | reference | qos)
+    update_delta_config(master, reference, qos, country_ids)
 
 
 if __name__ == "__main__":
@@ -1,44 +1,95 @@
+"""
+Update the role fixtures with a role per country in `countries.yaml`, described by
+the country name. Only roles missing from the fixtures are added, and the fixtures
+are not written if none are.
+
+Country names are looked up in the `country_names.yaml` cache first, and the
+remaining ones are resolved with a single `country_converter` call and cached.
+"""
+
+from collections.abc import Iterable
 from pathlib import Path
 
 import yaml
-from country_converter import CountryConverter
 from loguru import logger
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-coco = CountryConverter()
+COUNTRIES_FILE = BASE_DIR / "scripts" / "countries.yaml"
+COUNTRY_NAMES_FILE = BASE_DIR / "scripts" / "country_names.yaml"
+ROLE_FIXTURES_FILE = BASE_DIR / "data_sharing" / "fixtures" / "roles.yaml"
+
+SPECIAL_ROLES = {"ADMIN": "Administrator", "ZCDF": "CDF test"}
+
+
+def resolve_country_names(codes: Iterable[str], write: bool = True) -> dict[str, str]:
+    with open(COUNTRY_NAMES_FILE) as f:
+        cache: dict[str, str] = yaml.safe_load(f) or {}
+
+    codes = set(codes)
+    missing = sorted(codes - cache.keys())
+    if missing:
+        # Importing and loading the converter takes seconds, only pay it on misses
+        from country_converter import CountryConverter
+
+        names = CountryConverter().convert(missing, to="name", not_found=None)
+        if isinstance(names, str):
+            names = [names]
+        logger.info(f"Resolved {len(missing)} country names")
+
+        resolved = dict(zip(missing, names, strict=True))
+        cache.update({code: name for code, name in resolved.items() if name != code})
+        if write:
+            with open(COUNTRY_NAMES_FILE, "w") as f:
+                yaml.dump(dict(sorted(cache.items())), f, allow_unicode=True)
+    else:
+        resolved = {}
+
+    return {code: cache.get(code, resolved.get(code, code)) for code in codes}
+
+
+def load_role_fixtures() -> list[dict]:
+    if not ROLE_FIXTURES_FILE.exists():
+        return []
+
+    with open(ROLE_FIXTURES_FILE) as f:
+        return yaml.safe_load(f) or []
+
+
+def update_role_fixtures(
+    country_codes: Iterable[str], write: bool = True
+) -> tuple[list[dict], set[str]]:
+    """Returns the role fixtures and the IDs of the added roles."""
+    fixtures = load_role_fixtures()
+    descriptions = {}
+    for fixture in fixtures:
+        descriptions.setdefault(fixture["id"], fixture["fields"]["description"])
+
+    added = {*SPECIAL_ROLES, *country_codes} - descriptions.keys()
+    names = resolve_country_names(added - SPECIAL_ROLES.keys(), write=write)
+    for role in added:
+        descriptions[role] = SPECIAL_ROLES.get(role) or names[role]
+
+    updated = [
+        {"id": role, "model": "Role", "fields": {"description": description}}
+        for role, description in sorted(descriptions.items())
+    ]
+    if updated == fixtures:
+        logger.info(f"Role fixtures are up to date with {len(updated)} roles")
+        return updated, added
+
+    if write:
+        with open(ROLE_FIXTURES_FILE, "w") as f:
+            yaml.dump(updated, f, indent=2, allow_unicode=True)
+    logger.info(f"Updated role fixtures to {len(updated)} roles, added {sorted(added)}")
+    return updated, added
 
 
 def main():
-    with open(BASE_DIR / "scripts" / "countries.yaml") as f:
+    with open(COUNTRIES_FILE) as f:
         countries = yaml.safe_load(f)
 
-    roles = [
-        {"id": "ADMIN", "model": "Role", "fields": {"description": "Administrator"}}
-    ]
-    for country in countries:
-        if country["name"] == "ZCDF":
-            roles.append(
-                {
-                    "id": "ZCDF",
-                    "model": "Role",
-                    "fields": {"description": "CDF test"},
-                }
-            )
-        else:
-            roles.append(
-                {
-                    "id": country["name"],
-                    "model": "Role",
-                    "fields": {"description": coco.convert(country["name"], to="name")},
-                }
-            )
-
-    role_fixtures_path = BASE_DIR / "data_sharing" / "fixtures" / "roles.yaml"
-    with open(role_fixtures_path, "w") as f:
-        yaml.dump(roles, f, indent=2, allow_unicode=True)
-
-    logger.info(f"Created fixture for {len(roles)} roles in {role_fixtures_path}")
+    update_role_fixtures(country["name"] for country in countries)
 
 
 if __name__ == "__main__":
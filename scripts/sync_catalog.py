@@ -0,0 +1,200 @@
+"""
+Synchronize the catalog from storage to the Delta Sharing server config, the role
+and schema fixtures, and the `roles` and `schemas` tables, in one pass.
+
+Storage is scanned once, and each stage only applies the difference with its
+current state: new countries get an ID, changed schemas of the config are
+rewritten, and missing roles and schemas are added to the fixtures and inserted.
+The changes and the time spent in each stage are reported at the end.
+
+    python -m scripts.sync_catalog
+    python -m scripts.sync_catalog --local-root /tmp/container --dry-run
+
+Roles and schemas which disappeared are kept, since deleting them would also
+revoke them from API keys.
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import yaml
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from data_sharing.db import get_db_context
+from data_sharing.models import Role, Schema
+from data_sharing.settings import settings
+from scripts.generate_delta_config import (
+    get_available_countries,
+    get_file_system_client,
+    update_country_ids,
+    update_delta_config,
+)
+from scripts.generate_role_fixtures import update_role_fixtures
+
+SCHEMA_FIXTURES_FILE = settings.BASE_DIR / "data_sharing" / "fixtures" / "schemas.yaml"
+
+
+class StageTimer:
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = time.perf_counter() - start
+
+    def report(self):
+        for name, duration in self.durations.items():
+            logger.info(f"{name:<10} {duration * 1000:10.1f} ms")
+        logger.info(f"{'total':<10} {sum(self.durations.values()) * 1000:10.1f} ms")
+
+
+def update_schema_fixtures(
+    schema_names: list[str], write: bool = True
+) -> tuple[list[dict], set[str]]:
+    """Returns the schema fixtures and the IDs of the added schemas."""
+    with open(SCHEMA_FIXTURES_FILE, newline="") as f:
+        content = f.read()
+    fixtures: list[dict] = yaml.safe_load(content)
+
+    added = set(schema_names) - {fixture["id"] for fixture in fixtures}
+    if not added:
+        return fixtures, added
+
+    fixtures = [
+        *fixtures,
+        *(
+            {
+                "id": name,
+                "model": "Schema",
+                "fields": {"description": f"{name.replace('-', ' ').title()} schema"},
+            }
+            for name in schema_names
+            if name in added
+        ),
+    ]
+    if write:
+        with open(SCHEMA_FIXTURES_FILE, "w", newline="") as f:
+            yaml.dump(
+                fixtures,
+                f,
+                indent=2,
+                allow_unicode=True,
+                line_break="\r\n" if "\r\n" in content else "\n",
+            )
+    logger.info(f"Added schema fixtures {sorted(added)}")
+    return fixtures, added
+
+
+async def sync_rows(
+    model: type[Role] | type[Schema], fixtures: list[dict], write: bool = True
+) -> tuple[int, int]:
+    """
+    Inserts the missing rows, and returns how many there were and how many existing
+    rows have another description. As for `load_fixtures`, existing rows are kept as
+    is, since their descriptions may have been edited.
+    """
+    async with get_db_context() as session:
+        existing = dict(
+            (await session.execute(select(model.id, model.description))).all()
+        )
+        rows = {}
+        for fixture in fixtures:
+            if fixture["id"] not in existing:
+                rows.setdefault(
+                    fixture["id"], {"id": fixture["id"], **fixture["fields"]}
+                )
+        if rows and write:
+            await session.execute(
+                insert(model).values(list(rows.values())).on_conflict_do_nothing()
+            )
+            await session.commit()
+
+    differing = sum(
+        fixture["id"] in existing
+        and existing[fixture["id"]] != fixture["fields"]["description"]
+        for fixture in fixtures
+    )
+    return len(rows), differing
+
+
+async def sync_catalog(local_root: Path | None, dry_run: bool, skip_db: bool):
+    write = not dry_run
+    timer = StageTimer()
+
+    with timer.stage("scan"):
+        fs_client = get_file_system_client(local_root)
+        master, reference, qos = get_available_countries(fs_client)
+
+    with timer.stage("countries"):
+        country_ids, new_countries = update_country_ids(
+            master | reference | qos, write=write
+        )
+
+    with timer.stage("config"):
+        schema_names, config_changes = update_delta_config(
+            master, reference, qos, country_ids, write=write
+        )
+
+    with timer.stage("fixtures"):
+        role_fixtures, new_roles = update_role_fixtures(country_ids, write=write)
+        schema_fixtures, new_schemas = update_schema_fixtures(schema_names, write=write)
+
+    if not skip_db:
+        with timer.stage("database"):
+            roles_added, roles_differing = await sync_rows(
+                Role, role_fixtures, write=write
+            )
+            schemas_added, schemas_differing = await sync_rows(
+                Schema, schema_fixtures, write=write
+            )
+        logger.info(
+            f"Database: {roles_added} roles and {schemas_added} schemas added;"
+            f" {roles_differing} roles and {schemas_differing} schemas kept with"
+            " another description than their fixture"
+        )
+
+    logger.info(
+        f"Catalog: {len(new_countries)} new countries, {len(new_roles)} new roles,"
+        f" {len(new_schemas)} new schemas"
+    )
+    for schema_name, (added, removed) in config_changes.items():
+        logger.info(
+            f"Config: {schema_name} added {sorted(added)}, removed {sorted(removed)}"
+        )
+    if config_changes and write:
+        logger.info("The Delta Sharing server must be reloaded to serve the changes")
+
+    timer.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--local-root",
+        type=Path,
+        help="List a local directory laid out like the container instead of storage",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report the changes without applying"
+    )
+    parser.add_argument(
+        "--skip-db", action="store_true", help="Do not update the database"
+    )
+    args = parser.parse_args()
+    asyncio.run(sync_catalog(args.local_root, args.dry_run, args.skip_db))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+
+# Settings are read on import, so required ones get placeholders unless the
+# environment provides them, as in the proxy container
+for name, value in {
+    "SECRET_KEY": "test-secret-key",
+    "DELTA_BEARER_TOKEN": "test-bearer-token",
+    "STORAGE_ACCESS_KEY": "test",
+    "STORAGE_ACCOUNT_NAME": "test",
+    "CONTAINER_NAME": "test",
+    "CONTAINER_PATH": "test",
+    "DELTA_SHARING_HOST": "delta:8890",
+    "POSTGRESQL_USERNAME": "postgres",
+    "POSTGRESQL_PASSWORD": "postgres",
+    "POSTGRESQL_DATABASE": "postgres",
+    "DB_HOST": "localhost",
+    "INGRESS_HOST": "localhost:5000",
+    "ADMIN_API_KEY": "00000000-0000-4000-8000-000000000000",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+import sqlalchemy.exc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from data_sharing.db import create_asyncpg_engine
+from data_sharing.settings import settings
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def engine():
+    engine = create_asyncpg_engine(settings.ASYNC_DATABASE_URL)
+    try:
+        async with engine.connect():
+            pass
+    except (OSError, sqlalchemy.exc.DBAPIError) as e:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL is not available: {e}")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db(engine):
+    """A session whose changes are rolled back after the test."""
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(
+            bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False
+        )
+        # Begins the savepoint, so that it is not counted as a statement of the test
+        await session.connection()
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
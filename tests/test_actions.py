@@ -0,0 +1,144 @@
+import orjson
+import pytest
+
+from data_sharing.internal.actions import (
+    Add,
+    Cdf,
+    File,
+    Metadata,
+    Protocol,
+    Remove,
+    Unknown,
+    iter_actions,
+    parse_action,
+    parse_actions,
+    serialize_actions,
+)
+
+pytestmark = pytest.mark.anyio
+
+PARQUET_FILE = orjson.dumps(
+    {
+        "file": {
+            "url": "https://storage/part-0.parquet?sig=1",
+            "id": "f0",
+            "partitionValues": {"country": "BRA"},
+            "size": 100,
+            "stats": '{"numRecords":42}',
+            "expirationTimestamp": 1700000000000,
+        }
+    }
+)
+
+DELTA_FILE = orjson.dumps(
+    {
+        "file": {
+            "id": "f1",
+            "version": 3,
+            "deltaSingleAction": {
+                "add": {
+                    "path": "https://storage/part-1.parquet?sig=1",
+                    "partitionValues": {},
+                    "size": 200,
+                    "stats": '{"numRecords":7}',
+                }
+            },
+        }
+    }
+)
+
+
+def test_parse_protocol_and_metadata():
+    protocol = parse_action(b'{"protocol":{"minReaderVersion":1}}')
+    assert isinstance(protocol, Protocol)
+    assert protocol.min_reader_version == 1
+
+    delta_protocol = parse_action(
+        b'{"protocol":{"deltaProtocol":{"minReaderVersion":3,"minWriterVersion":7}}}'
+    )
+    assert delta_protocol.min_reader_version == 3
+    assert delta_protocol.min_writer_version == 7
+
+    metadata = parse_action(
+        b'{"metaData":{"version":2,"deltaMetadata":{"id":"m","schemaString":"{}"}}}'
+    )
+    assert isinstance(metadata, Metadata)
+    assert (metadata.id, metadata.schema_string, metadata.version) == ("m", "{}", 2)
+    assert metadata.partition_columns == []
+
+
+def test_parse_parquet_file():
+    file = parse_action(PARQUET_FILE)
+
+    assert type(file) is File
+    assert file.url == "https://storage/part-0.parquet?sig=1"
+    assert file.partition_values == {"country": "BRA"}
+    assert file.num_records == 42
+
+
+@pytest.mark.parametrize("kind, cls", [("add", Add), ("remove", Remove), ("cdc", Cdf)])
+def test_parse_delta_file(kind, cls):
+    file = parse_action(DELTA_FILE.replace(b'"add"', f'"{kind}"'.encode()))
+
+    assert type(file) is cls
+    assert file.id == "f1"
+    assert file.version == 3
+    assert file.url == "https://storage/part-1.parquet?sig=1"
+    assert file.num_records == 7
+
+
+@pytest.mark.parametrize(
+    "line",
+    [b'{"errorCode":"X","message":"y"}', b"[1,2]", b'{"protocol":{},"extra":1}'],
+)
+def test_parse_unknown(line):
+    action = parse_action(line)
+    assert isinstance(action, Unknown)
+    assert action.dumps() == line
+
+
+def test_num_records_without_stats():
+    assert parse_action(b'{"file":{"url":"u"}}').num_records is None
+    assert parse_action(b'{"file":{"url":"u","stats":"{}"}}').num_records is None
+
+
+def test_unchanged_file_is_dumped_as_is():
+    assert parse_action(PARQUET_FILE).dumps() == PARQUET_FILE
+
+
+def test_replace_patches_only_the_changed_fields():
+    file = parse_action(PARQUET_FILE)
+    patched = file.replace(url="/files/token")
+
+    assert file.url == "https://storage/part-0.parquet?sig=1"
+    assert patched.url == "/files/token"
+    assert orjson.loads(patched.dumps()) == {
+        "file": {**orjson.loads(PARQUET_FILE)["file"], "url": "/files/token"}
+    }
+
+
+def test_replace_patches_the_wrapped_delta_action():
+    patched = parse_action(DELTA_FILE).replace(url="/files/token", size=1)
+    obj = orjson.loads(patched.dumps())
+
+    assert obj["file"]["deltaSingleAction"]["add"]["path"] == "/files/token"
+    assert obj["file"]["deltaSingleAction"]["add"]["size"] == 1
+    assert "url" not in obj["file"]
+
+
+def test_iter_actions_skips_blank_lines():
+    actions = list(iter_actions([b'{"protocol":{}}', b"", b"  ", PARQUET_FILE]))
+    assert [type(a) for a in actions] == [Protocol, File]
+
+
+async def test_parse_and_serialize_round_trip():
+    body = b'{"protocol":{"minReaderVersion":1}}\n' + PARQUET_FILE + b"\n"
+
+    async def chunks():
+        for i in range(0, len(body), 7):
+            yield body[i : i + 7]
+
+    out = b"".join(
+        [chunk async for chunk in serialize_actions(parse_actions(chunks()))]
+    )
+    assert out == body
@@ -0,0 +1,142 @@
+from datetime import UTC, datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy import insert, select
+
+from data_sharing.internal.api_keys import (
+    InvalidGrantsError,
+    InvalidPageTokenError,
+    build_api_key_query,
+    bulk_revoke,
+    list_api_keys_page,
+)
+from data_sharing.models import (
+    ApiKey,
+    Role,
+    Schema,
+    apikey_role_association_table,
+    apikey_schema_association_table,
+)
+
+pytestmark = pytest.mark.anyio
+
+PREFIX = "api-keys-test"
+
+
+async def add_key(db, key_id: str, created: datetime, roles=(), schemas=()) -> UUID:
+    key_id = UUID(key_id)
+    await db.execute(
+        insert(ApiKey.__table__),
+        [{"id": key_id, "description": PREFIX, "secret": "x", "created": created}],
+    )
+    for role_id in roles:
+        await db.execute(
+            insert(apikey_role_association_table),
+            [{"api_key_id": key_id, "role_id": role_id}],
+        )
+    for schema_id in schemas:
+        await db.execute(
+            insert(apikey_schema_association_table),
+            [{"api_key_id": key_id, "schema_id": schema_id}],
+        )
+    return key_id
+
+
+async def test_keyset_pagination_visits_every_key_once(db):
+    older = datetime(2024, 1, 1, tzinfo=UTC)
+    newer = datetime(2024, 6, 1, tzinfo=UTC)
+    # Keys with the same creation time are ordered by id
+    keys = [
+        await add_key(db, f"00000000-0000-4000-8000-00000000000{i}", created)
+        for i, created in enumerate([older, older, newer, newer, newer])
+    ]
+
+    pages, page_token = [], None
+    while True:
+        query = build_api_key_query(description_prefix=PREFIX, page_token=page_token)
+        rows, page_token = await list_api_keys_page(db, query, max_results=2)
+        pages.append([row["id"] for row in rows])
+        if page_token is None:
+            break
+
+    assert pages == [keys[4:2:-1], keys[2:0:-1], keys[0:1]]
+
+
+def test_invalid_page_token():
+    with pytest.raises(InvalidPageTokenError):
+        build_api_key_query(page_token="not-a-token")
+
+
+@pytest.fixture
+async def grants(db):
+    db.add_all(
+        [
+            Role(id="TRA", description="Bulk revoke test"),
+            Role(id="TRB", description="Bulk revoke test"),
+            Schema(id="bulk-revoke-a", description="Bulk revoke test"),
+        ]
+    )
+    await db.flush()
+
+
+async def get_grants(db, key_id: UUID) -> tuple[set[str], set[str]]:
+    roles = await db.scalars(
+        select(apikey_role_association_table.c.role_id).where(
+            apikey_role_association_table.c.api_key_id == key_id
+        )
+    )
+    schemas = await db.scalars(
+        select(apikey_schema_association_table.c.schema_id).where(
+            apikey_schema_association_table.c.api_key_id == key_id
+        )
+    )
+    return set(roles), set(schemas)
+
+
+async def test_bulk_revoke(db, grants):
+    key_id = await add_key(
+        db,
+        "00000000-0000-4000-8000-000000000010",
+        datetime.now(UTC),
+        roles=["TRA", "TRB"],
+        schemas=["bulk-revoke-a"],
+    )
+
+    removed = await bulk_revoke(db, {key_id}, {"TRA"}, set())
+
+    assert removed == {"roles": 1, "schemas": 0}
+    assert await get_grants(db, key_id) == ({"TRB"}, {"bulk-revoke-a"})
+
+
+async def test_bulk_revoke_rolls_back_when_a_key_loses_every_schema(db, grants):
+    key_id = await add_key(
+        db,
+        "00000000-0000-4000-8000-000000000011",
+        datetime.now(UTC),
+        roles=["TRA", "TRB"],
+        schemas=["bulk-revoke-a"],
+    )
+    await db.commit()
+
+    # The roles are deleted first, and must be restored when the schemas fail
+    with pytest.raises(InvalidGrantsError, match="Schemas are required"):
+        await bulk_revoke(db, {key_id}, {"TRA"}, {"bulk-revoke-a"})
+
+    assert await get_grants(db, key_id) == ({"TRA", "TRB"}, {"bulk-revoke-a"})
+
+
+async def test_bulk_revoke_rolls_back_when_a_key_loses_every_role(db, grants):
+    key_id = await add_key(
+        db,
+        "00000000-0000-4000-8000-000000000012",
+        datetime.now(UTC),
+        roles=["TRA"],
+        schemas=["bulk-revoke-a"],
+    )
+    await db.commit()
+
+    with pytest.raises(InvalidGrantsError, match="Roles are required"):
+        await bulk_revoke(db, {key_id}, {"TRA"}, set())
+
+    assert await get_grants(db, key_id) == ({"TRA"}, {"bulk-revoke-a"})
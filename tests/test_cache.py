@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+
+from data_sharing.internal.cache import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_maxbytes_evicts_least_recently_used():
+    cache = TTLCache(maxsize=10, ttl=60, maxbytes=10, sizeof=len)
+    cache.set("a", b"aaaa")
+    cache.set("b", b"bbbb")
+    cache.get("a")
+    cache.set("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert cache.nbytes == 8
+
+
+def test_value_larger_than_maxbytes_is_not_stored():
+    cache = TTLCache(maxsize=10, ttl=60, maxbytes=10, sizeof=len)
+    cache.set("a", b"aaaa")
+    cache.set("a", b"a" * 11)
+
+    assert cache.get("a") is None
+    assert cache.nbytes == 0
+
+
+def test_replacing_and_invalidating_keep_nbytes():
+    cache = TTLCache(maxsize=10, ttl=60, maxbytes=100, sizeof=len)
+    cache.set("a", b"aaaa")
+    cache.set("a", b"aa")
+    assert cache.nbytes == 2
+
+    cache.invalidate("a")
+    assert cache.nbytes == 0
+
+
+async def test_concurrent_misses_are_fetched_once():
+    cache = TTLCache(maxsize=10, ttl=60)
+    release = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    tasks = [asyncio.create_task(cache.get_or_fetch("a", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["value"] * 5
+    assert calls == 1
+    assert (cache.hits, cache.misses) == (0, 5)
+    assert await cache.get_or_fetch("a", fetch) == "value"
+    assert cache.hits == 1
+
+
+async def test_failed_fetch_is_raised_to_every_waiter_and_not_cached():
+    cache = TTLCache(maxsize=10, ttl=60)
+    release = asyncio.Event()
+
+    async def fail():
+        await release.wait()
+        raise RuntimeError("upstream")
+
+    tasks = [asyncio.create_task(cache.get_or_fetch("a", fail)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.get("a") is None
+    assert cache._inflight == {}
+
+
+async def test_fetch_started_before_clear_is_not_stored():
+    cache = TTLCache(maxsize=10, ttl=60)
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "old"
+
+    task = asyncio.create_task(cache.get_or_fetch("a", fetch))
+    await asyncio.sleep(0)
+    cache.clear()
+    release.set()
+
+    assert await task == "old"
+    assert cache.get("a") is None
+
+
+def test_expired_entry_is_dropped(monkeypatch):
+    cache = TTLCache(maxsize=10, ttl=60, maxbytes=10, sizeof=len)
+    cache.set("a", b"aaaa")
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_maxsize_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
@@ -0,0 +1,86 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data_sharing.internal import cdf
+from data_sharing.internal.arrow import InvalidQueryError
+from data_sharing.internal.files import FileCache
+from data_sharing.settings import settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def change_file(tmp_path):
+    path = tmp_path / "storage" / "cdc-0.parquet"
+    path.parent.mkdir()
+    pq.write_table(pa.table({"id": [1, 2], "_change_type": ["insert", "delete"]}), path)
+    return path
+
+
+async def test_fetch_local_change_file(change_file, monkeypatch):
+    monkeypatch.setattr(settings, "FILE_CACHE_ENABLED", False)
+
+    source = await cdf.fetch_change_file(change_file.as_uri())
+
+    assert source == str(change_file)
+
+
+async def test_fetch_local_change_file_through_file_cache(
+    change_file, tmp_path, monkeypatch
+):
+    cache = FileCache(tmp_path / "cache", max_bytes=1024**2)
+    monkeypatch.setattr(settings, "FILE_CACHE_ENABLED", True)
+    monkeypatch.setattr(cdf, "file_cache", cache)
+
+    source = await cdf.fetch_change_file(change_file.as_uri())
+
+    assert source.startswith(str(cache.directory))
+    assert pq.read_table(source).num_rows == 2
+
+
+def events(*rows) -> pa.Table:
+    ids, values, change_types, versions = zip(*rows, strict=True)
+    return pa.table(
+        {
+            "id": pa.array(ids, pa.int64()),
+            "value": pa.array(values, pa.string()),
+            cdf.CHANGE_TYPE: pa.array(change_types, pa.string()),
+            cdf.COMMIT_VERSION: pa.array(versions, pa.int64()),
+        }
+    )
+
+
+def test_compact_changes():
+    changes = cdf.compact_changes(
+        events(
+            # Inserted
+            (1, "a", "insert", 1),
+            # Updated twice, pre-images sorted before post-images of a commit
+            (2, "b2", "update_postimage", 1),
+            (2, "b1", "update_preimage", 1),
+            (2, "b2", "update_preimage", 2),
+            (2, "b3", "update_postimage", 2),
+            # Inserted and deleted within the range
+            (3, "c", "insert", 1),
+            (3, "c", "delete", 2),
+            # Deleted
+            (4, "d", "delete", 2),
+            # Deleted and inserted again
+            (5, "e1", "delete", 1),
+            (5, "e2", "insert", 2),
+        ),
+        ["id"],
+    )
+
+    assert changes.select(["id", "value", cdf.CHANGE_TYPE]).to_pylist() == [
+        {"id": 1, "value": "a", cdf.CHANGE_TYPE: "insert"},
+        {"id": 2, "value": "b3", cdf.CHANGE_TYPE: "update"},
+        {"id": 4, "value": "d", cdf.CHANGE_TYPE: "delete"},
+        {"id": 5, "value": "e2", cdf.CHANGE_TYPE: "update"},
+    ]
+
+
+def test_compact_changes_with_unknown_key():
+    with pytest.raises(InvalidQueryError, match="`missing`"):
+        cdf.compact_changes(events((1, "a", "insert", 1)), ["id", "missing"])
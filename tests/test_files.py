@@ -0,0 +1,113 @@
+import httpx
+import orjson
+import pytest
+from fastapi import FastAPI
+
+from data_sharing.internal import files
+from data_sharing.internal.files import FileCache, read_file_token, rewrite_file_url
+from data_sharing.routers import files as files_router
+from data_sharing.settings import settings
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = bytes(range(256)) * 64
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """A local directory standing in for blob storage."""
+    directory = tmp_path / "storage"
+    directory.mkdir()
+    (directory / "part-0.parquet").write_bytes(CONTENT)
+    return directory
+
+
+@pytest.fixture
+def file_cache(tmp_path, monkeypatch):
+    cache = FileCache(tmp_path / "cache", max_bytes=10 * len(CONTENT))
+    monkeypatch.setattr(settings, "FILE_CACHE_ENABLED", True)
+    monkeypatch.setattr(files_router, "file_cache", cache)
+    return cache
+
+
+@pytest.fixture
+async def client(file_cache):
+    app = FastAPI()
+    app.include_router(files_router.router)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://proxy"
+    ) as client:
+        yield client
+
+
+def file_line(url: str) -> bytes:
+    return orjson.dumps(
+        {"file": {"id": "a", "url": url, "partitionValues": {}, "size": len(CONTENT)}}
+    )
+
+
+def test_rewrite_file_url_of_local_file(storage):
+    url = (storage / "part-0.parquet").as_uri()
+
+    line = orjson.loads(rewrite_file_url(file_line(url)))
+
+    proxy_url = line["file"]["url"]
+    assert proxy_url.startswith(f"https://{settings.INGRESS_HOST}/files/")
+    assert read_file_token(proxy_url.rpartition("/")[2]) == url
+    assert line["file"]["id"] == "a"
+
+
+def test_rewrite_file_url_leaves_other_lines():
+    line = b'{"metaData":{"id":"a"}}'
+    assert rewrite_file_url(line) is line
+
+
+async def test_get_file_from_local_storage(storage, file_cache, client):
+    line = orjson.loads(
+        rewrite_file_url(file_line((storage / "part-0.parquet").as_uri()))
+    )
+    path = "/files/" + line["file"]["url"].rpartition("/")[2]
+
+    res = await client.get(path)
+    assert res.status_code == 200
+    assert res.content == CONTENT
+
+    res = await client.get(path, headers={"Range": "bytes=10-19"})
+    assert res.status_code == 206
+    assert res.headers["content-range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert res.content == CONTENT[10:20]
+
+    assert (file_cache.hits, file_cache.misses) == (1, 1)
+
+
+async def test_get_file_with_invalid_token(client):
+    res = await client.get("/files/invalid.token")
+    assert res.status_code == 403
+
+
+async def test_file_removed_from_disk_is_counted_once(storage, file_cache):
+    url = (storage / "part-0.parquet").as_uri()
+    path = await file_cache.get(url)
+    path.unlink()
+
+    assert await file_cache.get(url) == path
+    assert file_cache.total_bytes == len(CONTENT)
+    assert file_cache.misses == 2
+
+
+async def test_least_recently_used_file_is_evicted(storage, tmp_path):
+    cache = FileCache(tmp_path / "cache", max_bytes=2 * len(CONTENT))
+    urls = []
+    for i in range(3):
+        (storage / f"part-{i}.parquet").write_bytes(CONTENT)
+        urls.append((storage / f"part-{i}.parquet").as_uri())
+
+    first = await cache.get(urls[0])
+    await cache.get(urls[1])
+    await cache.get(urls[0])
+    await cache.get(urls[2])
+
+    assert cache.evictions == 1
+    assert cache.total_bytes == 2 * len(CONTENT)
+    assert first.exists()
+    assert not (cache.directory / files.get_cache_key(urls[1])).exists()
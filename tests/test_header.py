@@ -0,0 +1,27 @@
+import pytest
+
+from data_sharing.utils.header import normalize_capabilities_header
+
+
+@pytest.mark.parametrize(
+    "header, normalized",
+    [
+        (None, None),
+        ("", None),
+        ("responseformat=delta", "responseformat=delta"),
+        (
+            "readerFeatures=DeletionVectors, columnMapping;responseFormat=delta",
+            "readerfeatures=columnmapping,deletionvectors;responseformat=delta",
+        ),
+        (
+            "responseformat=delta,parquet; readerfeatures=deletionvectors",
+            "readerfeatures=deletionvectors;responseformat=delta,parquet",
+        ),
+        ("responseformat=delta;foo=bar", "responseformat=delta"),
+        ("responseformat=delta,csv;readerfeatures=made-up", "responseformat=delta"),
+        ("responseformat;;=delta", None),
+        ("x" * 10_000, None),
+    ],
+)
+def test_normalize_capabilities_header(header, normalized):
+    assert normalize_capabilities_header(header) == normalized
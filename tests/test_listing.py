@@ -0,0 +1,82 @@
+import httpx
+import orjson
+import pytest
+
+from data_sharing.internal.listing import ListingSerializer
+from data_sharing.internal.sharing import sharing_client
+
+pytestmark = pytest.mark.anyio
+
+SHARE_ID = "4bfa74c2-f1af-44e8-bc42-205d4d92dd15"
+TABLE_ID = "074f7073-32a0-4f30-b4ec-9fe7109471f2"
+
+LISTINGS = {
+    "/sharing/shares": {"items": [{"name": "gold", "id": SHARE_ID}]},
+    "/sharing/shares/gold/schemas": {
+        "items": [{"name": "school-master", "share": "gold"}]
+    },
+    "/sharing/shares/gold/all-tables": {
+        "items": [
+            {"name": "BRA", "schema": "school-master", "share": "gold", "id": TABLE_ID}
+        ]
+    },
+}
+
+
+def serve(responses: list[httpx.Response | None]):
+    """Send the given responses in turn, then the listings."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if responses:
+            return responses.pop(0)
+        return httpx.Response(200, content=orjson.dumps(LISTINGS[request.url.path]))
+
+    return httpx.MockTransport(handler)
+
+
+async def test_gateway_error_page_does_not_abort_the_check(monkeypatch):
+    monkeypatch.setattr(
+        sharing_client,
+        "_transport",
+        serve([httpx.Response(502, content=b"<html>Bad Gateway</html>")]),
+    )
+    serializer = ListingSerializer(enabled=True, sample_size=10)
+
+    assert await serializer.check() is False
+    assert (serializer.trusted, serializer.checked) == (False, False)
+
+
+async def test_check_is_retried_until_it_runs(monkeypatch):
+    def refuse(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    failures = [httpx.MockTransport(refuse)] * 2
+    transport = serve([])
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if failures:
+            return await failures.pop(0).handle_async_request(request)
+        return await transport.handle_async_request(request)
+
+    monkeypatch.setattr(sharing_client, "_transport", httpx.MockTransport(handle))
+    serializer = ListingSerializer(enabled=True, sample_size=10, retry_interval=0)
+
+    assert serializer.response({"items": []}) == {"items": []}
+    await serializer.run()
+
+    assert serializer.attempts == 3
+    assert (serializer.trusted, serializer.checked) == (True, True)
+    assert serializer.response({"items": []}).body == b'{"items":[]}'
+
+
+async def test_incompatible_listing_is_not_trusted(monkeypatch):
+    shares = {"items": [{"name": "gold", "id": SHARE_ID, "unknown": True}]}
+    monkeypatch.setattr(
+        sharing_client,
+        "_transport",
+        serve([httpx.Response(200, content=orjson.dumps(shares))]),
+    )
+    serializer = ListingSerializer(enabled=True, sample_size=10)
+
+    assert await serializer.check() is True
+    assert (serializer.trusted, serializer.checked) == (False, True)
@@ -0,0 +1,59 @@
+from secrets import token_urlsafe
+
+import pytest
+from sqlalchemy import event
+
+from data_sharing.models import ApiKey, Role, Schema
+from data_sharing.permissions.utils import get_principal
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def statements(engine, db):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+async def test_get_principal_runs_a_single_statement(db, statements):
+    # Roles and schemas grant each other, so that loading them through the ORM
+    # relationships would cascade
+    roles = [Role(id=f"TQ{i}", description="Query count test") for i in "AB"]
+    schemas = [
+        Schema(id=f"query-count-{i}", description="Query count test") for i in "ab"
+    ]
+    for schema in schemas:
+        schema.roles.update(roles)
+    api_key = ApiKey(description="Query count test", secret=token_urlsafe(32))
+    api_key.roles.update(roles)
+    api_key.schemas.update(schemas)
+    db.add(api_key)
+    await db.flush()
+    # Otherwise an ORM load of the key would be served from the identity map
+    db.expunge_all()
+    statements.clear()
+
+    principal = await get_principal((str(api_key.id), "secret"), db)
+
+    assert len(statements) == 1, statements
+    assert principal.id == api_key.id
+    assert principal.role_ids == {"TQA", "TQB"}
+    assert principal.schema_ids == {"query-count-a", "query-count-b"}
+
+
+async def test_get_principal_of_unknown_key(db, statements):
+    principal = await get_principal(("00000000-0000-4000-8000-000000000001", "x"), db)
+
+    assert principal is None
+    assert len(statements) == 1, statements
+
+
+async def test_get_principal_of_malformed_key_runs_no_statement(db, statements):
+    assert await get_principal(("not-a-uuid", "x"), db) is None
+    assert statements == []
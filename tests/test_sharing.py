@@ -0,0 +1,164 @@
+from functools import partial
+
+import httpx
+import orjson
+import pytest
+
+from data_sharing.internal.cache import TTLCache
+from data_sharing.internal.sharing import (
+    get_cached_response,
+    parse_table_query,
+    sharing_client,
+    stream_limited_files,
+    stream_tagged_table_query,
+)
+from data_sharing.settings import settings
+from data_sharing.utils.streams import merge_streams
+
+
+def test_parse_table_query():
+    content = b'{"limitHint": 10, "predicateHints": ["a = 1"], "version": 3}'
+    assert parse_table_query(content) == {
+        "limitHint": 10,
+        "predicateHints": ["a = 1"],
+        "version": 3,
+    }
+
+
+@pytest.mark.parametrize("content", [b"", b"  \n"])
+def test_parse_empty_table_query(content):
+    assert parse_table_query(content) == {}
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"{",
+        b"[]",
+        b'{"limitHint": -1}',
+        b'{"limitHint": "10"}',
+        b'{"startingVersion": true}',
+        b'{"startingVersion": 1.5}',
+    ],
+)
+def test_parse_invalid_table_query(content):
+    with pytest.raises(ValueError):
+        parse_table_query(content)
+
+
+def test_parse_table_query_leaves_other_fields_to_upstream():
+    assert parse_table_query(b'{"version": "latest"}') == {"version": "latest"}
+
+
+@pytest.mark.anyio
+async def test_cached_response_of_an_older_version_is_fetched_again():
+    cache = TTLCache(maxsize=10, ttl=60)
+    versions = iter([1, 2])
+
+    async def fetch():
+        return {"deltaTableVersion": next(versions)}
+
+    assert await get_cached_response(cache, "t", fetch) == {"deltaTableVersion": 1}
+    assert await get_cached_response(cache, "t", fetch, min_version=1) == {
+        "deltaTableVersion": 1
+    }
+    assert await get_cached_response(cache, "t", fetch, min_version=2) == {
+        "deltaTableVersion": 2
+    }
+    assert cache.get("t") == {"deltaTableVersion": 2}
+
+
+async def broken_body():
+    yield b'{"protocol":{"minReaderVersion":1}}\n'
+    raise httpx.ReadTimeout("timed out")
+
+
+def sharing_handler(request: httpx.Request) -> httpx.Response:
+    table = request.url.path.split("/")[-2]
+    if table == "unreachable":
+        raise httpx.ConnectError("connection refused", request=request)
+    if table == "broken":
+        return httpx.Response(200, content=broken_body())
+    return httpx.Response(
+        200,
+        headers={"delta-table-version": "3"},
+        content=b'{"protocol":{"minReaderVersion":1}}\n{"metaData":{}}\n',
+    )
+
+
+@pytest.mark.anyio
+async def test_transport_errors_are_reported_per_table(monkeypatch):
+    monkeypatch.setattr(
+        sharing_client, "_transport", httpx.MockTransport(sharing_handler)
+    )
+
+    lines = [
+        orjson.loads(line)
+        async for line in merge_streams(
+            [
+                partial(stream_tagged_table_query, "s", "t", table, {})
+                for table in ("ok", "unreachable", "broken")
+            ],
+            concurrency=3,
+        )
+    ]
+
+    by_table = {}
+    for line in lines:
+        by_table.setdefault(line.pop("source")["name"], []).append(line)
+    assert by_table["ok"] == [
+        {"deltaTableVersion": 3},
+        {"protocol": {"minReaderVersion": 1}},
+        {"metaData": {}},
+    ]
+    assert by_table["unreachable"] == [
+        {
+            "error": {
+                "errorCode": "BAD_GATEWAY",
+                "message": "Could not retrieve the response of the Delta Sharing server",
+            },
+            "statusCode": 502,
+        }
+    ]
+    assert by_table["broken"][0] == {"protocol": {"minReaderVersion": 1}}
+    assert by_table["broken"][1]["statusCode"] == 504
+
+
+def file_line(name: str, num_records: int | None) -> bytes:
+    stats = None if num_records is None else orjson.dumps({"numRecords": num_records})
+    return orjson.dumps({"file": {"url": name, "stats": stats and stats.decode()}})
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "limit_hint, files",
+    [
+        (0, []),
+        (5, ["a"]),
+        (10, ["a"]),
+        (11, ["a", "b", "c"]),
+        (100, ["a", "b", "c", "d"]),
+    ],
+)
+async def test_limit_hint_truncates_files(limit_hint, files, monkeypatch):
+    monkeypatch.setattr(settings, "FILE_CACHE_ENABLED", False)
+    body = b"\n".join(
+        [
+            b'{"protocol":{"minReaderVersion":1}}',
+            b'{"metaData":{"id":"m"}}',
+            file_line("a", 10),
+            # Files without stats are kept while the limit is not reached
+            file_line("b", None),
+            file_line("c", 10),
+            file_line("d", 10),
+        ]
+    )
+    sharing_res = httpx.Response(200, content=body)
+
+    lines = [
+        orjson.loads(line)
+        async for line in stream_limited_files(sharing_res, limit_hint)
+    ]
+
+    assert [next(iter(line)) for line in lines[:2]] == ["protocol", "metaData"]
+    assert [line["file"]["url"] for line in lines[2:]] == files
@@ -0,0 +1,74 @@
+import httpx
+import orjson
+import pytest
+
+from data_sharing.internal import stats
+from data_sharing.internal.cache import TTLCache
+from data_sharing.internal.sharing import sharing_client
+
+
+def file_line(num_records: int, min_id: int, max_id: int, **partition_values) -> bytes:
+    file_stats = {
+        "numRecords": num_records,
+        "minValues": {"id": min_id},
+        "maxValues": {"id": max_id},
+        "nullCount": {"id": 0},
+    }
+    return orjson.dumps(
+        {
+            "file": {
+                "url": "https://storage/part.parquet",
+                "partitionValues": partition_values,
+                "size": 100,
+                "stats": orjson.dumps(file_stats).decode(),
+            }
+        }
+    )
+
+
+def test_aggregate_file_stats():
+    content = b"\n".join(
+        [
+            b'{"protocol":{"minReaderVersion":1}}',
+            file_line(10, 1, 10, country="BRA"),
+            file_line(5, 11, 15, country="PHL"),
+            orjson.dumps({"file": {"url": "x", "partitionValues": {}, "size": 7}}),
+        ]
+    )
+
+    statistics = stats.compute_table_statistics(content, by_partition=False)
+
+    assert statistics == {
+        "numFiles": 3,
+        "numFilesWithoutStats": 1,
+        "numRecords": 15,
+        "size": 207,
+        "columns": {"id": {"min": 1, "max": 15, "nullCount": 0}},
+    }
+
+
+@pytest.mark.anyio
+async def test_statistics_are_computed_at_the_version_they_are_cached_under(
+    monkeypatch,
+):
+    monkeypatch.setattr(stats, "stats_cache", TTLCache(maxsize=10, ttl=60))
+    queries = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/version"):
+            return httpx.Response(200, headers={"delta-table-version": "2"})
+        queries.append(orjson.loads(request.content))
+        # A commit landed after /version was asked
+        return httpx.Response(
+            200,
+            content=file_line(10, 1, 10),
+            headers={"delta-table-version": str(queries[-1].get("version", 3))},
+        )
+
+    monkeypatch.setattr(sharing_client, "_transport", httpx.MockTransport(handler))
+
+    statistics = await stats.get_table_statistics("gold", "school-master", "BRA")
+
+    assert queries == [{"version": 2}]
+    assert statistics["deltaTableVersion"] == 2
+    assert stats.stats_cache.get(("gold", "school-master", "BRA", 2, False)) is not None
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from data_sharing.utils.streams import iter_ndjson_lines, merge_streams
+
+pytestmark = pytest.mark.anyio
+
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+
+async def collect(stream) -> list:
+    return [item async for item in stream]
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        [b'{"a":1}\n{"b":2}\n'],
+        [b'{"a":1}\n{"b":2}'],
+        [b'{"a"', b":1}", b'\n{"b":2}\n'],
+        [b'{"a":1}', b"\n", b"\n", b'{"b"', b":2}"],
+        [bytes([c]) for c in b'{"a":1}\n\n  \n{"b":2}\n'],
+    ],
+)
+async def test_iter_ndjson_lines(chunks):
+    assert await collect(iter_ndjson_lines(aiter(chunks))) == [b'{"a":1}', b'{"b":2}']
+
+
+async def test_iter_ndjson_lines_joins_a_long_line_once():
+    chunks = [b"x" * 1024] * 1000 + [b"\nend"]
+    lines = await collect(iter_ndjson_lines(aiter(chunks)))
+    assert lines == [b"x" * 1024 * 1000, b"end"]
+
+
+async def test_merge_streams_interleaves_and_keeps_order_per_stream():
+    async def stream(name: bytes):
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield name + str(i).encode()
+
+    chunks = await collect(
+        merge_streams([lambda n=n: stream(n) for n in (b"a", b"b")], concurrency=2)
+    )
+    assert sorted(chunks) == [b"a0", b"a1", b"a2", b"b0", b"b1", b"b2"]
+    assert [c for c in chunks if c.startswith(b"a")] == [b"a0", b"a1", b"a2"]
+
+
+async def test_merge_streams_limits_concurrency():
+    running = 0
+    peak = 0
+
+    async def stream():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        yield b"x"
+        running -= 1
+
+    chunks = await collect(merge_streams([stream] * 5, concurrency=2))
+    assert chunks == [b"x"] * 5
+    assert peak == 2
+
+
+async def test_merge_streams_raises_a_producer_error():
+    async def failing():
+        yield b"x"
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await collect(merge_streams([failing], concurrency=1))
+
+
+async def test_closing_merge_streams_cancels_the_producers():
+    cancelled = []
+
+    async def endless(name: bytes):
+        try:
+            while True:
+                await asyncio.sleep(0)
+                yield name
+        finally:
+            cancelled.append(name)
+
+    merged = merge_streams([lambda n=n: endless(n) for n in (b"a", b"b")], 2)
+    assert await anext(merged) in (b"a", b"b")
+    await merged.aclose()
+
+    assert sorted(cancelled) == [b"a", b"b"]
@@ -0,0 +1,106 @@
+import httpx
+import pytest
+
+from data_sharing.internal.sharing import metadata_cache, sharing_client
+from data_sharing.internal.upstream import UpstreamSwitch
+from data_sharing.internal.warmer import cache_warmer
+
+pytestmark = pytest.mark.anyio
+
+BLUE, GREEN = "blue:8890", "green:8890"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """A switch between two hosts whose health is set through `healthy`."""
+    monkeypatch.setattr(sharing_client, "base_url", f"http://{BLUE}")
+    monkeypatch.setattr(cache_warmer, "request_counts", {("s", "sc", "t", None): 1})
+    switch = UpstreamSwitch(
+        hosts=[BLUE, GREEN],
+        active=BLUE,
+        interval=1,
+        threshold=2,
+        warm_timeout=1,
+        concurrency=2,
+    )
+    switch.healthy = {BLUE: True, GREEN: True}
+    switch.requests = []
+
+    for host in (BLUE, GREEN):
+
+        def handler(request: httpx.Request, host=host) -> httpx.Response:
+            switch.requests.append((host, request.url.path))
+            return httpx.Response(200 if switch.healthy[host] else 503)
+
+        switch._clients[host]._transport = httpx.MockTransport(handler)
+    return switch
+
+
+def test_observe_needs_threshold_consecutive_probes(upstream):
+    assert upstream.observe(GREEN, False) is False
+    assert upstream.up[GREEN] is None
+    assert upstream.observe(GREEN, False) is False
+    assert upstream.up[GREEN] is False
+
+    # A single healthy probe resets the streak but does not bring it up
+    assert upstream.observe(GREEN, True) is False
+    assert upstream.up[GREEN] is False
+    assert upstream.observe(GREEN, True) is True
+    assert upstream.up[GREEN] is True
+
+
+async def test_fails_over_when_the_active_host_goes_down(upstream):
+    await upstream.check()
+    await upstream.check()
+    assert upstream.up == {BLUE: True, GREEN: True}
+    metadata_cache.set("key", "stale")
+
+    upstream.healthy[BLUE] = False
+    await upstream.check()
+    assert upstream.active == BLUE
+
+    await upstream.check()
+    assert upstream.active == GREEN
+    assert upstream.failovers == 1
+    assert str(sharing_client.base_url) == f"http://{GREEN}"
+    assert metadata_cache.get("key") is None
+
+
+async def test_warms_and_switches_when_the_standby_comes_up(upstream):
+    upstream.healthy[GREEN] = False
+    await upstream.check()
+    await upstream.check()
+    assert upstream.up == {BLUE: True, GREEN: False}
+    upstream.requests.clear()
+
+    upstream.healthy[GREEN] = True
+    await upstream.check()
+    assert upstream.active == BLUE
+    await upstream.check()
+
+    assert upstream.active == GREEN
+    assert upstream.switches == 1
+    assert upstream.failovers == 0
+    assert (
+        GREEN,
+        "/sharing/shares/s/schemas/sc/tables/t/metadata",
+    ) in upstream.requests
+    assert upstream.last_warmed_tables == 1
+
+
+async def test_does_not_switch_if_the_standby_fails_after_warming(upstream):
+    upstream.healthy[GREEN] = False
+    await upstream.check()
+    await upstream.check()
+    upstream.healthy[GREEN] = True
+    await upstream.check()
+
+    async def warm(host):
+        upstream.healthy[GREEN] = False
+
+    upstream.warm = warm
+    await upstream.check()
+
+    assert upstream.active == BLUE
+    assert upstream.up[GREEN] is False
+    assert upstream.switches == 0